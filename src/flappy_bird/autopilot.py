@@ -0,0 +1,217 @@
+"""Search-based autopilot for Flappy Bird
+
+The planner runs a beam search over flap/no-flap sequences every frame. Bird
+physics is the same as Bird.update, but the whole beam is stepped at once with
+NumPy. Obstacle motion does not depend on the bird, so the obstacle positions
+for the planning horizon are forecast once per decision from a snapshot of the
+live objects instead of being re-simulated for every node. With
+GameConfig.pixel_collision the bird's opaque pixels stay within a pixel of the
+square it is planned as (a turned bird reaches one row lower), but the pipe
+caps reach CAP_OVERHANG further to either side, so the forecast widens every
+pipe by that and keeps the bird a row further from the lower pipe.
+
+Run ``python -m flappy_bird.autopilot`` to play headless games with the bot.
+"""
+
+import argparse
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from flappy_bird.collision import CAP_OVERHANG
+from flappy_bird.config import DEFAULT_CONFIG, GameConfig
+from flappy_bird.constants import SCREEN_HEIGHT, GROUND_HEIGHT, FPS, INVINCIBILITY_DURATION
+from flappy_bird.entities import PIPE_WIDTH
+from flappy_bird.pipe import HalfPipe
+from flappy_bird.simulation import Simulation
+
+GROUND_Y: int = SCREEN_HEIGHT - GROUND_HEIGHT
+
+
+class Forecast(NamedTuple):
+    """Allowed band for the top edge of the bird's rect at each future frame"""
+    low: np.ndarray  # Smallest allowed int(bird.y - radius)
+    high: np.ndarray  # Largest allowed int(bird.y - radius)
+    target: np.ndarray  # Preferred bird.y (centre of the next opening)
+    protected: np.ndarray  # Frames where invincibility suppresses pipe collisions
+
+
+def forecast_obstacles(sim: Simulation, horizon: int) -> Forecast:
+    """Predict the opening the bird must fly through for the next frames"""
+    steps = np.arange(1, horizon + 1, dtype=np.float64)[:, None]
+    speed = sim.config.pipe_speed(sim.score)
+    radius = sim.bird.radius
+    bird_left = int(sim.bird.x - radius)
+    bird_right = bird_left + radius * 2
+    slack = 0  # Rows the bird's sprite may reach below its square
+    if sim.config.pixel_collision:
+        slack = 1
+        bird_left, bird_right = bird_left - CAP_OVERHANG - slack, bird_right + CAP_OVERHANG + slack
+
+    # One column per obstacle: x position, top opening edge and bottom opening edge
+    xs: List[float] = []
+    tops: List[np.ndarray] = []
+    bottoms: List[np.ndarray] = []
+    for pipe in sim.pipes:
+        xs.append(pipe.x)
+        if pipe.moving:
+            offset = np.sin(pipe.move_phase + pipe.move_speed * steps[:, 0]) * pipe.move_amplitude
+            tops.append(np.trunc(pipe.base_height + offset))
+            bottoms.append(np.trunc(pipe.base_height + sim.config.pipe_gap + offset))
+        else:
+            tops.append(np.full(horizon, float(pipe.top_pipe.height)))
+            bottoms.append(np.full(horizon, float(pipe.bottom_pipe.y)))
+    for half_pipe in sim.half_pipes:
+        # Half pipes are never spawned as moving ones, so their rect is fixed
+        xs.append(half_pipe.x)
+        if half_pipe.position == HalfPipe.TOP:
+            tops.append(np.full(horizon, float(half_pipe.pipe_rect.height)))
+            bottoms.append(np.full(horizon, float(GROUND_Y + radius * 2)))
+        else:
+            tops.append(np.zeros(horizon))
+            bottoms.append(np.full(horizon, float(half_pipe.pipe_rect.y)))
+
+    low = np.full(horizon, -np.inf)
+    high = np.full(horizon, np.inf)
+    target = np.full(horizon, GROUND_Y / 2)
+    if xs:
+        x = np.trunc(np.asarray(xs)[None, :] - speed * steps)
+        top = np.stack(tops, axis=1)
+        bottom = np.stack(bottoms, axis=1) - radius * 2 - slack
+        overlap = (x < bird_right) & (x + PIPE_WIDTH > bird_left)
+        low = np.max(np.where(overlap, top, -np.inf), axis=1)
+        high = np.min(np.where(overlap, bottom, np.inf), axis=1)
+
+        # Aim for the middle of the nearest opening that has not been passed yet
+        ahead = np.where(x + PIPE_WIDTH > bird_left, x, np.inf)
+        nearest = np.argmin(ahead, axis=1)
+        rows = np.arange(horizon)
+        centre = (top[rows, nearest] + bottom[rows, nearest]) / 2 + radius
+        target = np.where(np.isfinite(ahead[rows, nearest]), centre, target)
+
+    protected = np.zeros(horizon, dtype=bool)
+    if sim.invincible:
+        elapsed = (sim.tick + steps[:, 0].astype(np.int64) - 1) * 1000 // FPS - sim.invincible_timer
+        protected = elapsed <= INVINCIBILITY_DURATION
+    return Forecast(low=low, high=high, target=target, protected=protected)
+
+
+class Autopilot:
+    """Beam-search player that decides whether to flap on every frame"""
+
+    def __init__(self, nodes_per_tick: int = 8192, horizon: int = 48) -> None:
+        self.nodes_per_tick: int = max(2 * horizon, nodes_per_tick)
+        self.horizon: int = horizon
+        self.beam_width: int = max(1, self.nodes_per_tick // (2 * horizon))
+        self.nodes_expanded: int = 0
+        self.planning_time: float = 0.0  # Seconds spent inside decide()
+
+    @property
+    def nodes_per_second(self) -> float:
+        """Planning throughput over every decision made so far"""
+        if self.planning_time <= 0:
+            return 0.0
+        return self.nodes_expanded / self.planning_time
+
+    def decide(self, sim: Simulation) -> bool:
+        """Return True if the bird should flap on the next step"""
+        started = time.perf_counter()
+        forecast = forecast_obstacles(sim, self.horizon)
+        flap, nodes = self._search(sim.bird.y, sim.bird.velocity, sim.bird.radius, forecast, sim.config)
+        self.nodes_expanded += nodes
+        self.planning_time += time.perf_counter() - started
+        return flap
+
+    def _search(self, y0: float, velocity0: float, radius: int, forecast: Forecast,
+                config: GameConfig = DEFAULT_CONFIG) -> Tuple[bool, int]:
+        width = self.beam_width
+        floor = GROUND_Y - radius
+        # Beam slots are preallocated; empty or dead slots carry an infinite cost
+        beam_y = np.full(width, y0)
+        beam_velocity = np.full(width, float(velocity0))
+        beam_first = np.zeros(width, dtype=bool)
+        beam_cost = np.full(width, np.inf)
+        beam_cost[0] = 0.0
+        y = np.empty(2 * width)
+        velocity = np.empty(2 * width)
+        first = np.empty(2 * width, dtype=bool)
+        cost = np.empty(2 * width)
+        nodes = 0
+        for depth in range(self.horizon):
+            # Expand every beam node with both actions: no flap in the first half, flap in the second
+            live = beam_cost < np.inf
+            nodes += 2 * int(np.count_nonzero(live))
+            np.add(beam_velocity, config.gravity, out=velocity[:width])
+            velocity[width:] = config.flap_strength + config.gravity
+            y[:width] = beam_y
+            y[width:] = beam_y
+            y += velocity
+            first[:width] = beam_first if depth else False
+            first[width:] = beam_first if depth else True
+
+            if forecast.protected[depth]:
+                # Invincibility skips every collision check, so the bird just stays on screen
+                velocity[(y < 0) | (y > floor)] = 0.0
+                np.minimum(np.maximum(y, 0, out=y), floor, out=y)
+                alive = np.concatenate((live, live))
+            else:
+                top_edge = np.floor(y - radius)
+                alive = (y > radius) & (y < floor) & (top_edge >= forecast.low[depth])
+                alive &= top_edge <= forecast.high[depth]
+                alive[:width] &= live
+                alive[width:] &= live
+                if not alive.any():
+                    break
+
+            # Keep the nodes closest to the next opening
+            np.abs(y - forecast.target[depth], out=cost)
+            cost += 2.0 * np.abs(velocity)
+            cost[~alive] = np.inf
+            keep = np.argpartition(cost, width - 1)[:width]
+            beam_y = y[keep]
+            beam_velocity = velocity[keep]
+            beam_first = first[keep]
+            beam_cost = cost[keep]
+        return bool(beam_first[np.argmin(beam_cost)]), nodes
+
+
+class EpisodeResult(NamedTuple):
+    """Outcome of one headless autopilot game"""
+    seed: Optional[int]
+    score: int
+    ticks: int
+    lives: float
+    nodes_per_second: float
+
+
+def run_episode(seed: Optional[int], autopilot: Autopilot, max_ticks: int = 60 * FPS * 10) -> EpisodeResult:
+    """Let the autopilot play one game headless until it ends or max_ticks pass"""
+    sim = Simulation(seed)
+    while not sim.game_over and sim.tick < max_ticks:
+        sim.step(autopilot.decide(sim))
+    return EpisodeResult(seed=seed, score=sim.score, ticks=sim.tick, lives=sim.lives,
+                         nodes_per_second=autopilot.nodes_per_second)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Play headless Flappy Bird games with the autopilot")
+    parser.add_argument("--episodes", type=int, default=5, help="number of games to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--nodes", type=int, default=8192, help="planning budget in nodes per tick")
+    parser.add_argument("--horizon", type=int, default=48, help="planning depth in ticks")
+    parser.add_argument("--max-ticks", type=int, default=60 * FPS * 10, help="tick limit per game")
+    args = parser.parse_args(argv)
+
+    autopilot = Autopilot(nodes_per_tick=args.nodes, horizon=args.horizon)
+    for episode in range(args.episodes):
+        result = run_episode(args.seed + episode, autopilot, args.max_ticks)
+        print(f"seed {result.seed}: score {result.score}, {result.ticks} ticks, {result.lives} lives left")
+    seconds = autopilot.planning_time
+    print(f"{autopilot.nodes_expanded} nodes in {seconds:.2f}s of planning "
+          f"({autopilot.nodes_per_second:,.0f} nodes/s, "
+          f"{autopilot.nodes_per_tick} nodes/tick budget)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,22 @@ from flappy_bird.constants import FLAP_STRENGTH, GRAVITY, SCREEN_HEIGHT, GROUND_
 from flappy_bird.sounds import flap_sound
 
 
+def draw_bird_body(surface: pygame.Surface, radius: int, alpha: int = 255) -> None:
+    """Draw an unrotated bird (body, eye and beak) centred on a 2 * radius square surface"""
+    # Draw body
+    pygame.draw.circle(surface, (255, 255, 0, alpha), (radius, radius), radius)
+    # Draw eye
+    pygame.draw.circle(surface, (0, 0, 0, alpha), (radius + 8, radius - 5), 4)
+    # Draw beak
+    pygame.draw.polygon(surface, (255, 165, 0, alpha), [(radius + 10, radius),
+                                                        (radius + 20, radius - 5),
+                                                        (radius + 20, radius + 5)])
+
+
 class Bird:
-    def __init__(self) -> None:
+    def __init__(self, gravity: float = GRAVITY, flap_strength: float = FLAP_STRENGTH) -> None:
+        self.gravity: float = gravity
+        self.flap_strength: float = flap_strength
         self.x: float = 100
         self.y: float = SCREEN_HEIGHT // 2
         self.velocity: float = 0
@@ -15,12 +29,12 @@ class Bird:
         self.rotation: float = 0
 
     def flap(self) -> None:
-        self.velocity = FLAP_STRENGTH
+        self.velocity = self.flap_strength
         flap_sound.play()  # Play flap sound
 
     def update(self) -> None:
         # Apply gravity
-        self.velocity += GRAVITY
+        self.velocity += self.gravity
         self.y += self.velocity
 
         # Calculate rotation based on velocity
@@ -40,37 +54,10 @@ class Bird:
     def draw(self, surface: pygame.Surface, invincible: bool = False) -> None:
         # Create a surface for the bird with rotation
         bird_surface = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
-        
-        if invincible:
-            # Make bird semi-transparent when invincible (flashing effect)
-            # Flash every 200ms
-            if int(pygame.time.get_ticks() / 200) % 2 == 0:
-                # Draw semi-transparent bird (flashing)
-                pygame.draw.circle(bird_surface, (255, 255, 0, 128), (self.radius, self.radius), self.radius)
-                # Draw eye with transparency
-                pygame.draw.circle(bird_surface, (0, 0, 0, 128), (self.radius + 8, self.radius - 5), 4)
-                # Draw beak with transparency
-                pygame.draw.polygon(bird_surface, (255, 165, 0, 128), [(self.radius + 10, self.radius),
-                                                         (self.radius + 20, self.radius - 5),
-                                                         (self.radius + 20, self.radius + 5)])
-            else:
-                # Draw normal bird when not flashing
-                pygame.draw.circle(bird_surface, (255, 255, 0), (self.radius, self.radius), self.radius)
-                # Draw eye
-                pygame.draw.circle(bird_surface, (0, 0, 0), (self.radius + 8, self.radius - 5), 4)
-                # Draw beak
-                pygame.draw.polygon(bird_surface, (255, 165, 0), [(self.radius + 10, self.radius),
-                                                         (self.radius + 20, self.radius - 5),
-                                                         (self.radius + 20, self.radius + 5)])
-        else:
-            # Draw normal bird
-            pygame.draw.circle(bird_surface, (255, 255, 0), (self.radius, self.radius), self.radius)
-            # Draw eye
-            pygame.draw.circle(bird_surface, (0, 0, 0), (self.radius + 8, self.radius - 5), 4)
-            # Draw beak
-            pygame.draw.polygon(bird_surface, (255, 165, 0), [(self.radius + 10, self.radius),
-                                                         (self.radius + 20, self.radius - 5),
-                                                         (self.radius + 20, self.radius + 5)])
+
+        # Make bird semi-transparent when invincible (flashing effect every 200ms)
+        flashing = invincible and int(pygame.time.get_ticks() / 200) % 2 == 0
+        draw_bird_body(bird_surface, self.radius, 128 if flashing else 255)
 
         # Rotate the bird surface
         rotated_surface = pygame.transform.rotate(bird_surface, -self.rotation)
@@ -0,0 +1,132 @@
+"""Pixel-accurate collision between the bird and the obstacles
+
+Bird.get_mask() is the square around the bird, so with box collision a pipe
+that only grazes a corner of the square counts as a hit, while the caps,
+which overhang the pipe by 5 pixels on each side, never do. With
+GameConfig.pixel_collision a Simulation tests the bird as it is drawn
+instead: its rotated sprite against the bodies and caps of the pipes.
+
+Nothing is rendered during a game. The bird's mask is made once per
+ROTATION_STEP degrees of rotation, and since pipe bodies and caps are solid
+rectangles, one mask of each serves every pipe: the body mask is as tall as
+the screen and placed so that it ends at the opening. (Above the top of the
+screen it reaches further than the drawn pipe, but a bird that high has
+already hit the ceiling.) hits() first makes the box test of
+EntityStore.hits with the sprite's rect widened by the cap overhang, and only
+calls Mask.overlap for the obstacles that pass it.
+
+Run ``python -m flappy_bird.collision`` to compare collision checks per
+second with check_collision.
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pygame
+
+from flappy_bird.bird import Bird, draw_bird_body
+from flappy_bird.constants import SCREEN_HEIGHT
+from flappy_bird.entities import BIRD_COLUMNS, PIPE_WIDTH, EntityStore
+
+ROTATION_STEP: int = 5  # Degrees between precomputed bird masks
+CAP_OVERHANG: int = 5  # Caps are 70 wide, 5 more than the body on either side
+CAP_HEIGHT: int = 20
+SPRITE_REACH: int = 22  # Half the width of the bird's sprite turned by 45 degrees, rounded up
+_BIRD_X: int = (BIRD_COLUMNS[0] + BIRD_COLUMNS[1]) // 2
+# x range that the bird's sprite or a cap touching it can reach into, for EntityStore's watch windows
+PIXEL_COLUMNS: Tuple[int, int] = (_BIRD_X - SPRITE_REACH - CAP_OVERHANG, _BIRD_X + SPRITE_REACH + CAP_OVERHANG)
+
+BODY_MASK = pygame.mask.Mask((PIPE_WIDTH, SCREEN_HEIGHT), fill=True)
+CAP_MASK = pygame.mask.Mask((PIPE_WIDTH + 2 * CAP_OVERHANG, CAP_HEIGHT), fill=True)
+
+
+class BirdMask(NamedTuple):
+    """Opaque pixels of the bird's sprite at one rotation"""
+    mask: pygame.mask.Mask
+    offset: Tuple[int, int]  # Top left of the sprite relative to the bird's centre, as Bird.draw places it
+
+
+_bird_masks: Dict[Tuple[int, int], BirdMask] = {}  # (radius, rotation) -> mask
+
+
+def bird_mask(radius: int, rotation: float) -> BirdMask:
+    """Mask of the bird's sprite at the nearest multiple of ROTATION_STEP degrees, made on first use"""
+    angle = int(round(rotation / ROTATION_STEP)) * ROTATION_STEP
+    shape = _bird_masks.get((radius, angle))
+    if shape is None:
+        sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        draw_bird_body(sprite, radius)
+        rotated = pygame.transform.rotate(sprite, -angle)
+        width, height = rotated.get_size()
+        shape = _bird_masks[radius, angle] = BirdMask(pygame.mask.from_surface(rotated), (-(width // 2),
+                                                                                          -(height // 2)))
+    return shape
+
+
+def hits(store: EntityStore, slot: int, bird: Bird) -> bool:
+    """Whether the bird as drawn overlaps the body or a cap of the obstacle in slot"""
+    return sprite_hits(store, slot, bird.x, bird.y, bird.radius, bird.rotation)
+
+
+def sprite_hits(store: EntityStore, slot: int, x: float, y: float, radius: int, rotation: float) -> bool:
+    """hits() for a bird sprite centred at (x, y), e.g. one bird of a Population"""
+    shape = bird_mask(radius, rotation)
+    mask = shape.mask
+    left, top = int(x) + shape.offset[0], int(y) + shape.offset[1]
+    width, height = mask.get_size()
+    # Cheap box test first, with the sprite's rect widened to where the caps reach
+    if not store.hits(slot, pygame.Rect(left - CAP_OVERHANG, top, width + 2 * CAP_OVERHANG, height)):
+        return False
+    pipe_x = int(store.x[slot]) - left
+    cap_x = pipe_x - CAP_OVERHANG
+    upper_h = int(store.upper_h[slot])
+    if upper_h > 0 and (mask.overlap(BODY_MASK, (pipe_x, upper_h - SCREEN_HEIGHT - top))
+                        or mask.overlap(CAP_MASK, (cap_x, upper_h - CAP_HEIGHT - top))):
+        return True
+    lower_y = int(store.lower_y[slot]) - top
+    return int(store.lower_h[slot]) > 0 and bool(mask.overlap(BODY_MASK, (pipe_x, lower_y))
+                                                 or mask.overlap(CAP_MASK, (cap_x, lower_y)))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare pixel-accurate collision checks with check_collision")
+    parser.add_argument("--cases", type=int, default=20000, help="bird and pipe positions to check")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from flappy_bird.pipe import Pipe
+    from flappy_bird.simulation import check_collision
+
+    # Birds around the edges of a pipe, at every rotation they can have
+    rng = random.Random(args.seed)
+    store = EntityStore(args.cases)
+    cases: List[Tuple[Bird, Pipe]] = []
+    for _ in range(args.cases):
+        pipe = Pipe(height=rng.randint(150, 300), move_phase=0.0, store=store)
+        pipe.x = _BIRD_X + rng.uniform(-PIPE_WIDTH - SPRITE_REACH - CAP_OVERHANG, SPRITE_REACH + CAP_OVERHANG)
+        bird = Bird()
+        bird.y = pipe.height + rng.uniform(-40, store.pipe_gap + 40)
+        bird.rotation = rng.uniform(-90, 90)
+        cases.append((bird, pipe))
+    for bird, pipe in cases:
+        hits(store, pipe.slot, bird)  # Make the masks of every rotation before timing
+
+    timings = {}
+    for name in ("box", "pixel"):
+        started = time.perf_counter()
+        if name == "box":
+            results = [check_collision(bird, [pipe]) for bird, pipe in cases]
+        else:
+            results = [hits(store, pipe.slot, bird) for bird, pipe in cases]
+        timings[name] = (time.perf_counter() - started, results)
+    (box_time, box), (pixel_time, pixel) = timings["box"], timings["pixel"]
+    print(f"check_collision: {len(cases) / box_time:,.0f} checks/s, {sum(box):,} hits")
+    print(f"pixel-accurate:  {len(cases) / pixel_time:,.0f} checks/s, {sum(pixel):,} hits")
+    print(f"box hits the bird's sprite misses: {sum(b and not p for b, p in zip(box, pixel)):,}; "
+          f"sprite hits the box misses (caps): {sum(p and not b for b, p in zip(box, pixel)):,}")
+
+
+if __name__ == "__main__":
+    main()
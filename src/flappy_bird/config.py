@@ -0,0 +1,60 @@
+"""Per-session game rules
+
+The tunable rules of the game live in a GameConfig, which a Simulation takes
+at construction, so games with different rules can run side by side in one
+process. The defaults are the constants of constants.py, and DEFAULT_CONFIG
+plays exactly like the original game. Configs are immutable NamedTuples, so
+they pickle cheaply across process pools and can key dicts.
+"""
+
+from typing import Any, Dict, Iterable, NamedTuple
+
+from flappy_bird.constants import (
+    GRAVITY, FLAP_STRENGTH, PIPE_GAP, BASE_PIPE_SPEED, DIFFICULTY_INCREMENT, PIPE_FREQUENCY,
+    HEART_FREQUENCY, FALL_DAMAGE_THRESHOLD, HALF_PIPE_SCORE_THRESHOLD
+)
+
+
+class GameConfig(NamedTuple):
+    """Rules of one game session"""
+    gravity: float = GRAVITY  # Added to the bird's velocity every tick
+    flap_strength: float = FLAP_STRENGTH  # Velocity right after a flap
+    pipe_gap: int = PIPE_GAP  # Height of the opening between top and bottom pipe
+    base_pipe_speed: float = BASE_PIPE_SPEED  # Pixels per tick at score 0
+    difficulty_increment: float = DIFFICULTY_INCREMENT  # Speed increase per 5 points
+    pipe_frequency: int = PIPE_FREQUENCY  # Milliseconds between pipes
+    heart_frequency: int = HEART_FREQUENCY  # Milliseconds between hearts
+    fall_damage_threshold: float = FALL_DAMAGE_THRESHOLD  # Minimum fall distance to take damage
+    half_pipe_score_threshold: int = HALF_PIPE_SCORE_THRESHOLD  # Half pipes start spawning after this score
+    pixel_collision: bool = False  # Collide the bird's drawn sprite with pipe bodies and caps (see collision.py)
+
+    def pipe_speed(self, score: int) -> float:
+        """Scroll speed at a score; it increases every 5 points"""
+        level = score // 5
+        return self.base_pipe_speed + (level * self.difficulty_increment)
+
+    def overrides(self) -> Dict[str, float]:
+        """Fields that differ from DEFAULT_CONFIG"""
+        return {name: value for name, value in self._asdict().items() if value != getattr(DEFAULT_CONFIG, name)}
+
+
+DEFAULT_CONFIG: GameConfig = GameConfig()
+
+
+def parse_config(assignments: Iterable[str], base: GameConfig = DEFAULT_CONFIG) -> GameConfig:
+    """Config from NAME=VALUE strings such as "gravity=0.3", applied on top of base"""
+    changes: Dict[str, Any] = {}
+    for assignment in assignments:
+        name, _, value = assignment.partition("=")
+        name = name.strip().replace("-", "_")
+        if name not in GameConfig._fields or not value:
+            raise ValueError(f"expected NAME=VALUE with NAME one of {', '.join(GameConfig._fields)}, "
+                             f"got {assignment!r}")
+        kind = GameConfig.__annotations__[name]
+        if kind is bool:
+            if value.lower() not in ("0", "1", "false", "true"):
+                raise ValueError(f"expected 0, 1, false or true for {name}, got {value!r}")
+            changes[name] = value.lower() in ("1", "true")
+        else:
+            changes[name] = int(float(value)) if kind is int else float(value)
+    return base._replace(**changes)
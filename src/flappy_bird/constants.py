@@ -20,6 +20,16 @@ BASE_PIPE_SPEED: int = 3
 PIPE_FREQUENCY: int = 1800  # milliseconds
 GROUND_HEIGHT: int = 100
 DIFFICULTY_INCREMENT: float = 0.2  # Speed increase per 5 points
+FPS: int = 60  # Simulation steps per second
+
+# Lives, damage and pickups
+MAX_LIVES: float = 3.0  # Player starts with 3 lives (supports half hearts)
+INVINCIBILITY_DURATION: int = 2000  # 2 seconds of invincibility (milliseconds)
+FALL_DAMAGE_THRESHOLD: float = 100  # Minimum fall distance to take damage
+MAX_FALL_DAMAGE: float = 3.0  # Maximum damage from a single fall
+HEART_FREQUENCY: int = 15000  # Spawn a heart every 15 seconds (milliseconds)
+HEART_HEAL_AMOUNT: float = 0.5  # Each heart restores 0.5 hearts (half a heart)
+HALF_PIPE_SCORE_THRESHOLD: int = 20  # Half pipes start spawning after score 20
 
 # Biome constants
 BIOME_INTERVAL: int = 10  # Change biome every 10 points
@@ -0,0 +1,214 @@
+"""Pre-generated obstacle courses for Flappy Bird
+
+A course holds the whole obstacle schedule for a seed as NumPy arrays, one
+entry per pipe. Pipes spawn on a fixed clock and the score only counts pipes
+that scroll past the bird, so the timing of every obstacle is known up front
+and the game, the autopilot and the oracle can all read the same schedule.
+
+A game grows its course REPAIR_BLOCK pipes at a time with a CourseBuilder, so
+a restart or the next stretch of pipes only costs a check of the new pipes.
+"""
+
+import math
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from flappy_bird.config import DEFAULT_CONFIG, GameConfig
+from flappy_bird.constants import SCREEN_HEIGHT, GROUND_HEIGHT, PIPE_GAP, PIPE_FREQUENCY, FPS
+
+if TYPE_CHECKING:
+    from flappy_bird.oracle import OracleResult, Reachable
+
+# Values of Course.half_pipe
+NO_HALF_PIPE: int = 0
+HALF_PIPE_TOP: int = 1
+HALF_PIPE_BOTTOM: int = 2
+
+MOVING_PIPE_SCORE_THRESHOLD: int = 40  # Half of the pipes move after score 40
+HALF_PIPE_HEIGHT: int = 200
+MIN_GAP_TOP: int = 150
+MAX_GAP_TOP: int = SCREEN_HEIGHT - GROUND_HEIGHT - PIPE_GAP - 50
+COURSE_BLOCK: int = 256  # Pipes drawn from one random stream
+REPAIR_BLOCK: int = 64  # Pipes a CourseBuilder adds, checks and repairs at a time
+# Config fields the oracle assumes are at their defaults
+ORACLE_FIELDS: Tuple[str, ...] = (
+    "gravity", "flap_strength", "pipe_gap", "base_pipe_speed", "difficulty_increment", "pipe_frequency"
+)
+
+
+class Course(NamedTuple):
+    """Obstacle schedule, indexed by pipe number"""
+    spawn_tick: np.ndarray  # Tick on which each pipe appears
+    gap_top: np.ndarray  # Height of the top pipe (top edge of the gap)
+    moving: np.ndarray  # Whether the pipe moves up and down
+    phase: np.ndarray  # Starting phase of the movement
+    half_pipe: np.ndarray  # NO_HALF_PIPE, HALF_PIPE_TOP or HALF_PIPE_BOTTOM after this pipe
+    half_pipe_height: np.ndarray  # How far the half pipe reaches into the screen
+    half_pipe_tick: np.ndarray  # Tick on which the half pipe appears (-1 if none)
+
+
+def spawn_ticks(n_pipes: int, pipe_frequency: int = PIPE_FREQUENCY, last_pipe: int = 0) -> np.ndarray:
+    """Ticks on which the pipe timer fires after last_pipe (ms), matching Simulation's millisecond clock"""
+    ticks = np.empty(n_pipes, dtype=np.int64)
+    for i in range(n_pipes):
+        # First tick whose time (tick * 1000 // FPS) is more than pipe_frequency after the last spawn
+        tick = -(-FPS * (last_pipe + pipe_frequency + 1) // 1000)
+        ticks[i] = tick
+        last_pipe = tick * 1000 // FPS
+    return ticks
+
+
+def half_pipe_ticks(pipe_ticks: np.ndarray, pipe_frequency: int = PIPE_FREQUENCY) -> np.ndarray:
+    """Ticks on which half pipes scheduled midway after each pipe appear"""
+    due = pipe_ticks * 1000 // FPS + pipe_frequency // 2
+    return -(-FPS * due // 1000)
+
+
+def max_gap_top(pipe_gap: int) -> int:
+    """Largest gap top that leaves room for a gap of pipe_gap above the ground"""
+    return max(MIN_GAP_TOP, SCREEN_HEIGHT - GROUND_HEIGHT - pipe_gap - 50)
+
+
+def _draw_block(seed: int, block: int, config: GameConfig = DEFAULT_CONFIG) -> Course:
+    """Draw one block of COURSE_BLOCK pipes from its own random stream"""
+    rng = np.random.default_rng([seed, block])
+    index = block * COURSE_BLOCK + np.arange(COURSE_BLOCK)
+    gap_top = rng.integers(MIN_GAP_TOP, max_gap_top(config.pipe_gap), size=COURSE_BLOCK, endpoint=True)
+    moving = (index >= MOVING_PIPE_SCORE_THRESHOLD) & (rng.random(COURSE_BLOCK) < 0.5)
+    phase = rng.uniform(0, math.pi * 2, size=COURSE_BLOCK)
+    has_half_pipe = (index >= config.half_pipe_score_threshold) & (rng.random(COURSE_BLOCK) < 0.5)
+    positions = rng.integers(HALF_PIPE_TOP, HALF_PIPE_BOTTOM, size=COURSE_BLOCK, endpoint=True)
+    return Course(
+        spawn_tick=np.empty(0, dtype=np.int64),  # Filled in once the blocks are joined
+        gap_top=gap_top.astype(np.int64),
+        moving=moving,
+        phase=phase,
+        half_pipe=np.where(has_half_pipe, positions, NO_HALF_PIPE).astype(np.int8),
+        half_pipe_height=np.full(COURSE_BLOCK, HALF_PIPE_HEIGHT, dtype=np.int64),
+        half_pipe_tick=np.empty(0, dtype=np.int64),
+    )
+
+
+def generate_course(seed: int, n_pipes: int, repair: bool = True, config: GameConfig = DEFAULT_CONFIG) -> Course:
+    """Draw a course with the same distributions the game uses under config
+
+    Pipes come in blocks with their own random streams and are repaired a
+    CourseBuilder step at a time, so a longer course for the same seed starts
+    with the shorter one.
+    """
+    course = CourseBuilder(seed, config, repair).grow(n_pipes)
+    return Course(*(field[:n_pipes] for field in course))
+
+
+class CourseBuilder:
+    """The course of a seed, grown REPAIR_BLOCK pipes at a time
+
+    With repair, obstacles that no flap sequence gets past are fixed as the
+    pipes are added. The oracle checks only the new pipes, starting from the
+    reachable set the last step carried over from the pipes before them, so a
+    step costs the same at pipe 10000 as at pipe 0 and repairs never reach
+    back into pipes already handed out. The oracle only knows the default
+    physics, so courses for configs that change it are never repaired. A
+    game may grow its course ahead on another thread while it plays.
+    """
+
+    def __init__(self, seed: int, config: GameConfig = DEFAULT_CONFIG, repair: bool = True) -> None:
+        self.seed = seed
+        self.config = config
+        self.repair = repair and _oracle_models(config)
+        self.course = Course(
+            spawn_tick=np.empty(0, dtype=np.int64), gap_top=np.empty(0, dtype=np.int64),
+            moving=np.empty(0, dtype=bool), phase=np.empty(0), half_pipe=np.empty(0, dtype=np.int8),
+            half_pipe_height=np.empty(0, dtype=np.int64), half_pipe_tick=np.empty(0, dtype=np.int64),
+        )
+        self._blocks: List[Course] = []  # Drawn so far, COURSE_BLOCK pipes each
+        self._reachable: Optional["Reachable"] = None  # Where the pipes so far leave the bird
+        self._lock = threading.Lock()  # A game's thread waits for a step another thread has started
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]  # Snapshots holding the builder are pickled for replay workers
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def grow(self, n_pipes: int) -> Course:
+        """The course with at least n_pipes pipes; the first ones never change"""
+        with self._lock:
+            while len(self.course.spawn_tick) < n_pipes:
+                self._step()
+            return self.course
+
+    def _step(self) -> None:
+        start = len(self.course.spawn_tick)
+        end = start + REPAIR_BLOCK
+        while len(self._blocks) * COURSE_BLOCK < end:
+            self._blocks.append(_draw_block(self.seed, len(self._blocks), self.config))
+        drawn = self._blocks[start // COURSE_BLOCK:-(-end // COURSE_BLOCK)]
+        offset = start - start // COURSE_BLOCK * COURSE_BLOCK
+        # One more spawn tick than pipes: the next step's first pipe, where the reachable set is carried to
+        last_pipe = int(self.course.spawn_tick[-1]) * 1000 // FPS if start else 0
+        ticks = spawn_ticks(REPAIR_BLOCK + 1, self.config.pipe_frequency, last_pipe)
+        new = Course(*(np.concatenate([block[field] for block in drawn])[offset:offset + REPAIR_BLOCK]
+                       for field in range(len(Course._fields))))
+        new = new._replace(spawn_tick=ticks[:-1], half_pipe_tick=np.where(
+            new.half_pipe != NO_HALF_PIPE, half_pipe_ticks(ticks[:-1], self.config.pipe_frequency), -1))
+        course = Course(*(np.concatenate((old, added)) for old, added in zip(self.course, new)))
+        if self.repair:
+            course, result = _repair(course, start, self._reachable, int(ticks[-1]))
+            self._reachable = result.reachable
+        self.course = course
+
+
+def _oracle_models(config: GameConfig) -> bool:
+    """Whether the oracle's physics and pipe timing are those of config"""
+    return all(getattr(config, name) == getattr(DEFAULT_CONFIG, name) for name in ORACLE_FIELDS)
+
+
+def repair_course(course: Course) -> Course:
+    """Fix every obstacle the flap physics cannot get past, earliest first
+
+    An impossible half pipe is dropped. An impossible pipe is held still at the
+    height of the pipe before it, with no half pipe in between; if that is not
+    enough the pipe before it is repaired the same way.
+    """
+    return _repair(course)[0]
+
+
+def _repair(course: Course, start: int = 0, entry: Optional["Reachable"] = None,
+            carry: Optional[int] = None) -> Tuple[Course, "OracleResult"]:
+    """repair_course() for the pipes from start on, flown from entry; return the course and its last check"""
+    # The oracle builds its timelines from courses, so it is imported here
+    from flappy_bird.oracle import solve
+
+    gap_top = course.gap_top.copy()
+    moving = course.moving.copy()
+    half_pipe = course.half_pipe.copy()
+    repaired = np.zeros(len(gap_top), dtype=bool)
+    while True:
+        course = course._replace(gap_top=gap_top, moving=moving, half_pipe=half_pipe,
+                                 half_pipe_tick=np.where(half_pipe != NO_HALF_PIPE, course.half_pipe_tick, -1))
+        result = solve(course, entry, carry)
+        if result.feasible or result.obstacle is None or result.obstacle < start:
+            return course, result
+        index = result.obstacle
+        if result.half_pipe:
+            half_pipe[index] = NO_HALF_PIPE
+            continue
+        # Walk back past pipes that were already flattened
+        while index > start and repaired[index]:
+            index -= 1
+        if repaired[index]:
+            return course, result  # Nothing left to repair
+        repaired[index] = True
+        moving[index] = False
+        if index > start:
+            half_pipe[index - 1] = NO_HALF_PIPE
+        if index > 0:
+            gap_top[index] = gap_top[index - 1]
+        else:
+            gap_top[index] = (SCREEN_HEIGHT - GROUND_HEIGHT - PIPE_GAP) // 2
@@ -0,0 +1,161 @@
+"""Resolution-independent presentation of the game
+
+The game always draws into a logical SCREEN_WIDTH x SCREEN_HEIGHT surface. A
+Presenter owns the window and shows that surface at any window size with a
+single scaling pass per frame, so the cost of presenting depends only on the
+window size, never on how much was drawn.
+
+The picture keeps its aspect ratio and is centred, with the rest of the window
+letterboxed. With integer scaling it is magnified by the largest whole factor
+that fits, pixel for pixel with pygame.transform.scale; otherwise it fills as
+much of the window as the aspect ratio allows with smoothscale. Either way the
+scaled frame is written straight into a subsurface of the window, created once
+per window size, so presenting allocates nothing. A window the size of the
+logical surface is drawn into directly and presenting costs nothing at all.
+
+Run ``python -m flappy_bird.display --window 1080x1920`` to measure drawing
+and presenting at a window size.
+"""
+
+import argparse
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import pygame
+
+from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+SCALINGS: Tuple[str, ...] = ("smooth", "integer")
+LETTERBOX_COLOR: Tuple[int, int, int] = (0, 0, 0)
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """Window size from "WIDTHxHEIGHT" such as "1080x1920" """
+    width, separator, height = text.lower().partition("x")
+    if not separator or not width.isdigit() or not height.isdigit() or not int(width) or not int(height):
+        raise ValueError(f"expected WIDTHxHEIGHT, got {text!r}")
+    return int(width), int(height)
+
+
+def fit(window: Tuple[int, int], scaling: str = "smooth") -> pygame.Rect:
+    """Rect of the window the logical surface is scaled into: centred, aspect kept"""
+    width, height = window
+    if scaling == "integer":
+        factor = min(width // SCREEN_WIDTH, height // SCREEN_HEIGHT)
+        if factor >= 1:
+            size = (SCREEN_WIDTH * factor, SCREEN_HEIGHT * factor)
+            return pygame.Rect((width - size[0]) // 2, (height - size[1]) // 2, *size)
+    # Smooth: the larger of width-bound and height-bound that fits
+    if width * SCREEN_HEIGHT <= height * SCREEN_WIDTH:
+        size = (width, max(1, width * SCREEN_HEIGHT // SCREEN_WIDTH))
+    else:
+        size = (max(1, height * SCREEN_WIDTH // SCREEN_HEIGHT), height)
+    return pygame.Rect((width - size[0]) // 2, (height - size[1]) // 2, *size)
+
+
+class Presenter:
+    """The game window and the logical surface the game draws into"""
+
+    def __init__(self, window: Optional[Tuple[int, int]] = None, fullscreen: bool = False,
+                 scaling: str = "smooth") -> None:
+        if scaling not in SCALINGS:
+            raise ValueError(f"unknown scaling {scaling!r}, expected one of {SCALINGS}")
+        self.scaling: str = scaling
+        if fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            size = window or (SCREEN_WIDTH, SCREEN_HEIGHT)
+            self.window = pygame.display.set_mode(size, pygame.RESIZABLE)
+        self.surface: pygame.Surface = self.window  # Replaced by an offscreen surface unless the sizes match
+        self.rect: pygame.Rect = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        self._target: Optional[pygame.Surface] = None  # Subsurface of the window the frame is scaled into
+        self._bars: List[pygame.Rect] = []  # Letterbox around the target
+        self._layout()
+
+    def _layout(self) -> None:
+        """Size the target and letterbox for the current window"""
+        window_size = self.window.get_size()
+        if window_size == (SCREEN_WIDTH, SCREEN_HEIGHT):
+            self.surface, self._target, self._bars = self.window, None, []
+            self.rect = self.window.get_rect()
+            return
+        if self.surface is self.window:
+            # Same pixel format as the window, so sprites converted for the display draw fast into it
+            self.surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        self.rect = fit(window_size, self.scaling)
+        self._target = self.window.subsurface(self.rect)
+        width, height = window_size
+        rect = self.rect
+        self._bars = [bar for bar in (pygame.Rect(0, 0, width, rect.top), pygame.Rect(0, rect.bottom, width, height),
+                                      pygame.Rect(0, rect.top, rect.left, rect.height),
+                                      pygame.Rect(rect.right, rect.top, width - rect.right, rect.height))
+                      if bar.width > 0 and bar.height > 0]
+
+    def handle(self, event: pygame.event.Event) -> bool:
+        """Follow a resize of the window; return whether the event was one"""
+        if event.type not in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+            return False
+        window = pygame.display.get_surface()
+        if window is not None and (window is not self.window or window.get_size() != self.rect.size):
+            self.window = window
+            self._layout()
+        return True
+
+    def present(self, source: Optional[pygame.Surface] = None) -> None:
+        """Scale the logical surface (or source, drawn elsewhere) into the window; call before
+        pygame.display.flip()"""
+        source = self.surface if source is None else source
+        if self._target is None:
+            if source is not self.window:
+                self.window.blit(source, (0, 0))
+            return
+        for bar in self._bars:
+            self.window.fill(LETTERBOX_COLOR, bar)
+        if self.rect.size == (SCREEN_WIDTH, SCREEN_HEIGHT):
+            self._target.blit(source, (0, 0))
+        elif self.scaling == "integer" and self.rect.width % SCREEN_WIDTH == 0:
+            pygame.transform.scale(source, self.rect.size, self._target)
+        else:
+            pygame.transform.smoothscale(source, self.rect.size, self._target)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure drawing and presenting frames at a window size")
+    parser.add_argument("--window", default="1080x1920", help="window size as WIDTHxHEIGHT")
+    parser.add_argument("--scaling", choices=SCALINGS, default="smooth", help="scaling of the logical surface")
+    parser.add_argument("--frames", type=int, default=300, help="frames per measurement")
+    args = parser.parse_args(argv)
+    try:
+        window = parse_size(args.window)
+    except ValueError as error:
+        parser.error(str(error))
+
+    from flappy_bird.graphics import draw_world, draw_hud
+    from flappy_bird.simulation import Simulation
+
+    pygame.init()
+    presenter = Presenter(window, scaling=args.scaling)
+    font = pygame.font.Font(None, 24)
+    print(f"window {window[0]}x{window[1]}, picture {presenter.rect.width}x{presenter.rect.height} "
+          f"at {presenter.rect.topleft}")
+    for label, flap_every in (("early game", 0), ("busy game", 1)):
+        sim = Simulation(0)
+        # Play in until the scene is full of obstacles, or just start
+        while flap_every and sim.tick < 3000 and not sim.game_over:
+            sim.step(sim.tick % 24 == 0)
+        drawing = presenting = 0.0
+        for frame in range(args.frames):
+            started = time.perf_counter()
+            draw_world(presenter.surface, sim, frame * 16)
+            draw_hud(presenter.surface, sim, font)
+            drawn = time.perf_counter()
+            presenter.present()
+            presenting += time.perf_counter() - drawn
+            drawing += drawn - started
+        print(f"{label}: draw {drawing / args.frames * 1000:.2f} ms, present {presenting / args.frames * 1000:.2f} ms "
+              f"per frame")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Structure-of-arrays store for the obstacles and pickups of a game
+
+Every pipe, half pipe and heart of a Simulation is one slot of an EntityStore,
+whose attributes are typed NumPy columns. A tick scrolls all of them with one
+subtraction and oscillates the moving ones with one np.sin over the phase
+column, however many are on screen. Pipe, HalfPipe and Heart are thin views
+of a slot (see column()), used for drawing and by code that works with single
+objects.
+
+Per-entity work is event driven: every slot has a trigger x, and the one
+comparison cull() makes per tick finds the few entities that crossed theirs,
+when they enter or leave the watch window around the bird's columns or leave
+the screen. Collision and scoring then only look at the watched obstacles.
+
+Free slots are parked far to the right, so whole-column operations can run
+over them without a mask. Slots are reused but never move, so a view stays
+valid until its entity is removed.
+"""
+
+import math
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from flappy_bird.constants import SCREEN_HEIGHT, GROUND_HEIGHT, PIPE_GAP
+
+# Values of the kind column
+KIND_PIPE: int = 0
+KIND_HALF_PIPE_TOP: int = 1
+KIND_HALF_PIPE_BOTTOM: int = 2
+KIND_HEART: int = 3
+
+PIPE_WIDTH: int = 60
+MOVE_SPEED: float = 0.03  # Phase step per tick of moving pipes and half pipes
+PIPE_AMPLITUDE: int = 40  # How far a moving pipe moves up and down
+HALF_PIPE_AMPLITUDE: int = 30
+MIN_HALF_PIPE_HEIGHT: int = 50
+HEART_RADIUS: int = 12
+HEART_FLOAT_SPEED: float = 0.02  # Radians per millisecond of the floating animation
+HEART_FLOAT_AMPLITUDE: float = 2
+GROUND_Y: int = SCREEN_HEIGHT - GROUND_HEIGHT
+BIRD_COLUMNS: Tuple[int, int] = (85, 115)  # x range of the bird's rect (Bird is at x 100 with radius 15)
+_PARKED_X: float = 1e12  # x of free slots: never on screen and never culled
+
+# Column names and types; every column has one entry per slot
+COLUMNS: Tuple[Tuple[str, Any], ...] = (
+    ("kind", np.int8),
+    ("alive", np.bool_),
+    ("x", np.float64),
+    ("base", np.float64),  # Base height of an obstacle, y of a heart
+    ("phase", np.float64),  # Movement phase
+    ("amplitude", np.float64),  # Movement amplitude
+    ("offset", np.float64),  # Current vertical offset of a moving obstacle
+    ("moving", np.bool_),
+    ("claimed", np.bool_),  # Pipe passed by the bird, or heart collected
+    ("scoring", np.bool_),  # Live pipe that will score once it passes the bird
+    ("biome", np.int8),
+    ("cull_x", np.float64),  # The entity has left the screen once x is below this
+    ("trigger_x", np.float64),  # cull() looks at the entity again once x is below this
+    ("upper_h", np.int64),  # Height of the obstacle's rect hanging from the top (0 if none)
+    ("lower_y", np.int64),  # Top of the obstacle's rect standing below the gap
+    ("lower_h", np.int64),  # Height of that rect (0 if none)
+)
+
+
+class EntityStore:
+    """Columns of entity attributes, one row per slot
+
+    columns is the x range of the bird's rect; near() and passed() only look at
+    the entities whose rect may reach into it. pipe_gap is the height of the
+    opening of every pipe in the store.
+    """
+
+    def __init__(self, capacity: int = 16, columns: Tuple[int, int] = BIRD_COLUMNS,
+                 pipe_gap: int = PIPE_GAP) -> None:
+        self.pipe_gap: int = pipe_gap
+        self.kind: np.ndarray = np.zeros(capacity, dtype=np.int8)
+        self.alive: np.ndarray = np.zeros(capacity, dtype=np.bool_)
+        self.x: np.ndarray = np.full(capacity, _PARKED_X)
+        self.base: np.ndarray = np.zeros(capacity)
+        self.phase: np.ndarray = np.zeros(capacity)
+        self.amplitude: np.ndarray = np.zeros(capacity)
+        self.offset: np.ndarray = np.zeros(capacity)
+        self.moving: np.ndarray = np.zeros(capacity, dtype=np.bool_)
+        self.claimed: np.ndarray = np.zeros(capacity, dtype=np.bool_)
+        self.scoring: np.ndarray = np.zeros(capacity, dtype=np.bool_)
+        self.biome: np.ndarray = np.zeros(capacity, dtype=np.int8)
+        self.cull_x: np.ndarray = np.zeros(capacity)
+        self.trigger_x: np.ndarray = np.full(capacity, -np.inf)
+        self.upper_h: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        self.lower_y: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        self.lower_h: np.ndarray = np.zeros(capacity, dtype=np.int64)
+        self.free: List[int] = list(range(capacity - 1, -1, -1))  # Popped from the end, lowest slot first
+        self.n_half_pipes: int = 0
+        self.n_hearts: int = 0
+        self.heart_offset: float = 0.0  # Every heart floats in step with the game clock
+        # Entities whose rect may overlap the columns, ie. whose x is in the watch window of their kind
+        obstacles = (columns[0] - PIPE_WIDTH - 1, columns[1])
+        self.windows: List[Tuple[int, int]] = [obstacles] * KIND_HEART + [
+            (columns[0] - HEART_RADIUS - 1, columns[1] + HEART_RADIUS + 1)]
+        self.watched: List[int] = []
+        self._crossed: np.ndarray = np.zeros(capacity, dtype=np.bool_)  # Scratch for cull()
+
+    @property
+    def capacity(self) -> int:
+        return len(self.x)
+
+    def copy(self) -> "EntityStore":
+        """Independent copy of every column"""
+        clone = EntityStore.__new__(EntityStore)
+        for name, _ in COLUMNS:
+            setattr(clone, name, getattr(self, name).copy())
+        clone.pipe_gap = self.pipe_gap
+        clone.free = list(self.free)
+        clone.n_half_pipes = self.n_half_pipes
+        clone.n_hearts = self.n_hearts
+        clone.heart_offset = self.heart_offset
+        clone.windows = self.windows
+        clone.watched = list(self.watched)
+        clone._crossed = np.zeros(self.capacity, dtype=np.bool_)
+        return clone
+
+    def _allocate(self) -> int:
+        if not self.free:
+            # Double every column; the new slots are parked like the free ones at start
+            capacity = self.capacity
+            grown = EntityStore(capacity * 2)
+            for name, _ in COLUMNS:
+                getattr(grown, name)[:capacity] = getattr(self, name)
+                setattr(self, name, getattr(grown, name))
+            self._crossed = grown._crossed
+            self.free = list(range(capacity * 2 - 1, capacity - 1, -1))
+        slot = self.free.pop()
+        self.alive[slot] = True
+        self.offset[slot] = 0.0
+        self.claimed[slot] = False
+        self.scoring[slot] = False
+        self.moving[slot] = False
+        return slot
+
+    def add_pipe(self, x: float, height: int, moving: bool, phase: float, biome: int) -> int:
+        """Add a pipe whose gap starts height pixels below the top, and return its slot"""
+        slot = self._allocate()
+        self.kind[slot] = KIND_PIPE
+        self.x[slot] = x
+        self.base[slot] = height
+        self.phase[slot] = phase
+        self.amplitude[slot] = PIPE_AMPLITUDE
+        self.moving[slot] = moving
+        self.scoring[slot] = True
+        self.biome[slot] = biome
+        self.cull_x[slot] = -PIPE_WIDTH
+        self.upper_h[slot] = height
+        self.lower_y[slot] = height + self.pipe_gap
+        self.lower_h[slot] = SCREEN_HEIGHT
+        self._sort(slot)
+        return slot
+
+    def add_half_pipe(self, x: float, top: bool, height: int, phase: float, biome: int) -> int:
+        """Add a half pipe reaching height pixels from the top or the ground, and return its slot"""
+        slot = self._allocate()
+        self.kind[slot] = KIND_HALF_PIPE_TOP if top else KIND_HALF_PIPE_BOTTOM
+        self.x[slot] = x
+        self.base[slot] = height
+        self.phase[slot] = phase
+        self.amplitude[slot] = HALF_PIPE_AMPLITUDE
+        self.biome[slot] = biome
+        self.cull_x[slot] = -PIPE_WIDTH
+        self.upper_h[slot] = height if top else 0
+        self.lower_y[slot] = 0 if top else GROUND_Y - height
+        self.lower_h[slot] = 0 if top else height
+        self.n_half_pipes += 1
+        self._sort(slot)
+        return slot
+
+    def add_heart(self, x: float, y: float) -> int:
+        slot = self._allocate()
+        self.kind[slot] = KIND_HEART
+        self.x[slot] = x
+        self.base[slot] = y
+        self.cull_x[slot] = -HEART_RADIUS * 2
+        self.upper_h[slot] = self.lower_h[slot] = 0
+        self.n_hearts += 1
+        self._sort(slot)
+        return slot
+
+    def remove(self, slot: int) -> None:
+        """Free a slot; views of it must not be used any more"""
+        if self.kind[slot] == KIND_HEART:
+            self.n_hearts -= 1
+        elif self.kind[slot] != KIND_PIPE:
+            self.n_half_pipes -= 1
+        self.alive[slot] = self.moving[slot] = self.scoring[slot] = False
+        self.x[slot] = _PARKED_X
+        self.trigger_x[slot] = -np.inf
+        if slot in self.watched:
+            self.watched.remove(slot)
+        self.free.append(slot)
+
+    def advance(self, speed: float, now: Optional[int] = None, index: slice = slice(None)) -> None:
+        """Scroll entities left by speed, step moving obstacles and float hearts (at now milliseconds)
+
+        index limits the update to a range of slots.
+        """
+        x = self.x[index]
+        x -= speed
+        moving = self.moving[index]
+        if np.count_nonzero(moving):
+            self._oscillate(index, moving)
+        if self.n_hearts and now is not None:
+            self.heart_offset = math.sin(now * HEART_FLOAT_SPEED) * HEART_FLOAT_AMPLITUDE
+
+    def _oscillate(self, index: slice, moving: np.ndarray) -> None:
+        """Step the phase of moving obstacles and recompute their offset and rects"""
+        phase, offset, base = self.phase[index], self.offset[index], self.base[index]
+        np.add(phase, MOVE_SPEED, out=phase, where=moving)
+        np.sin(phase, out=offset, where=moving)
+        np.multiply(offset, self.amplitude[index], out=offset, where=moving)
+        # Rects as for pipes (unsafe casts truncate like int() in the per-object updates)
+        np.copyto(self.upper_h[index], base + offset, casting="unsafe", where=moving)
+        np.copyto(self.lower_y[index], base + self.pipe_gap + offset, casting="unsafe", where=moving)
+        if not self.n_half_pipes:
+            return
+        # Then redo the half pipes, clamped like HalfPipe.update used to
+        half_pipes = moving & (self.kind[index] != KIND_PIPE)
+        if not np.count_nonzero(half_pipes):
+            return
+        slots = np.flatnonzero(half_pipes) + (index.start or 0)
+        offset, base = self.offset[slots], self.base[slots]
+        top = self.kind[slots] == KIND_HALF_PIPE_TOP
+        height = np.maximum(MIN_HALF_PIPE_HEIGHT, np.trunc(base + offset).astype(np.int64))
+        lower_y = np.maximum(0, np.minimum(np.trunc(GROUND_Y - base + offset).astype(np.int64),
+                                           GROUND_Y - MIN_HALF_PIPE_HEIGHT))
+        self.upper_h[slots] = np.where(top, height, 0)
+        self.lower_y[slots] = np.where(top, 0, lower_y)
+        self.lower_h[slots] = np.where(top, 0, np.maximum(MIN_HALF_PIPE_HEIGHT, GROUND_Y - lower_y))
+
+    def _sort(self, slot: int) -> bool:
+        """Move a slot into or out of the watch window by its x and set its next trigger
+
+        Return False if the entity has left the screen, in which case it is removed.
+        """
+        x = self.x[slot]
+        cull_x = self.cull_x[slot]
+        if x < cull_x:
+            self.remove(slot)
+            return False
+        left, right = self.windows[self.kind[slot]]
+        watched = left <= x < right
+        if watched and slot not in self.watched:
+            self.watched.append(slot)
+        elif not watched and slot in self.watched:
+            self.watched.remove(slot)
+        self.trigger_x[slot] = cull_x if x < left else left if watched else right
+        return True
+
+    def cull(self) -> bool:
+        """Free every entity that scrolled off the left edge; True if there were any
+
+        Only the entities that crossed their trigger since the last call are looked
+        at, which on most ticks is none of them.
+        """
+        crossed = np.less(self.x, self.trigger_x, out=self._crossed)
+        if not np.count_nonzero(crossed):
+            return False
+        removed = False
+        for slot in np.flatnonzero(crossed).tolist():
+            removed |= not self._sort(slot)
+        return removed
+
+    def passed(self, bird_x: float) -> int:
+        """Mark the pipes that scrolled past bird_x as passed and return how many there were
+
+        bird_x must lie in the watch window, which every pipe crosses on its way past.
+        """
+        count = 0
+        for slot in self.watched:
+            if self.scoring[slot] and self.x[slot] < bird_x:
+                self.claimed[slot] = True
+                self.scoring[slot] = False
+                count += 1
+        return count
+
+    def near(self) -> List[int]:
+        """Slots of the entities in their watch window, a superset of those that can touch the bird"""
+        return self.watched
+
+    def hits(self, slot: int, rect: pygame.Rect) -> bool:
+        """Whether rect overlaps the obstacle in slot, like Rect.colliderect with its rects"""
+        left = int(self.x[slot])
+        if not (rect.x < left + PIPE_WIDTH and rect.right > left):
+            return False
+        upper_h = int(self.upper_h[slot])
+        if upper_h > 0 and rect.y < upper_h and rect.bottom > 0:
+            return True
+        lower_y, lower_h = int(self.lower_y[slot]), int(self.lower_h[slot])
+        return lower_h > 0 and rect.y < lower_y + lower_h and rect.bottom > lower_y
+
+
+def column(name: str, cast: Callable[[Any], Any] = float) -> Any:
+    """Attribute of a view that reads and writes its slot of a store column"""
+
+    def get(view: Any) -> Any:
+        return cast(getattr(view.store, name)[view.slot])
+
+    def set(view: Any, value: Any) -> None:
+        getattr(view.store, name)[view.slot] = value
+
+    return property(get, set)
+
+
+class EntityView:
+    """Base of the classes that view one slot of an EntityStore"""
+
+    store: EntityStore
+    slot: int
+
+    @classmethod
+    def view(cls, store: EntityStore, slot: int) -> Any:
+        """View of an existing slot"""
+        entity = cls.__new__(cls)
+        entity.store = store
+        entity.slot = slot
+        return entity
+
+    @property
+    def alive(self) -> bool:
+        return bool(self.store.alive[self.slot])
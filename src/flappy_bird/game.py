@@ -1,426 +1,394 @@
-"""Main game module for Flappy Bird"""
+"""Main game module for Flappy Bird
 
+Only what the start screen needs is imported with this module. The modules a
+game needs are imported by a warm-up thread while the start screen is up (see
+startup.py), so the first frame appears as soon as the window opens.
+"""
+
+import argparse
+import functools
+import importlib
 import pygame
-import sys
 import random
-from typing import List, Any
-from flappy_bird.bird import Bird
-from flappy_bird.pipe import Pipe, HalfPipe
-from flappy_bird.heart import Heart
-from flappy_bird.graphics import draw_background_elements, draw_ground, draw_start_screen, draw_game_over_screen
-from flappy_bird.sounds import hit_sound, point_sound
-from flappy_bird.constants import BIOMES, BIOME_INTERVAL, PIPE_FREQUENCY, BASE_PIPE_SPEED, DIFFICULTY_INCREMENT, SCREEN_WIDTH, GROUND_HEIGHT, SCREEN_HEIGHT
-
-
-def check_collision(bird: Bird, pipes: List[Pipe]) -> bool:
-    # Check collision with ground or ceiling
-    if bird.y >= SCREEN_HEIGHT - GROUND_HEIGHT - bird.radius or bird.y <= bird.radius:
-        return True
-
-    # Check collision with pipes
-    for pipe in pipes:
-        if pipe.collide(bird):
-            return True
-
-    return False
-
-
-def draw_lives(surface: pygame.Surface, lives: float) -> None:
-    """Draw hearts to represent remaining lives (supports half hearts)"""
-    heart_color = (255, 0, 0)  # Red color for hearts
-    margin = 10
-    
-    full_hearts = int(lives)
-    has_half_heart = lives % 1 >= 0.5
-    
-    # Draw full hearts with complex symmetrical shape (smaller size)
-    for i in range(full_hearts):
-        x = SCREEN_WIDTH - margin - 20 - (i * 28)
-        y = margin + 10
-        
-        # Draw complex symmetrical heart - left side points
-        left_points = [
-            (x, y + 16),        # Bottom point (center)
-            (x - 2, y + 12),    # Lower curve left 1
-            (x - 4, y + 9),     # Lower curve left 2
-            (x - 6, y + 6),     # Lower left curve
-            (x - 8, y + 3),     # Left side lower
-            (x - 9, y + 0),     # Left side
-            (x - 10, y - 3),    # Left side middle
-            (x - 10, y - 6),    # Left side upper
-            (x - 9, y - 9),     # Left bump lower outer
-            (x - 8, y - 12),    # Left bump outer lower
-            (x - 6, y - 14),    # Left bump outer
-            (x - 4, y - 15),    # Left bump top outer
-            (x - 2, y - 14),    # Left bump top
-            (x - 1, y - 11),    # Left bump inner
-            (x, y - 8),         # Left side of center dip
-        ]
-        
-        # Right side points (mirror of left)
-        right_points = [
-            (x, y - 8),         # Right side of center dip
-            (x + 1, y - 11),    # Right bump inner
-            (x + 2, y - 14),    # Right bump top
-            (x + 4, y - 15),    # Right bump top outer
-            (x + 6, y - 14),    # Right bump outer
-            (x + 8, y - 12),    # Right bump outer lower
-            (x + 9, y - 9),     # Right bump lower outer
-            (x + 10, y - 6),    # Right side upper
-            (x + 10, y - 3),    # Right side middle
-            (x + 9, y + 0),     # Right side
-            (x + 8, y + 3),     # Right side lower
-            (x + 6, y + 6),     # Lower right curve
-            (x + 4, y + 9),     # Lower curve right 2
-            (x + 2, y + 12),    # Lower curve right 1
-        ]
-        
-        # Combine all points into one closed polygon
-        points = left_points + right_points
-        pygame.draw.polygon(surface, heart_color, points)
-    
-    # Draw half heart with complex symmetrical left half shape (smaller size)
-    if has_half_heart:
-        i = full_hearts
-        x = SCREEN_WIDTH - margin - 20 - (i * 28)
-        y = margin + 10
-        
-        # Draw left half of complex symmetrical heart (scaled down)
-        points = [
-            (x, y + 16),        # Bottom point (center line)
-            (x - 2, y + 12),    # Lower curve left 1
-            (x - 4, y + 9),     # Lower curve left 2
-            (x - 6, y + 6),     # Lower left curve
-            (x - 8, y + 3),     # Left side lower
-            (x - 9, y + 0),     # Left side
-            (x - 10, y - 3),    # Left side middle
-            (x - 10, y - 6),    # Left side upper
-            (x - 9, y - 9),     # Left bump lower outer
-            (x - 8, y - 12),    # Left bump outer lower
-            (x - 6, y - 14),    # Left bump outer
-            (x - 4, y - 15),    # Left bump top outer
-            (x - 2, y - 14),    # Left bump top
-            (x - 1, y - 11),    # Left bump inner
-            (x, y - 8),         # Center dip (on cut line)
-        ]
-        pygame.draw.polygon(surface, heart_color, points)
-
-
-def get_current_biome(score: int):
-    """Get the current biome based on the score"""
-    biome_index = (score // BIOME_INTERVAL) % len(BIOMES)
-    return BIOMES[biome_index]
-
-
-def get_current_pipe_speed(score: int) -> float:
-    """Calculate the current pipe speed based on the score"""
-    # Increase speed every 5 points
-    level = score // 5
-    return BASE_PIPE_SPEED + (level * DIFFICULTY_INCREMENT)
-
-
-def main() -> None:
+import sys
+import time
+from typing import TYPE_CHECKING, List, Any, Optional, Union
+from flappy_bird.config import DEFAULT_CONFIG, GameConfig, parse_config
+from flappy_bird.display import SCALINGS, Presenter, parse_size
+from flappy_bird.latency import FramePacer, LatencyMonitor, is_flap
+# The drawing functions are re-exported for code that imported them from here; frames are drawn by render.py
+from flappy_bird.graphics import (  # noqa: F401
+    clear_background_sprites, draw_background_elements, draw_world, draw_hud, draw_lives, draw_start_screen,
+    draw_game_over_screen, get_background_sprites
+)
+from flappy_bird.palette import biome_table
+from flappy_bird.profiler import SamplingProfiler, default_output, from_environment
+from flappy_bird.pipe import clear_pipe_sprites, get_pipe_sprites
+from flappy_bird.startup import WarmUp, get_font
+from flappy_bird.constants import BIOMES, FPS
+
+if TYPE_CHECKING:
+    from flappy_bird.simulation import Simulation
+    from flappy_bird.textures import TextureRenderer
+
+    Screen = Union[Presenter, TextureRenderer]  # What the game shows its frames with
+
+IDLE_STATES = ("start", "game_over")  # Screens that wait for the player
+# Imported on the warm-up thread rather than with this module
+DEFERRED_MODULES = ("flappy_bird.simulation", "flappy_bird.autopilot", "flappy_bird.replay", "flappy_bird.scores",
+                    "flappy_bird.telemetry", "flappy_bird.sounds", "flappy_bird.particles", "flappy_bird.render")
+# Re-exported for code that imported them from here, loaded on first access
+_SIMULATION_EXPORTS = ("Simulation", "EVENT_HIT", "EVENT_SCORE", "check_collision", "get_current_biome",
+                       "get_current_pipe_speed")
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SIMULATION_EXPORTS:
+        return getattr(importlib.import_module("flappy_bird.simulation"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def wait_for_input(idle_fps: int) -> List[pygame.event.Event]:
+    """Sleep until an event arrives, or until the next idle frame is due when idle_fps > 0"""
+    event = pygame.event.wait(1000 // idle_fps if idle_fps > 0 else 0)  # 0 waits without a time limit
+    return [] if event.type == pygame.NOEVENT else [event]
+
+
+def load_game(seed: Optional[int], config: GameConfig, telemetry: Optional[str],
+              surface: pygame.Surface) -> "Simulation":
+    """Import the game modules, fill the sprite, palette and sound caches and build the first game"""
+    for module in DEFERRED_MODULES:
+        importlib.import_module(module)
+    from flappy_bird.particles import clear_particle_sprites, get_particle_sprites
+    from flappy_bird.simulation import Simulation
+    from flappy_bird.sounds import warm_up
+    from flappy_bird.telemetry import Telemetry
+
+    for biome in range(len(BIOMES)):
+        get_pipe_sprites(biome)
+        get_background_sprites(biome)
+    biome_table(surface)
+    clear_particle_sprites()  # In the display's pixel format
+    get_particle_sprites()
+    warm_up()
+    sim = Simulation(seed, config=config)
+    if telemetry:
+        sim.telemetry = Telemetry(telemetry)
+    return sim
+
+
+def draw_title_screen(surface: pygame.Surface, font: pygame.font.Font) -> None:
+    """The start screen: the first biome's sky and scenery under the title"""
+    surface.fill(biome_table(surface).palette(0).sky)
+    draw_background_elements(surface, BIOMES[0], 0, pygame.time.get_ticks())
+    draw_start_screen(surface, font)
+
+
+def show_title_screen(screen: "Screen", font: pygame.font.Font) -> None:
+    """Draw the start screen and put it on the display"""
+    if isinstance(screen, Presenter):
+        draw_title_screen(screen.surface, font)
+        screen.present()
+        pygame.display.flip()
+    else:
+        screen.draw_title(font, pygame.time.get_ticks())
+        screen.present()
+
+
+def run_start_screen(screen: "Screen", font: pygame.font.Font, clock: pygame.time.Clock,
+                     idle_fps: Optional[int]) -> Optional[bool]:
+    """Show the start screen until the player starts; return whether A started it (None if the window closed)"""
+    pending: List[pygame.event.Event] = []
+    while True:
+        for event in pending + pygame.event.get():
+            if event.type == pygame.QUIT:
+                return None
+            if isinstance(screen, Presenter):
+                screen.handle(event)
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_SPACE, pygame.K_a):
+                return event.key == pygame.K_a
+        pending = []
+        show_title_screen(screen, font)
+        if idle_fps is not None:
+            pending = wait_for_input(idle_fps)
+        else:
+            clock.tick(FPS)
+
+
+def save_profile(profiler: SamplingProfiler, path: str) -> None:
+    """Stop the profiler and write what it sampled"""
+    profiler.stop()
+    profiler.write(path)
+    samples = sum(profiler.samples.values())
+    print(f"profile of {samples:,} samples written to {path} "
+          f"(sampling took {profiler.overhead * 1000:.0f} ms)", file=sys.stderr)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Play Flappy Bird")
+    parser.add_argument("--autopilot", action="store_true", help="let the search bot play (toggle with A)")
+    parser.add_argument("--nodes", type=int, default=8192, help="autopilot planning budget in nodes per tick")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the pipe layout")
+    parser.add_argument("--idle-fps", type=int, default=None,
+                        help="redraw the start and game over screens at this rate and sleep in between, "
+                             "waking on input (0 draws them once)")
+    parser.add_argument("--latency", action="store_true", help="report the input-to-photon latency of flaps on exit")
+    parser.add_argument("--low-latency", action="store_true",
+                        help="start frames early for flaps and read them right before the physics step")
+    parser.add_argument("--record", metavar="FILE", default=None,
+                        help="save the last game played as a replay (render it with python -m flappy_bird.replay)")
+    parser.add_argument("--set", metavar="NAME=VALUE", action="append", default=[],
+                        help=f"change a game rule, one of {', '.join(GameConfig._fields)} (repeatable)")
+    parser.add_argument("--scores", metavar="DIR", default=None,
+                        help="high-score store (default $XDG_DATA_HOME/flappy-bird)")
+    parser.add_argument("--no-scores", action="store_true", help="do not record scores or show ranks")
+    parser.add_argument("--telemetry", metavar="DIR", default=None,
+                        help="record hit, damage and heart histograms (summarize with python -m flappy_bird.telemetry)")
+    parser.add_argument("--window", metavar="WIDTHxHEIGHT", default=None,
+                        help="window size; the game is scaled to fit and letterboxed (the window can also be resized)")
+    parser.add_argument("--fullscreen", action="store_true", help="fill the screen, scaled and letterboxed")
+    parser.add_argument("--scaling", choices=SCALINGS, default="smooth",
+                        help="smooth scaling fills the window; integer scaling keeps pixels sharp")
+    parser.add_argument("--particles", type=int, default=None, metavar="N",
+                        help="most particles of hit, score and heart effects alive at once (0 turns them off)")
+    parser.add_argument("--threaded", action="store_true",
+                        help="rasterize frames on a render thread while the next frame is simulated")
+    parser.add_argument("--textures", action="store_true",
+                        help="draw with SDL textures, on the GPU where there is one (smooth scaling only)")
+    parser.add_argument("--first-frame", action="store_true",
+                        help="exit once the start screen is shown, printing the time it was (for startup benchmarks)")
+    args = parser.parse_args(argv)
+    if args.textures and args.threaded:
+        parser.error("--threaded rasterizes surfaces and cannot be combined with --textures")
+    try:
+        args.config = parse_config(args.set)
+        args.window = parse_size(args.window) if args.window else None
+    except ValueError as error:
+        parser.error(str(error))
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+
+    # Sampling profiler, from launch when the environment asks for it, or toggled with P
+    profile_path, profile_interval = from_environment()
+    profiler: Optional[SamplingProfiler] = None
+    if profile_path:
+        profiler = SamplingProfiler(profile_interval)
+        profiler.start()
+
     # Initialize pygame
     pygame.init()
 
-    # Set up the display
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Flappy Bird")
+    # Set up the display; the game draws at its logical size and the presenter (or the texture renderer) scales
+    # that to the window
+    screen: Screen
+    if args.textures:
+        from flappy_bird.textures import TextureRenderer
+        screen = TextureRenderer(args.window, args.fullscreen)
+    else:
+        screen = Presenter(args.window, args.fullscreen, args.scaling)
+        pygame.display.set_caption("Flappy Bird")
+    clear_pipe_sprites()  # Sprites are rendered again in the display's pixel format
+    clear_background_sprites()
     clock = pygame.time.Clock()
 
-    # Font - with fallback for systems where font module is not available
-    font: Any
-    try:
-        font = pygame.font.SysFont('arial', 24)
-    except (pygame.error, NotImplementedError):
-        # If font module is not available, try loading a default font
-        font = pygame.font.Font(None, 24)  # Use default font
-
-    # Sound mixer is handled in the sounds module
-    bird = Bird()
-    pipes: List[Pipe] = []
-    score: int = 0
-    lives: float = 3.0  # Player starts with 3 lives (supports half hearts)
-    last_pipe: int = pygame.time.get_ticks()
-    game_state: str = "start"  # "start", "playing", "game_over"
-    invincible: bool = False  # Invincibility flag after getting hit
-    invincible_timer: int = 0  # Timer for invincibility (in milliseconds)
-    INVINCIBILITY_DURATION: int = 2000  # 2 seconds of invincibility
-    
-    # Fall damage system
-    max_height: float = SCREEN_HEIGHT // 2  # Track the highest point before falling
-    FALL_DAMAGE_THRESHOLD: float = 100  # Minimum fall distance to take damage
-    MAX_FALL_DAMAGE: float = 3.0  # Maximum damage from a single fall
-
-    # Heart spawning system
-    hearts: List[Heart] = []
-    last_heart: int = pygame.time.get_ticks()
-    HEART_FREQUENCY: int = 15000  # Spawn a heart every 15 seconds (milliseconds)
-    HEART_HEAL_AMOUNT: float = 0.5  # Each heart restores 0.5 hearts (half a heart)
-
-    # Half pipe spawning system
-    half_pipes: List[HalfPipe] = []
-    HALF_PIPE_SCORE_THRESHOLD: int = 20  # Half pipes start spawning after score 20
-    next_half_pipe_time: int = 0  # Time when next half pipe should spawn
+    # Font - the system font's file is cached between runs, with pygame's default font as the fallback
+    font: Any = get_font(24)
+
+    # Show the start screen right away and load the game behind it
+    show_title_screen(screen, font)
+    if args.first_frame:
+        print(f"first frame presented at {time.time():.6f}")
+        pygame.quit()
+        return
+    seed = args.seed
+    if seed is None and args.record:
+        seed = random.getrandbits(32)  # A replay needs to know the seed
+    surface = screen.surface if isinstance(screen, Presenter) else screen.format  # Palettes are mapped for it
+    warm_up = WarmUp(functools.partial(load_game, seed, args.config, args.telemetry, surface))
+    warm_up.start()
+    toggle_autopilot = run_start_screen(screen, font, clock, args.idle_fps)
+    if toggle_autopilot is None:
+        if profiler is not None:
+            save_profile(profiler, profile_path or default_output())
+        pygame.quit()
+        sys.exit()
+
+    # Sound mixer is handled in the sounds module; game rules live in the simulation
+    sim: "Simulation" = warm_up.result()
+    if not isinstance(screen, Presenter):
+        screen.load([font])  # Textures belong to the thread that made the renderer
+    import numpy as np
+    from flappy_bird.autopilot import Autopilot
+    from flappy_bird.particles import BUDGET, CAPACITY, FEATHERS, HEART_DUST, SPARKLES, ParticleSystem
+    from flappy_bird.render import RenderSnapshot, RenderThread, draw_frame
+    from flappy_bird.replay import Replay
+    from flappy_bird.scores import ScoreStore, default_directory
+    from flappy_bird.simulation import EVENT_HEART, EVENT_HIT, EVENT_SCORE
+    from flappy_bird.sounds import hit_sound, point_sound
+    games = 0  # Games started on sim before the current one
+    flaps: List[bool] = []  # Flap flag of every tick of the current game, for --record
+    autopilot: Optional[Autopilot] = None
+    if args.autopilot != toggle_autopilot:  # A on the start screen toggles --autopilot
+        autopilot = Autopilot(nodes_per_tick=args.nodes)
+    game_state: str = "playing"  # "playing", "game_over"
+
+    # Only unassisted games under the default rules go on the leaderboard
+    scores: Optional[ScoreStore] = None
+    if not args.no_scores:
+        try:
+            scores = ScoreStore(args.scores or default_directory())
+        except OSError as error:
+            print(f"high scores disabled: {error}", file=sys.stderr)
+    assisted: bool = autopilot is not None  # The autopilot played part of the current game
+    rank: Optional[int] = None  # Leaderboard rank of the game that just ended
+
+    monitor: Optional[LatencyMonitor] = LatencyMonitor() if args.latency else None
+    pacer = FramePacer(FPS)
+    pending: List[pygame.event.Event] = []  # Events read early, handled at the start of the next frame
+    renderer: Optional[RenderThread] = RenderThread(font) if args.threaded else None
+    budget = BUDGET if args.particles is None else args.particles
+    particles: Optional[ParticleSystem] = ParticleSystem(max(CAPACITY, budget), budget) if budget > 0 else None
+    course_ahead: Optional[WarmUp] = None  # Grows the course while the game goes on
 
     running: bool = True
     while running:
+        flap: bool = False
+
         # Event handling
-        for event in pygame.event.get():
+        queued = pending + pygame.event.get()
+        pending = []
+        for event in queued:
             if event.type == pygame.QUIT:
                 running = False
+            if isinstance(screen, Presenter):
+                screen.handle(event)
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    if game_state == "start":
-                        game_state = "playing"
-                    elif game_state == "playing":
-                        bird.flap()
+                    if game_state == "playing":
+                        flap = True
+                        if monitor is not None:
+                            monitor.pressed(event)
                     elif game_state == "game_over":
                         # Restart the game
-                        bird = Bird()
-                        pipes = []
-                        hearts = []
-                        half_pipes = []
-                        score = 0
-                        lives = 3.0  # Reset lives
-                        max_height = SCREEN_HEIGHT // 2  # Reset max height tracking
-                        last_pipe = pygame.time.get_ticks()
-                        last_heart = pygame.time.get_ticks()
-                        next_half_pipe_time = 0
-                        invincible = False
-                        invincible_timer = 0
+                        sim.reset()
+                        games, flaps = games + 1, []
+                        assisted, rank = autopilot is not None, None
                         game_state = "playing"
                 if event.key == pygame.K_r and game_state == "game_over":
                     # Restart the game
-                    bird = Bird()
-                    pipes = []
-                    hearts = []
-                    half_pipes = []
-                    score = 0
-                    lives = 3.0  # Reset lives
-                    max_height = SCREEN_HEIGHT // 2  # Reset max height tracking
-                    last_pipe = pygame.time.get_ticks()
-                    last_heart = pygame.time.get_ticks()
-                    next_half_pipe_time = 0
-                    invincible = False
-                    invincible_timer = 0
+                    sim.reset()
+                    games, flaps = games + 1, []
+                    assisted, rank = autopilot is not None, None
                     game_state = "playing"
-
-        # Fill the screen with current biome's sky color
-        current_biome = get_current_biome(score)
-        screen.fill(current_biome["sky_color"])
-
-        # Draw background elements based on current biome
-        draw_background_elements(screen, current_biome, score, pygame.time.get_ticks())
-
-        if game_state == "start":
-            # Draw start screen
-            draw_start_screen(screen, font)
-
-        elif game_state == "playing":
-            # Update bird and track maximum height
-            bird.update()
-            
-            # Track the highest point (lowest y value) before falling
-            if bird.y < max_height:
-                max_height = bird.y
-
-            # Calculate current pipe speed and biome based on score
-            current_pipe_speed = get_current_pipe_speed(score)
-            current_biome = get_current_biome(score)
-
-            # Generate new pipes with current biome colors
-            time_now = pygame.time.get_ticks()
-            if time_now - last_pipe > PIPE_FREQUENCY:
-                # After score 40, 50% of pipes will be moving pipes
-                is_moving = score >= 40 and random.random() < 0.5
-                pipes.append(Pipe(biome_colors=current_biome, moving=is_moving))
-                last_pipe = time_now
-                
-                # After score 20, schedule a half pipe to spawn exactly midway
-                if score >= HALF_PIPE_SCORE_THRESHOLD and random.random() < 0.5:
-                    # Schedule half pipe to spawn midway between this and next regular pipe
-                    next_half_pipe_time = time_now + (PIPE_FREQUENCY // 2)
-            
-            # Spawn scheduled half pipe at the midway point
-            time_now = pygame.time.get_ticks()
-            if score >= HALF_PIPE_SCORE_THRESHOLD and time_now >= next_half_pipe_time and next_half_pipe_time > 0:
-                # Randomly choose top or bottom position
-                position = random.choice([HalfPipe.TOP, HalfPipe.BOTTOM])
-                half_pipe_height = 200
-                
-                half_pipes.append(HalfPipe(
-                    biome_colors=current_biome,
-                    position=position,
-                    height=half_pipe_height
-                ))
-                next_half_pipe_time = 0  # Reset scheduled spawn
-
-
-            # Generate hearts periodically
-            time_now = pygame.time.get_ticks()
-            if time_now - last_heart > HEART_FREQUENCY:
-                # Spawn heart at a safe height that avoids pipes
-                # Find gaps between pipes where heart can spawn safely
-                min_y = 100
-                max_y = SCREEN_HEIGHT - GROUND_HEIGHT - 100
-                heart_y = random.uniform(min_y, max_y)
-                
-                # Check if spawn position conflicts with any existing pipes
-                # Only spawn if heart won't appear inside or too close to a pipe
-                safe_to_spawn = True
-                heart_spawn_x = SCREEN_WIDTH + 50
-                for pipe in pipes:
-                    # Check if pipe is within spawn area (next 200 pixels)
-                    if pipe.x < heart_spawn_x + 200 and pipe.x + 60 > heart_spawn_x - 50:
-                        # Pipe is in the spawn zone, check if heart would be in the gap
-                        pipe_top_y = pipe.top_pipe.height
-                        pipe_bottom_y = pipe.bottom_pipe.y
-                        # Heart needs to be in the gap with some margin
-                        margin = 50  # Extra safety margin
-                        if not (pipe_top_y + margin < heart_y < pipe_bottom_y - margin):
-                            safe_to_spawn = False
-                            break
-                
-                if safe_to_spawn:
-                    hearts.append(Heart(SCREEN_WIDTH + 50, heart_y))
-                    last_heart = time_now
-
-            # Update pipes and remove off-screen pipes
-            for pipe in pipes[:]:
-                pipe.update(current_pipe_speed)
-                if pipe.x < -60:  # Pipe is off screen
-                    pipes.remove(pipe)
-
-            # Update half pipes and remove off-screen half pipes
-            for half_pipe in half_pipes[:]:
-                half_pipe.update(current_pipe_speed)
-                if half_pipe.is_off_screen():
-                    half_pipes.remove(half_pipe)
-
-            # Check collision with half pipes (only if not invincible)
-            if not invincible:
-                for half_pipe in half_pipes[:]:
-                    if half_pipe.collide(bird):
-                        hit_sound.play()
-                        # Calculate fall damage
-                        fall_distance = bird.y - max_height
-                        if fall_distance > FALL_DAMAGE_THRESHOLD:
-                            damage = min(int(fall_distance / 100) * 0.5 + 0.5, MAX_FALL_DAMAGE)
-                        else:
-                            damage = 0.5
-
-                        lives -= damage
-                        if lives <= 0:
-                            game_state = "game_over"
-                        else:
-                            invincible = True
-                            invincible_timer = pygame.time.get_ticks()
-                            bird.y = SCREEN_HEIGHT // 2
-                            bird.velocity = 0
-                            max_height = bird.y
-                        break
-
-            # Update hearts and remove collected/off-screen hearts
-            for heart in hearts[:]:
-                heart.update(current_pipe_speed)
-                if heart.is_off_screen():
-                    hearts.remove(heart)
-                elif not heart.collected:
-                    # Check collision with bird for collection
-                    heart_rect = heart.get_rect()
-                    bird_mask = bird.get_mask()
-                    if bird_mask.colliderect(heart_rect):
-                        heart.collected = True
-                        lives = min(lives + HEART_HEAL_AMOUNT, 3.0)  # Heal but don't exceed max
-                        hearts.remove(heart)
-
-            # Check for collisions (only if not invincible)
-            if not invincible and check_collision(bird, pipes):
-                hit_sound.play()  # Play hit sound
-                
-                # Calculate fall damage
-                fall_distance = bird.y - max_height
-                if fall_distance > FALL_DAMAGE_THRESHOLD:
-                    # Calculate damage based on fall distance (0.5 hearts per 100 pixels fallen, max 3)
-                    damage = min(int(fall_distance / 100) * 0.5 + 0.5, MAX_FALL_DAMAGE)
-                else:
-                    damage = 0.5  # Minimum 0.5 damage for any collision
-                
-                lives -= damage  # Lose lives based on damage
-                if lives <= 0:
-                    game_state = "game_over"  # Game over when no lives left
-                else:
-                    # Become invincible for a short period
-                    invincible = True
-                    invincible_timer = pygame.time.get_ticks()
-                    # Reset bird position
-                    bird.y = SCREEN_HEIGHT // 2
-                    bird.velocity = 0
-                    # Reset max height tracking
-                    max_height = bird.y
-
-            # Update invincibility timer
-            if invincible:
-                time_now = pygame.time.get_ticks()
-                if time_now - invincible_timer > INVINCIBILITY_DURATION:
-                    invincible = False
-
-            # Calculate score
-            for i, pipe in enumerate(pipes):
-                if not pipe.passed and pipe.x < bird.x:
-                    pipe.passed = True
-                    score += 1
-                    point_sound.play()  # Play point sound
-
-            # Draw everything
-            for pipe in pipes:
-                pipe.draw(screen)
-
-            # Draw half pipes
-            for half_pipe in half_pipes:
-                half_pipe.draw(screen)
-
-            # Draw hearts
-            for heart in hearts:
-                heart.draw(screen)
-
-            draw_ground(screen, current_biome)
-            bird.draw(screen, invincible)  # Pass invincible flag for visual feedback
-
-            # Draw score
-            score_text = font.render(f"Score: {score}", True, (255, 255, 255))
-            screen.blit(score_text, (10, 10))
-            
-            # Draw lives
-            draw_lives(screen, lives)
-
-        elif game_state == "game_over":
-            # Draw all pipes and bird for game over state
-            current_biome = get_current_biome(score)  # Use final score's biome
-            # Draw background elements even in game over
-            draw_background_elements(screen, current_biome, score, pygame.time.get_ticks())
-            for pipe in pipes:
-                pipe.draw(screen)
-            # Draw half pipes
-            for half_pipe in half_pipes:
-                half_pipe.draw(screen)
-            # Draw hearts (they remain visible in game over)
-            for heart in hearts:
-                heart.draw(screen)
-            draw_ground(screen, current_biome)
-            bird.draw(screen)
-
-            # Draw game over screen
-            draw_game_over_screen(screen, score, font)
-
-        # Update the display
-        pygame.display.flip()
-        clock.tick(60)  # 60 FPS
-
+                if event.key == pygame.K_a and game_state != "game_over":
+                    # Toggle the autopilot
+                    autopilot = None if autopilot else Autopilot(nodes_per_tick=args.nodes)
+                if event.key == pygame.K_p:
+                    # Start profiling, or stop and write what was sampled so far
+                    if profiler is None:
+                        profiler = SamplingProfiler(profile_interval)
+                    if profiler.running:
+                        save_profile(profiler, profile_path or default_output())
+                    else:
+                        profiler.start()
+
+        if profiler is not None:
+            profiler.set_scene(game_state, sim.biome)
+        frame_state = game_state  # A frame that ends the game still shows it being played
+        if game_state == "playing":
+            if autopilot is not None:
+                flap = autopilot.decide(sim)
+                assisted = True
+            elif args.low_latency:
+                # Catch flaps pressed since the top of the frame; anything else waits for the next frame
+                for event in pygame.event.get():
+                    if is_flap(event):
+                        flap = True
+                        if monitor is not None:
+                            monitor.pressed(event)
+                    else:
+                        pending.append(event)
+
+            # Advance the game one frame and play sounds and effects for what happened
+            bird_x, bird_y = sim.bird.x, sim.bird.y  # A hit moves the bird back to the middle
+            events = sim.step(flap)
+            flaps.append(flap)
+            if monitor is not None:
+                monitor.applied()
+            if EVENT_HIT in events:
+                hit_sound.play()
+                if particles is not None:
+                    particles.emit(FEATHERS, bird_x, bird_y)
+            if EVENT_SCORE in events:
+                point_sound.play()
+                if particles is not None:
+                    particles.emit(SPARKLES, sim.bird.x, sim.bird.y)
+            if EVENT_HEART in events and particles is not None:
+                particles.emit(HEART_DUST, sim.bird.x, sim.bird.y)
+            if sim.game_over:
+                game_state = "game_over"
+                if scores is not None and not assisted and sim.config == DEFAULT_CONFIG:
+                    rank = scores.add(sim.score)
+            # Grow the course past the next pipes, or start the next game's course, before step() or reset() needs it
+            if sim.game_over or (EVENT_SCORE in events and (course_ahead is None or not course_ahead.is_alive())):
+                course_ahead = WarmUp(sim.prepare_course)
+                course_ahead.start()
+
+        # Draw everything, here or on the render thread from a snapshot
+        particle_frame = None
+        if particles is not None:
+            particles.update()
+            particle_frame = particles.frame()
+        status: Optional[str] = None
+        if autopilot is not None:
+            status = f"Autopilot {autopilot.nodes_per_second / 1e6:.1f}M nodes/s"
+        ranked = len(scores) if scores is not None and frame_state == "game_over" else 0
+        if not isinstance(screen, Presenter):
+            screen.draw_frame(sim, font, frame_state, pygame.time.get_ticks(), rank, ranked, status, particle_frame)
+            screen.present()
+        else:
+            if renderer is not None:
+                renderer.submit(RenderSnapshot.capture(sim, frame_state, pygame.time.get_ticks(), rank, ranked,
+                                                       status, particle_frame))
+                renderer.present(screen)  # The last frame drawn, one behind the snapshot just submitted
+            else:
+                draw_frame(screen.surface, sim, font, frame_state, pygame.time.get_ticks(), rank, ranked, status,
+                           particle_frame)
+                screen.present()
+            # Update the display
+            pygame.display.flip()
+        if monitor is not None:
+            monitor.presented()
+        # Idle only once the idle screen itself is on the display, not the frame that led to it
+        if running and args.idle_fps is not None and game_state in IDLE_STATES and frame_state == game_state:
+            if renderer is not None and isinstance(screen, Presenter):
+                renderer.wait()  # The render thread shows frames one behind; show this one before sleeping
+                renderer.present(screen)
+                pygame.display.flip()
+            pending += wait_for_input(args.idle_fps)
+        elif args.low_latency:
+            pending += pacer.wait()  # Wakes early for a flap
+        else:
+            clock.tick(FPS)  # 60 FPS
+
+    if renderer is not None:
+        renderer.stop()
+    if monitor is not None:
+        print(monitor.report())
+    if profiler is not None and profiler.running:
+        save_profile(profiler, profile_path or default_output())
+    if scores is not None:
+        scores.close()
+    if sim.telemetry is not None:
+        sim.telemetry.close()
+    if args.record and flaps and seed is not None:
+        Replay(seed, games, np.array(flaps), args.config).save(args.record)
     pygame.quit()
     sys.exit()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
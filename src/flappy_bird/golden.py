@@ -0,0 +1,310 @@
+"""Golden traces: bulk equivalence checks for alternate engines and renderers
+
+A golden file holds, for thousands of seeded and scripted episodes, one hash
+per tick of the game state as the reference Simulation plays it: bird height
+and velocity, lives, score and the position of every pipe, half pipe and
+heart. check() plays the same episodes on another engine, any callable that
+takes (seed, course) and returns an object with the Simulation API, and
+reports the first tick where each episode's hash differs. With frame_every,
+the file also holds a hash of the frame drawn every frame_every ticks, so a
+renderer can be checked the same way.
+
+Episodes are scripted so they cover the whole game: each flaps near the
+bottom of the next opening with its own margin, from careless to careful, and
+every fourth seed flies a course of moving pipes and half pipes from the start.
+The course of a seed is generated once per worker and handed to the engine,
+since generating and repairing it costs as much as playing a short episode;
+it is the course Simulation(seed) would generate itself.
+
+Per tick only the state is copied into a row of a preallocated matrix; the
+rows of a whole episode are hashed at once with NumPy when it ends. Episodes
+are played in chunks by a process pool, and checking sends each chunk its
+golden hashes so only divergences come back.
+
+Run ``python -m flappy_bird.golden record golden.npz`` once, then
+``python -m flappy_bird.golden check golden.npz --engine module:factory``.
+"""
+
+import argparse
+import hashlib
+import functools
+import importlib
+import multiprocessing
+import random
+import time
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT
+from flappy_bird.course import COURSE_BLOCK, HALF_PIPE_BOTTOM, HALF_PIPE_TOP, Course, generate_course, half_pipe_ticks
+from flappy_bird.entities import PIPE_WIDTH
+from flappy_bird.simulation import Simulation
+
+MARGINS: Tuple[float, ...] = (12, 18, 30, 48, 72)  # Flap margins above the bottom of the opening, in pixels
+HARD_EVERY: int = 4  # Every fourth seed flies the hard course
+MAX_TICKS: int = 1200
+ROW_WIDTH: int = 64  # State values per tick; obstacles beyond it are left out
+BIRD_LEFT: int = 85  # Left edge of the bird's rect
+GROUND_Y: int = SCREEN_HEIGHT - GROUND_HEIGHT
+CHUNK: int = 16  # Episodes per pool task
+
+Engine = Callable[[int, Optional[Course]], Any]
+Renderer = Callable[[pygame.Surface, Any, int], None]
+
+
+class Episode(NamedTuple):
+    """One scripted episode"""
+    seed: int
+    margin: float
+    hard: bool  # Fly hard_course(seed) instead of the seed's own course
+
+
+class Divergence(NamedTuple):
+    """First difference between an engine and the golden trace in an episode"""
+    episode: int
+    seed: int
+    tick: int  # Tick (1 is the first step) whose state or frame differs
+    what: str  # "state", "frame" or "length" (the game ended on another tick)
+
+
+def episodes(count: int) -> List[Episode]:
+    """The first count episodes: every seed is flown once with each margin"""
+    specs = []
+    for index in range(count):
+        seed = index // len(MARGINS)
+        specs.append(Episode(seed=seed, margin=MARGINS[index % len(MARGINS)], hard=seed % HARD_EVERY == HARD_EVERY - 1))
+    return specs
+
+
+def hard_course(seed: int) -> Course:
+    """Course of the seed with every pipe moving and a half pipe after each, alternating top and bottom"""
+    course = generate_course(seed, COURSE_BLOCK, repair=False)
+    half_pipe = np.where(np.arange(COURSE_BLOCK) % 2, HALF_PIPE_TOP, HALF_PIPE_BOTTOM).astype(np.int8)
+    return course._replace(moving=np.ones(COURSE_BLOCK, dtype=bool), half_pipe=half_pipe,
+                           half_pipe_tick=half_pipe_ticks(course.spawn_tick))
+
+
+@functools.lru_cache(maxsize=4)
+def episode_course(seed: int, hard: bool) -> Course:
+    """Course an episode flies: the first course of Simulation(seed), or the hard course"""
+    if hard:
+        return hard_course(seed)
+    return generate_course(random.Random(seed).getrandbits(32), COURSE_BLOCK)
+
+
+def state_values(sim: Any) -> List[float]:
+    """The traced state of a game: bird, lives, score, then the opening of every obstacle and the hearts"""
+    values = [sim.bird.y, sim.bird.velocity, sim.lives, sim.score,
+              len(sim.pipes), len(sim.half_pipes), len(sim.hearts)]
+    for pipe in sim.pipes:
+        values += (pipe.x, pipe.top_pipe.height, pipe.bottom_pipe.y)
+    for half_pipe in sim.half_pipes:
+        rect = half_pipe.pipe_rect
+        # Opening left by the half pipe, as for pipes
+        values += (half_pipe.x, rect.height, GROUND_Y) if rect.y == 0 else (half_pipe.x, 0, rect.y)
+    for heart in sim.hearts:
+        values += (heart.x, heart.y)
+    return values
+
+
+def scripted_flap(values: List[float], margin: float) -> bool:
+    """Scripted policy: flap when the bird sinks within margin of the bottom of the next opening"""
+    bottom, nearest = float(GROUND_Y), float("inf")
+    obstacles = int(values[4] + values[5])
+    for start in range(7, 7 + 3 * obstacles, 3):
+        x = values[start]
+        if BIRD_LEFT < x + PIPE_WIDTH and x < nearest:
+            nearest, bottom = x, values[start + 2]
+    return values[0] > bottom - margin
+
+
+def hash_rows(rows: np.ndarray) -> np.ndarray:
+    """64-bit hash of each row of float64 values (splitmix64 of every value, mixed with its column)"""
+    bits = rows.view(np.uint64) + (np.arange(rows.shape[1], dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15))
+    bits ^= bits >> np.uint64(30)
+    bits *= np.uint64(0xBF58476D1CE4E5B9)
+    bits ^= bits >> np.uint64(27)
+    bits *= np.uint64(0x94D049BB133111EB)
+    bits ^= bits >> np.uint64(31)
+    return np.bitwise_xor.reduce(bits * np.uint64(2) + np.uint64(1), axis=1)
+
+
+def _frame_hash(surface: pygame.Surface) -> int:
+    return int.from_bytes(hashlib.blake2b(surface.get_buffer().raw, digest_size=8).digest(), "little")
+
+
+def play(engine: Engine, episode: Episode, max_ticks: int = MAX_TICKS, renderer: Optional[Renderer] = None,
+         frame_every: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Play an episode; return the state hash of every tick and the hashes of the sampled frames"""
+    sim = engine(episode.seed, episode_course(episode.seed, episode.hard))
+    rows = np.zeros((max_ticks, ROW_WIDTH))
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)) if renderer is not None and frame_every else None
+    frames: List[int] = []
+    ticks = 0
+    values = state_values(sim)
+    while ticks < max_ticks and not sim.game_over:
+        sim.step(scripted_flap(values, episode.margin))
+        values = state_values(sim)
+        rows[ticks, :min(len(values), ROW_WIDTH)] = values[:ROW_WIDTH]
+        ticks += 1
+        if surface is not None and renderer is not None and ticks % frame_every == 0:
+            renderer(surface, sim, sim.now)
+            frames.append(_frame_hash(surface))
+    return hash_rows(rows[:ticks]), np.array(frames, dtype=np.uint64)
+
+
+class _Chunk(NamedTuple):
+    """Work for one pool task"""
+    engine: Engine
+    renderer: Optional[Renderer]
+    first: int  # Index of the first episode
+    episodes: List[Episode]
+    max_ticks: int
+    frame_every: int
+    golden: Optional[List[Tuple[np.ndarray, np.ndarray]]]  # Hashes to compare with, when checking
+
+
+def _init_worker() -> None:
+    pygame.font.init()  # Renderers may draw text; pygame.init() would let SDL catch the pool's SIGTERM
+
+
+def _play_chunk(chunk: _Chunk) -> List[Any]:
+    """Hashes of each episode of a chunk, or with golden hashes the first divergence of each (None if equal)"""
+    results: List[Any] = []
+    for offset, episode in enumerate(chunk.episodes):
+        states, frames = play(chunk.engine, episode, chunk.max_ticks, chunk.renderer, chunk.frame_every)
+        if chunk.golden is None:
+            results.append((states, frames))
+        else:
+            results.append(_first_divergence(chunk.first + offset, episode, states, frames,
+                                             *chunk.golden[offset], chunk.frame_every))
+    return results
+
+
+def _first_divergence(index: int, episode: Episode, states: np.ndarray, frames: np.ndarray,
+                      golden_states: np.ndarray, golden_frames: np.ndarray, frame_every: int) -> Optional[Divergence]:
+    shared = min(len(states), len(golden_states))
+    differs = np.flatnonzero(states[:shared] != golden_states[:shared])
+    tick = int(differs[0]) + 1 if len(differs) else None
+    what = "state"
+    if len(frames) and len(golden_frames):
+        shared_frames = min(len(frames), len(golden_frames))
+        frame_differs = np.flatnonzero(frames[:shared_frames] != golden_frames[:shared_frames])
+        if len(frame_differs):
+            frame_tick = (int(frame_differs[0]) + 1) * frame_every
+            if tick is None or frame_tick < tick:
+                tick, what = frame_tick, "frame"
+    if tick is None and len(states) != len(golden_states):
+        tick, what = shared + 1, "length"
+    return None if tick is None else Divergence(index, episode.seed, tick, what)
+
+
+def _run(engine: Engine, specs: Sequence[Episode], max_ticks: int, renderer: Optional[Renderer], frame_every: int,
+         golden: Optional[List[Tuple[np.ndarray, np.ndarray]]], workers: Optional[int]) -> List[Any]:
+    chunks = [_Chunk(engine, renderer, first, list(specs[first:first + CHUNK]), max_ticks, frame_every,
+                     None if golden is None else golden[first:first + CHUNK])
+              for first in range(0, len(specs), CHUNK)]
+    results: List[Any] = []
+    with multiprocessing.Pool(workers, _init_worker) as pool:
+        for chunk_results in pool.imap(_play_chunk, chunks):
+            results.extend(chunk_results)
+        pool.close()
+        pool.join()
+    return results
+
+
+class GoldenTraces(NamedTuple):
+    """Recorded hashes of the reference engine"""
+    episodes: List[Episode]
+    states: List[np.ndarray]  # Per episode, the state hash of every tick
+    frames: List[np.ndarray]  # Per episode, the hash of every frame_every-th frame
+    max_ticks: int
+    frame_every: int
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as file:
+            np.savez(file, seed=np.array([episode.seed for episode in self.episodes]),
+                     margin=np.array([episode.margin for episode in self.episodes]),
+                     hard=np.array([episode.hard for episode in self.episodes]),
+                     state_lengths=np.array([len(states) for states in self.states]),
+                     states=np.concatenate(self.states) if self.states else np.zeros(0, dtype=np.uint64),
+                     frame_lengths=np.array([len(frames) for frames in self.frames]),
+                     frames=np.concatenate(self.frames) if self.frames else np.zeros(0, dtype=np.uint64),
+                     max_ticks=self.max_ticks, frame_every=self.frame_every)
+
+    @classmethod
+    def load(cls, path: str) -> "GoldenTraces":
+        with np.load(path) as data:
+            specs = [Episode(int(seed), float(margin), bool(hard))
+                     for seed, margin, hard in zip(data["seed"], data["margin"], data["hard"])]
+            states = np.split(data["states"], np.cumsum(data["state_lengths"])[:-1])
+            frames = np.split(data["frames"], np.cumsum(data["frame_lengths"])[:-1])
+            return cls(specs, states, frames, int(data["max_ticks"]), int(data["frame_every"]))
+
+
+def record(count: int, engine: Engine = Simulation, max_ticks: int = MAX_TICKS, renderer: Optional[Renderer] = None,
+           frame_every: int = 0, workers: Optional[int] = None) -> GoldenTraces:
+    """Play count episodes on the reference engine and keep their hashes"""
+    specs = episodes(count)
+    results = _run(engine, specs, max_ticks, renderer, frame_every, None, workers)
+    return GoldenTraces(specs, [states for states, _ in results], [frames for _, frames in results],
+                        max_ticks, frame_every)
+
+
+def check(golden: GoldenTraces, engine: Engine = Simulation, renderer: Optional[Renderer] = None,
+          workers: Optional[int] = None) -> List[Divergence]:
+    """Play the golden episodes on engine (and renderer) and return the first divergence of every episode"""
+    frame_every = golden.frame_every if renderer is not None else 0
+    results = _run(engine, golden.episodes, golden.max_ticks, renderer, frame_every,
+                   list(zip(golden.states, golden.frames)), workers)
+    return [divergence for divergence in results if divergence is not None]
+
+
+def load_callable(path: str) -> Any:
+    """Object named by "package.module:name" """
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Record golden traces or check an engine against them")
+    parser.add_argument("command", choices=("record", "check"))
+    parser.add_argument("golden", help="golden trace file")
+    parser.add_argument("--engine", default="flappy_bird.simulation:Simulation",
+                        help="module:callable taking (seed, course) and returning a simulation")
+    parser.add_argument("--renderer", default=None,
+                        help="module:callable drawing (surface, sim, time), e.g. flappy_bird.graphics:draw_world")
+    parser.add_argument("--episodes", type=int, default=2000, help="episodes to record")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS, help="tick limit per episode")
+    parser.add_argument("--frame-every", type=int, default=0, help="record the hash of every n-th frame")
+    parser.add_argument("--workers", type=int, default=None, help="processes (one per core by default)")
+    args = parser.parse_args(argv)
+
+    engine = load_callable(args.engine)
+    renderer = load_callable(args.renderer) if args.renderer else None
+    started = time.perf_counter()
+    if args.command == "record":
+        if args.frame_every and renderer is None:
+            parser.error("--frame-every needs a --renderer")
+        golden = record(args.episodes, engine, args.max_ticks, renderer, args.frame_every, args.workers)
+        golden.save(args.golden)
+        divergences: List[Divergence] = []
+    else:
+        golden = GoldenTraces.load(args.golden)
+        divergences = check(golden, engine, renderer, args.workers)
+    elapsed = time.perf_counter() - started
+    ticks = sum(len(states) for states in golden.states)
+    print(f"{len(golden.episodes)} episodes, {ticks:,} ticks in {elapsed:.1f}s ({ticks / elapsed:,.0f} ticks/s)")
+    if args.command == "check":
+        print(f"{len(divergences)} episodes diverge" if divergences else "no divergence")
+        for divergence in sorted(divergences, key=lambda divergence: divergence.tick)[:10]:
+            print(f"  episode {divergence.episode} (seed {divergence.seed}): {divergence.what} differs "
+                  f"from tick {divergence.tick}")
+        if divergences:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
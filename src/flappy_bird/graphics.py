@@ -1,131 +1,136 @@
 """Graphics functions for Flappy Bird"""
 
 import pygame
-from typing import Dict
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union, TYPE_CHECKING
 from flappy_bird.constants import BIOMES, BIOME_INTERVAL, SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, WHITE, YELLOW, Color
+from flappy_bird.palette import BiomePalette, biome_table
+from flappy_bird.pipe import draw_pipes
+from flappy_bird.startup import get_font
+
+if TYPE_CHECKING:
+    from flappy_bird.render import RenderSnapshot
+    from flappy_bird.simulation import Simulation
+
+    Scene = Union[Simulation, RenderSnapshot]  # Anything with the attributes a frame is drawn from
+
+
+class BackgroundSprites(NamedTuple):
+    """Surfaces of a biome's background scenery, in drawing order"""
+    sun: Optional[pygame.Surface]  # Day only
+    trunk: Optional[pygame.Surface]  # Tree biomes
+    canopy: Optional[pygame.Surface]
+    cactus: Optional[Tuple[pygame.Surface, pygame.Surface, pygame.Surface]]  # Trunk and two arms
+    mountain: Optional[Tuple[pygame.Surface, pygame.Surface]]  # Mountain and snow cap
+
+
+_background_cache: Dict[int, BackgroundSprites] = {}
+_text_cache: Dict[Tuple[pygame.font.Font, str], pygame.Surface] = {}
+
+# Trunk colour and canopy circles (colour, centre, radius) of the tree biomes
+_TREES: Dict[int, Tuple[Color, Tuple[Tuple[Color, Tuple[int, int], int], ...]]] = {
+    0: (Color(101, 67, 33), ((Color(34, 139, 34), (75, 100), 60), (Color(34, 150, 34), (40, 70), 50),
+                             (Color(50, 180, 50), (110, 70), 50), (Color(34, 145, 34), (25, 40), 40),
+                             (Color(40, 155, 40), (125, 40), 40))),
+    1: (Color(80, 50, 20), ((Color(34, 100, 34), (75, 100), 60), (Color(34, 90, 34), (40, 70), 50),
+                            (Color(40, 120, 40), (110, 70), 50), (Color(34, 105, 34), (25, 40), 40),
+                            (Color(40, 115, 40), (125, 40), 40))),
+}
+
+
+def get_background_sprites(biome: int) -> BackgroundSprites:
+    """Background scenery of a biome, rendered on first use"""
+    sprites = _background_cache.get(biome)
+    if sprites is not None:
+        return sprites
+    sun = trunk = canopy = None
+    cactus: Optional[Tuple[pygame.Surface, pygame.Surface, pygame.Surface]] = None
+    mountain: Optional[Tuple[pygame.Surface, pygame.Surface]] = None
+    if biome == 0:
+        # Sun with glow effect
+        sun = pygame.Surface((60, 60))
+        sun.fill((0, 0, 0))  # Fill with black first
+        sun.set_colorkey((0, 0, 0))  # Make black transparent
+        pygame.draw.circle(sun, (YELLOW[0], YELLOW[1], YELLOW[2], 50), (30, 30), 30)  # Outer glow
+        pygame.draw.circle(sun, YELLOW, (30, 30), 20)  # Inner sun
+    if biome in _TREES:
+        trunk_color, circles = _TREES[biome]
+        # Very tall tree trunk that spans most of the screen
+        trunk = pygame.Surface((40, SCREEN_HEIGHT - GROUND_HEIGHT - 50))
+        trunk.fill(trunk_color)
+        # Large canopy: a more organic shape from overlapping circles
+        canopy = pygame.Surface((150, 150))
+        canopy.fill((0, 0, 0))
+        canopy.set_colorkey((0, 0, 0))
+        for color, center, radius in circles:
+            pygame.draw.circle(canopy, color, center, radius)
+    elif biome == 2:
+        # Semi-transparent cactus trunk and arms
+        parts = []
+        for size in ((15, 50), (25, 8), (8, 20)):
+            part = pygame.Surface(size, pygame.SRCALPHA)
+            part.fill((50, 120, 50, 150))
+            parts.append(part)
+        cactus = (parts[0], parts[1], parts[2])
+    elif biome == 3:
+        # Semi-transparent mountain with a snow cap
+        mountain_surf = pygame.Surface((80, 80), pygame.SRCALPHA)
+        pygame.draw.polygon(mountain_surf, (200, 200, 220, 120), [(0, 80), (40, 0), (80, 80)])
+        snow_surf = pygame.Surface((20, 20), pygame.SRCALPHA)
+        pygame.draw.polygon(snow_surf, (245, 245, 245, 180), [(10, 20), (0, 0), (20, 0)])
+        mountain = (mountain_surf, snow_surf)
+    sprites = _background_cache[biome] = BackgroundSprites(sun, trunk, canopy, cactus, mountain)
+    return sprites
+
+
+def clear_background_sprites() -> None:
+    """Forget every cached background sprite, e.g. after the display mode changed"""
+    _background_cache.clear()
 
 
 def draw_background_elements(surface: pygame.Surface, biome_colors: Dict[str, Color], score: int,
                              elapsed_time: int) -> None:
     """Draw background elements based on the current biome"""
+    surface.blits(background_items(score, elapsed_time), doreturn=False)
+
+
+def background_items(score: int, elapsed_time: int) -> List[Tuple[pygame.Surface, Tuple[float, float]]]:
+    """Sprites and positions of the current biome's scenery, in drawing order"""
     biome_index = (score // BIOME_INTERVAL) % len(BIOMES)
+    sprites = get_background_sprites(biome_index)
+    items: List[Tuple[pygame.Surface, Tuple[float, float]]] = []
 
     # Draw sun that gradually sets based on score (day to evening transition)
-    # Calculate sun position based on score progression within the day biome
-    if biome_index == 0 and score < BIOME_INTERVAL:  # Day biome and score < 10
+    if sprites.sun is not None and score < BIOME_INTERVAL:  # Day biome and score < 10
         # Sun moves from left to right and slightly downward as score increases
-        normalized_score = score  # Use actual score instead of time-based movement
-
-        sun_x = 50 + (normalized_score / BIOME_INTERVAL) * (SCREEN_WIDTH - 100)
-        sun_y = 80 + (normalized_score / BIOME_INTERVAL) * 100  # Move downward as it "sets"
-
-        # Draw sun with glow effect
-        sun_surf = pygame.Surface((60, 60))
-        sun_surf.fill((0, 0, 0))  # Fill with black first
-        sun_surf.set_colorkey((0, 0, 0))  # Make black transparent
-        # Outer glow
-        pygame.draw.circle(sun_surf, (YELLOW[0], YELLOW[1], YELLOW[2], 50), (30, 30), 30)
-        # Inner sun
-        pygame.draw.circle(sun_surf, YELLOW, (30, 30), 20)
-        surface.blit(sun_surf, (int(sun_x - 30), int(sun_y - 30)))
-
-    if biome_index == 0:  # Day biome - trees
-        # Draw large trees that span the entire screen height with trunks at bottom and canopy at top
-        for i in range(10):  # More trees to ensure continuous coverage as they move
-            # Calculate tree position with smooth movement based on time
-            x_pos = (i * 100 - elapsed_time * 0.05) % (
-                        SCREEN_WIDTH + 500) - 100  # Trees move backward based on time, faster movement
-            # Only draw trees that are visible on screen
-            if -50 <= x_pos <= SCREEN_WIDTH + 50:
-                # Very tall tree trunk that spans most of the screen
-                trunk_width = 40
-                trunk_height = SCREEN_HEIGHT - GROUND_HEIGHT - 50  # Almost to the top
-                trunk_surf = pygame.Surface((trunk_width, trunk_height))
-                trunk_surf.fill((101, 67, 33))  # Full opacity
-                surface.blit(trunk_surf, (int(x_pos), 50))  # Start near the top, cast to int for smooth movement
-
-                # Large canopy at the top of the screen
-                canopy_surf = pygame.Surface((150, 150))
-                canopy_surf.fill((0, 0, 0))  # Fill with black first
-                canopy_surf.set_colorkey((0, 0, 0))  # Make black transparent
-                # Create a more organic canopy shape using multiple overlapping circles
-                pygame.draw.circle(canopy_surf, (34, 139, 34), (75, 100), 60)  # Center
-                pygame.draw.circle(canopy_surf, (34, 150, 34), (40, 70), 50)  # Left
-                pygame.draw.circle(canopy_surf, (50, 180, 50), (110, 70), 50)  # Right
-                pygame.draw.circle(canopy_surf, (34, 145, 34), (25, 40), 40)  # Far left
-                pygame.draw.circle(canopy_surf, (40, 155, 40), (125, 40), 40)  # Far right
-                surface.blit(canopy_surf,
-                             (int(x_pos - 35), 0))  # Position at top of screen, cast to int for smooth movement
-
-    elif biome_index == 1:  # Evening biome - trees
-        # Draw large trees that span the entire screen height with trunks at bottom and canopy at top
+        sun_x = 50 + (score / BIOME_INTERVAL) * (SCREEN_WIDTH - 100)
+        sun_y = 80 + (score / BIOME_INTERVAL) * 100  # Move downward as it "sets"
+        items.append((sprites.sun, (int(sun_x - 30), int(sun_y - 30))))
+
+    if sprites.trunk is not None and sprites.canopy is not None:  # Day and evening biomes - trees
+        # Large trees with trunks at the bottom and canopies at the top of the screen
         for i in range(10):  # More trees to ensure continuous coverage as they move
-            # Calculate tree position with smooth movement based on time
-            x_pos = (i * 100 - elapsed_time * 0.05) % (
-                        SCREEN_WIDTH + 500) - 100  # Trees move backward based on time, faster movement
+            # Trees move backward based on time
+            x_pos = (i * 100 - elapsed_time * 0.05) % (SCREEN_WIDTH + 500) - 100
             # Only draw trees that are visible on screen
             if -50 <= x_pos <= SCREEN_WIDTH + 50:
-                # Very tall tree trunk that spans most of the screen
-                trunk_width = 40
-                trunk_height = SCREEN_HEIGHT - GROUND_HEIGHT - 50  # Almost to the top
-                trunk_surf = pygame.Surface((trunk_width, trunk_height))
-                trunk_surf.fill((80, 50, 20))  # Full opacity
-                surface.blit(trunk_surf, (int(x_pos), 50))  # Start near the top, cast to int for smooth movement
-
-                # Large canopy at the top of the screen
-                canopy_surf = pygame.Surface((150, 150))
-                canopy_surf.fill((0, 0, 0))  # Fill with black first
-                canopy_surf.set_colorkey((0, 0, 0))  # Make black transparent
-                # Create a more organic canopy shape using multiple overlapping circles
-                pygame.draw.circle(canopy_surf, (34, 100, 34), (75, 100), 60)  # Center
-                pygame.draw.circle(canopy_surf, (34, 90, 34), (40, 70), 50)  # Left
-                pygame.draw.circle(canopy_surf, (40, 120, 40), (110, 70), 50)  # Right
-                pygame.draw.circle(canopy_surf, (34, 105, 34), (25, 40), 40)  # Far left
-                pygame.draw.circle(canopy_surf, (40, 115, 40), (125, 40), 40)  # Far right
-                surface.blit(canopy_surf,
-                             (int(x_pos - 35), 0))  # Position at top of screen, cast to int for smooth movement
-
-    elif biome_index == 2:  # Desert biome - cacti
-        # Draw some cacti in the background with transparency
+                items.append((sprites.trunk, (int(x_pos), 50)))  # Start near the top
+                items.append((sprites.canopy, (int(x_pos - 35), 0)))
+
+    elif sprites.cactus is not None:  # Desert biome - cacti
+        trunk, arm1, arm2 = sprites.cactus
         for i in range(5):
             x_pos = (i * 100 + score * 0.3) % (SCREEN_WIDTH + 200) - 100  # Slower movement
-            # Main cactus trunk with transparency
-            trunk_surf = pygame.Surface((15, 50), pygame.SRCALPHA)
-            trunk_surf.fill((50, 120, 50, 150))  # Semi-transparent
-            surface.blit(trunk_surf, (x_pos, SCREEN_HEIGHT - GROUND_HEIGHT - 50))
-
-            # Cactus arms with transparency
-            arm1 = pygame.Surface((25, 8), pygame.SRCALPHA)
-            arm1.fill((50, 120, 50, 150))
-            surface.blit(arm1, (x_pos - 10, SCREEN_HEIGHT - GROUND_HEIGHT - 40))
-
-            arm2 = pygame.Surface((8, 20), pygame.SRCALPHA)
-            arm2.fill((50, 120, 50, 150))
-            surface.blit(arm2, (x_pos + 7, SCREEN_HEIGHT - GROUND_HEIGHT - 30))
-
-    elif biome_index == 3:  # Snow biome - mountains
-        # Draw some mountain silhouettes in the background with transparency
+            items.append((trunk, (x_pos, SCREEN_HEIGHT - GROUND_HEIGHT - 50)))
+            items.append((arm1, (x_pos - 10, SCREEN_HEIGHT - GROUND_HEIGHT - 40)))
+            items.append((arm2, (x_pos + 7, SCREEN_HEIGHT - GROUND_HEIGHT - 30)))
+
+    elif sprites.mountain is not None:  # Snow biome - mountains
+        mountain, snow = sprites.mountain
         for i in range(6):
             x_pos = (i * 80 + score * 0.2) % (SCREEN_WIDTH + 100) - 50  # Even slower movement
-            # Mountain triangle with transparency
-            mountain_points = [
-                (x_pos, SCREEN_HEIGHT - GROUND_HEIGHT),
-                (x_pos + 40, SCREEN_HEIGHT - GROUND_HEIGHT - 80),
-                (x_pos + 80, SCREEN_HEIGHT - GROUND_HEIGHT)
-            ]
-            mountain_surf = pygame.Surface((80, 80), pygame.SRCALPHA)
-            pygame.draw.polygon(mountain_surf, (200, 200, 220, 120), [(0, 80), (40, 0), (80, 80)])
-            surface.blit(mountain_surf, (x_pos, SCREEN_HEIGHT - GROUND_HEIGHT - 80))
-
-            # Snow cap on mountain with transparency
-            snow_points = [
-                (x_pos + 30, SCREEN_HEIGHT - GROUND_HEIGHT - 60),
-                (x_pos + 40, SCREEN_HEIGHT - GROUND_HEIGHT - 80),
-                (x_pos + 50, SCREEN_HEIGHT - GROUND_HEIGHT - 60)
-            ]
-            snow_surf = pygame.Surface((20, 20), pygame.SRCALPHA)
-            pygame.draw.polygon(snow_surf, (245, 245, 245, 180), [(10, 20), (0, 0), (20, 0)])
-            surface.blit(snow_surf, (x_pos + 30, SCREEN_HEIGHT - GROUND_HEIGHT - 80))
+            items.append((mountain, (x_pos, SCREEN_HEIGHT - GROUND_HEIGHT - 80)))
+            items.append((snow, (x_pos + 30, SCREEN_HEIGHT - GROUND_HEIGHT - 80)))
+    return items
 
 
 def draw_ground(surface: pygame.Surface, biome_colors: Dict[str, Color]) -> None:
@@ -135,21 +140,158 @@ def draw_ground(surface: pygame.Surface, biome_colors: Dict[str, Color]) -> None
     pygame.draw.rect(surface, biome_colors["grass_color"], (0, SCREEN_HEIGHT - GROUND_HEIGHT, SCREEN_WIDTH, 15))
 
 
+GROUND_RECT: pygame.Rect = pygame.Rect(0, SCREEN_HEIGHT - GROUND_HEIGHT, SCREEN_WIDTH, GROUND_HEIGHT)
+GRASS_RECT: pygame.Rect = pygame.Rect(0, SCREEN_HEIGHT - GROUND_HEIGHT, SCREEN_WIDTH, 15)
+
+
+def fill_ground(surface: pygame.Surface, palette: BiomePalette) -> None:
+    """draw_ground with colours already mapped to the surface's pixel format"""
+    surface.fill(palette.ground, GROUND_RECT)
+    surface.fill(palette.grass, GRASS_RECT)
+
+
+def scene_palette(surface: pygame.Surface, sim: "Scene") -> BiomePalette:
+    """Palette of the game's biome, cross-fading for a moment after the biome changed"""
+    ticks_in_biome = None if sim.biome_tick is None else sim.tick - sim.biome_tick
+    return biome_table(surface).palette(sim.biome, ticks_in_biome)
+
+
+def draw_world(surface: pygame.Surface, sim: "Scene", elapsed_time: int, show_invincible: bool = True) -> None:
+    """Draw the sky, background, obstacles, hearts, ground and bird of a game"""
+    draw_scene(surface, sim, elapsed_time)
+    sim.bird.draw(surface, sim.invincible and show_invincible)  # Invincible birds flash
+
+
+def draw_scene(surface: pygame.Surface, sim: "Scene", elapsed_time: int) -> None:
+    """Draw everything of a game except the bird"""
+    palette = scene_palette(surface, sim)
+    surface.fill(palette.sky)
+    draw_background_elements(surface, BIOMES[sim.biome], sim.score, elapsed_time)
+    draw_pipes(surface, sim.pipes, sim.half_pipes)
+    for heart in sim.hearts:
+        heart.draw(surface)
+    fill_ground(surface, palette)
+
+
+def static_text(font: pygame.font.Font, text: str) -> pygame.Surface:
+    """White text that never changes, rendered once per font"""
+    key = (font, text)
+    rendered = _text_cache.get(key)
+    if rendered is None:
+        rendered = _text_cache[key] = font.render(text, True, WHITE)
+    return rendered
+
+
 def draw_start_screen(surface: pygame.Surface, font: pygame.font.Font) -> None:
-    title_font = pygame.font.SysFont('arial', 36)
-    title_text = title_font.render("FLAPPY BIRD", True, WHITE)
-    instruction_text = font.render("Press SPACE to Start", True, WHITE)
+    title_text = static_text(get_font(36), "FLAPPY BIRD")
+    instruction_text = static_text(font, "Press SPACE to Start")
+    autopilot_text = static_text(font, "Press A to Watch the Autopilot")
 
     surface.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, SCREEN_HEIGHT // 2 - 50))
     surface.blit(instruction_text, (SCREEN_WIDTH // 2 - instruction_text.get_width() // 2, SCREEN_HEIGHT // 2 + 20))
+    surface.blit(autopilot_text, (SCREEN_WIDTH // 2 - autopilot_text.get_width() // 2, SCREEN_HEIGHT // 2 + 55))
 
 
-def draw_game_over_screen(surface: pygame.Surface, score: int, font: pygame.font.Font) -> None:
-    title_font = pygame.font.SysFont('arial', 36)
-    title_text = title_font.render("GAME OVER", True, WHITE)
+def draw_game_over_screen(surface: pygame.Surface, score: int, font: pygame.font.Font,
+                          rank: Optional[int] = None, games: int = 0) -> None:
+    """Draw the game over screen; with a rank, show the score's place among games on the leaderboard"""
+    title_text = static_text(get_font(36), "GAME OVER")
     score_text = font.render(f"Score: {score}", True, WHITE)
-    restart_text = font.render("Press R to Restart", True, WHITE)
+    restart_text = static_text(font, "Press R to Restart")
 
     surface.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, SCREEN_HEIGHT // 2 - 60))
     surface.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, SCREEN_HEIGHT // 2))
-    surface.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, SCREEN_HEIGHT // 2 + 40))
+    restart_y = SCREEN_HEIGHT // 2 + 40
+    if rank is not None:
+        rank_text = font.render(f"Rank: #{rank:,} of {games:,}", True, WHITE)
+        surface.blit(rank_text, (SCREEN_WIDTH // 2 - rank_text.get_width() // 2, SCREEN_HEIGHT // 2 + 32))
+        restart_y += 32
+    surface.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, restart_y))
+
+
+def draw_lives(surface: pygame.Surface, lives: float) -> None:
+    """Draw hearts to represent remaining lives (supports half hearts)"""
+    heart_color = (255, 0, 0)  # Red color for hearts
+    margin = 10
+    
+    full_hearts = int(lives)
+    has_half_heart = lives % 1 >= 0.5
+    
+    # Draw full hearts with complex symmetrical shape (smaller size)
+    for i in range(full_hearts):
+        x = SCREEN_WIDTH - margin - 20 - (i * 28)
+        y = margin + 10
+        
+        # Draw complex symmetrical heart - left side points
+        left_points = [
+            (x, y + 16),        # Bottom point (center)
+            (x - 2, y + 12),    # Lower curve left 1
+            (x - 4, y + 9),     # Lower curve left 2
+            (x - 6, y + 6),     # Lower left curve
+            (x - 8, y + 3),     # Left side lower
+            (x - 9, y + 0),     # Left side
+            (x - 10, y - 3),    # Left side middle
+            (x - 10, y - 6),    # Left side upper
+            (x - 9, y - 9),     # Left bump lower outer
+            (x - 8, y - 12),    # Left bump outer lower
+            (x - 6, y - 14),    # Left bump outer
+            (x - 4, y - 15),    # Left bump top outer
+            (x - 2, y - 14),    # Left bump top
+            (x - 1, y - 11),    # Left bump inner
+            (x, y - 8),         # Left side of center dip
+        ]
+        
+        # Right side points (mirror of left)
+        right_points = [
+            (x, y - 8),         # Right side of center dip
+            (x + 1, y - 11),    # Right bump inner
+            (x + 2, y - 14),    # Right bump top
+            (x + 4, y - 15),    # Right bump top outer
+            (x + 6, y - 14),    # Right bump outer
+            (x + 8, y - 12),    # Right bump outer lower
+            (x + 9, y - 9),     # Right bump lower outer
+            (x + 10, y - 6),    # Right side upper
+            (x + 10, y - 3),    # Right side middle
+            (x + 9, y + 0),     # Right side
+            (x + 8, y + 3),     # Right side lower
+            (x + 6, y + 6),     # Lower right curve
+            (x + 4, y + 9),     # Lower curve right 2
+            (x + 2, y + 12),    # Lower curve right 1
+        ]
+        
+        # Combine all points into one closed polygon
+        points = left_points + right_points
+        pygame.draw.polygon(surface, heart_color, points)
+    
+    # Draw half heart with complex symmetrical left half shape (smaller size)
+    if has_half_heart:
+        i = full_hearts
+        x = SCREEN_WIDTH - margin - 20 - (i * 28)
+        y = margin + 10
+        
+        # Draw left half of complex symmetrical heart (scaled down)
+        points = [
+            (x, y + 16),        # Bottom point (center line)
+            (x - 2, y + 12),    # Lower curve left 1
+            (x - 4, y + 9),     # Lower curve left 2
+            (x - 6, y + 6),     # Lower left curve
+            (x - 8, y + 3),     # Left side lower
+            (x - 9, y + 0),     # Left side
+            (x - 10, y - 3),    # Left side middle
+            (x - 10, y - 6),    # Left side upper
+            (x - 9, y - 9),     # Left bump lower outer
+            (x - 8, y - 12),    # Left bump outer lower
+            (x - 6, y - 14),    # Left bump outer
+            (x - 4, y - 15),    # Left bump top outer
+            (x - 2, y - 14),    # Left bump top
+            (x - 1, y - 11),    # Left bump inner
+            (x, y - 8),         # Center dip (on cut line)
+        ]
+        pygame.draw.polygon(surface, heart_color, points)
+
+
+def draw_hud(surface: pygame.Surface, sim: "Scene", font: pygame.font.Font) -> None:
+    """Draw the score and the remaining lives of a game in progress"""
+    score_text = font.render(f"Score: {sim.score}", True, WHITE)
+    surface.blit(score_text, (10, 10))
+    draw_lives(surface, sim.lives)
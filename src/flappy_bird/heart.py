@@ -1,28 +1,44 @@
 """Heart collectible class for Flappy Bird"""
 
 import pygame
-import math
-from flappy_bird.constants import SCREEN_HEIGHT, GROUND_HEIGHT
+from typing import Optional
+from flappy_bird.entities import (
+    EntityStore, EntityView, HEART_FLOAT_AMPLITUDE, HEART_FLOAT_SPEED, HEART_RADIUS, column
+)
 
 
-class Heart:
+class Heart(EntityView):
     """A collectible heart that restores health when picked up"""
-    
-    def __init__(self, x: float, y: float) -> None:
-        self.x: float = x
-        self.y: float = y
-        self.radius: int = 12  # Slightly smaller than bird
-        self.collected: bool = False
-        self.float_offset: float = 0  # For floating animation
-        self.float_speed: float = 0.02  # Speed of floating motion
-        self.float_amplitude: float = 2  # How far it floats up/down
-        
-    def update(self, speed: float) -> None:
-        """Update heart position and animation"""
-        self.x -= speed
-        # Floating animation
-        self.float_offset = math.sin(pygame.time.get_ticks() * self.float_speed) * self.float_amplitude
-        
+
+    x = column("x")
+    y = column("base")
+    radius: int = HEART_RADIUS  # Slightly smaller than bird
+    float_speed: float = HEART_FLOAT_SPEED  # Speed of floating motion
+    float_amplitude: float = HEART_FLOAT_AMPLITUDE  # How far it floats up/down
+
+    def __init__(self, x: float, y: float, store: Optional[EntityStore] = None) -> None:
+        self.store = store if store is not None else EntityStore(1)
+        self.slot = self.store.add_heart(x, y)
+
+    @property
+    def float_offset(self) -> float:
+        """Offset of the floating animation"""
+        return self.store.heart_offset
+
+    @property
+    def collected(self) -> bool:
+        return bool(self.store.claimed[self.slot])
+
+    @collected.setter
+    def collected(self, collected: bool) -> None:
+        self.store.claimed[self.slot] = collected
+
+    def update(self, speed: float, now: Optional[int] = None) -> None:
+        """Update heart position and animation (now defaults to pygame's clock)"""
+        if now is None:
+            now = pygame.time.get_ticks()
+        self.store.advance(speed, now, index=slice(self.slot, self.slot + 1))
+
     def draw(self, surface: pygame.Surface) -> None:
         """Draw the heart with floating animation - same style as health hearts"""
         y = self.y + self.float_offset
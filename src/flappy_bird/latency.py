@@ -0,0 +1,105 @@
+"""Input-to-photon latency of flaps
+
+A LatencyMonitor follows each flap key press from the moment it happened to
+the display flip that first shows its effect. The game loop calls pressed()
+for every flap KEYDOWN, applied() when the simulation steps with the flap and
+presented() right after pygame.display.flip().
+
+Most of the latency of a fixed-rate loop is the wait for the next frame: a
+press that arrives just after the events were read sits in the queue for a
+whole frame. A FramePacer sleeps on the event queue instead of a timer, so a
+flap can start the next frame up to half a frame early. The frame after it
+keeps its usual deadline, so the game still runs at exactly FPS ticks per
+second and only the frame shown when flapping is held a little longer.
+
+The press time is taken from the event's ``timestamp`` (SDL milliseconds, as
+pygame.time.get_ticks()) when the event carries one. Events without one are
+dated when the loop drains them, which leaves out the time they spent in the
+queue; run the game with --low-latency to shrink that part as well.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pygame
+
+PERCENTILES = (50, 90, 99)
+
+
+def is_flap(event: pygame.event.Event) -> bool:
+    return event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE
+
+
+class LatencyMonitor:
+    """Collects input-to-photon latencies in milliseconds"""
+
+    def __init__(self) -> None:
+        self.samples: List[float] = []
+        self._pressed: List[float] = []  # perf_counter() times of presses not yet stepped
+        self._applied: List[float] = []  # Presses stepped into the frame being drawn
+
+    def pressed(self, event: pygame.event.Event) -> None:
+        """Note a flap key press"""
+        now = time.perf_counter()
+        timestamp = getattr(event, "timestamp", None)
+        if timestamp is not None:
+            now -= max(0, pygame.time.get_ticks() - timestamp) / 1000
+        self._pressed.append(now)
+
+    def applied(self) -> None:
+        """The presses so far took effect in this frame's simulation step"""
+        self._applied.extend(self._pressed)
+        self._pressed.clear()
+
+    def presented(self) -> None:
+        """The frame showing the applied presses is on screen"""
+        if self._applied:
+            now = time.perf_counter()
+            self.samples.extend((now - pressed) * 1000 for pressed in self._applied)
+            self._applied.clear()
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, percentiles and maximum of the latencies in milliseconds"""
+        if not self.samples:
+            return {"count": 0}
+        samples = np.array(self.samples)
+        summary = {"count": len(samples), "mean": float(samples.mean())}
+        for percentile, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+            summary[f"p{percentile}"] = float(value)
+        summary["max"] = float(samples.max())
+        return summary
+
+    def report(self) -> str:
+        summary = self.summary()
+        if not summary["count"]:
+            return "input latency: no flaps"
+        values = ", ".join(f"{name} {value:.1f}" for name, value in summary.items() if name != "count")
+        return f"input latency over {summary['count']:.0f} flaps (ms): {values}"
+
+
+class FramePacer:
+    """Frame deadlines at a fixed rate that a flap may pull forward by up to half a frame"""
+
+    def __init__(self, fps: int) -> None:
+        self.period: float = 1 / fps
+        self.next_frame: Optional[float] = None  # perf_counter() time the next frame is due
+
+    def wait(self) -> List[pygame.event.Event]:
+        """Sleep until the next frame should start and return the events that arrived meanwhile"""
+        now = time.perf_counter()
+        if self.next_frame is None or now > self.next_frame + self.period:
+            self.next_frame = now  # First frame, or the game stalled: start a new schedule
+        events: List[pygame.event.Event] = []
+        due = self.next_frame
+        while now < due:
+            milliseconds = int((due - now) * 1000)
+            # The last millisecond is spun out, as sleeping can overshoot by that much
+            event = pygame.event.wait(milliseconds) if milliseconds > 0 else pygame.event.poll()
+            if event.type != pygame.NOEVENT:
+                events.append(event)
+                if is_flap(event):
+                    due = min(due, self.next_frame - self.period / 2)
+            now = time.perf_counter()
+        self.next_frame += self.period
+        return events
@@ -0,0 +1,176 @@
+"""Observations of a running Simulation for agents
+
+Two kinds are offered. Feature observations are short float32 vectors written
+straight from the simulation state into caller-owned NumPy buffers, so stepping
+many games allocates nothing per frame. Pixel observations render the game
+headless into an offscreen Surface and hand out NumPy views of its pixels,
+optionally strided for downsampling, so colour frames are never copied or
+converted after rendering. Grayscale frames weigh the sampled pixels of the
+colour frame into luminance in a preallocated buffer; an 8-bit surface with a
+gray palette would be free, but SDL drops per-pixel alpha and reduces colours
+to RGB332 when blitting onto one, and maps each colour to the gray of its
+channel mean, so pure red, green and blue would all come out alike.
+
+Run ``python -m flappy_bird.observation`` to measure the throughput of both.
+"""
+
+import argparse
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, BASE_PIPE_SPEED, MAX_LIVES, FPS
+from flappy_bird.entities import PIPE_WIDTH
+from flappy_bird.graphics import draw_world
+from flappy_bird.pipe import HalfPipe
+from flappy_bird.simulation import Simulation
+
+FEATURES: Tuple[str, ...] = (
+    "bird_y", "bird_velocity",
+    "gap1_top", "gap1_bottom", "gap1_distance",
+    "gap2_top", "gap2_bottom", "gap2_distance",
+    "pipe_speed", "lives",
+)
+N_FEATURES: int = len(FEATURES)
+VELOCITY_SCALE: float = 10.0  # Velocities are divided by this to stay near [-1, 1]
+GROUND_Y: int = SCREEN_HEIGHT - GROUND_HEIGHT
+LUMA: Tuple[int, int, int] = (77, 150, 29)  # Luminance weights of red, green and blue (0.299, 0.587, 0.114) in 256ths
+
+
+def write_features(sim: Simulation, out: np.ndarray) -> np.ndarray:
+    """Write the features of sim into out (N_FEATURES values) and return it
+
+    Heights are fractions of the screen height and distances fractions of its
+    width. The two gaps are the openings of the nearest obstacles the bird has
+    not passed yet, half pipes included; missing gaps span the whole sky at the
+    far edge of the screen.
+    """
+    bird = sim.bird
+    bird_left = bird.x - bird.radius
+    # Nearest two obstacles whose right edge is still ahead of the bird
+    first_x = second_x = float(SCREEN_WIDTH)
+    first = second = (0.0, float(GROUND_Y))
+    for pipe in sim.pipes:
+        if pipe.x + PIPE_WIDTH > bird_left:
+            gap = (float(pipe.top_pipe.height), float(pipe.bottom_pipe.y))
+            if pipe.x < first_x:
+                second_x, second, first_x, first = first_x, first, pipe.x, gap
+            elif pipe.x < second_x:
+                second_x, second = pipe.x, gap
+    for half_pipe in sim.half_pipes:
+        if half_pipe.x + PIPE_WIDTH > bird_left:
+            rect = half_pipe.pipe_rect
+            gap = (float(rect.height), float(GROUND_Y)) if half_pipe.position == HalfPipe.TOP else (0.0, float(rect.y))
+            if half_pipe.x < first_x:
+                second_x, second, first_x, first = first_x, first, half_pipe.x, gap
+            elif half_pipe.x < second_x:
+                second_x, second = half_pipe.x, gap
+
+    out[0] = bird.y / SCREEN_HEIGHT
+    out[1] = bird.velocity / VELOCITY_SCALE
+    out[2] = first[0] / SCREEN_HEIGHT
+    out[3] = first[1] / SCREEN_HEIGHT
+    out[4] = (first_x - bird.x) / SCREEN_WIDTH
+    out[5] = second[0] / SCREEN_HEIGHT
+    out[6] = second[1] / SCREEN_HEIGHT
+    out[7] = (second_x - bird.x) / SCREEN_WIDTH
+    out[8] = sim.config.pipe_speed(sim.score) / BASE_PIPE_SPEED
+    out[9] = sim.lives / MAX_LIVES
+    return out
+
+
+class FeatureObserver:
+    """Preallocated (games, N_FEATURES) float32 buffer filled from a batch of simulations"""
+
+    def __init__(self, n_games: int = 1) -> None:
+        self.buffer: np.ndarray = np.zeros((n_games, N_FEATURES), dtype=np.float32)
+
+    def observe(self, sims: Sequence[Simulation]) -> np.ndarray:
+        """Refresh the buffer in place and return it (one row per simulation)"""
+        buffer = self.buffer
+        for row, sim in enumerate(sims):
+            write_features(sim, buffer[row])
+        return buffer
+
+
+class PixelObserver:
+    """Headless renderer whose frames are NumPy views of an offscreen Surface
+
+    The pixel memory is a NumPy array that the surface is built around, so one
+    view is made up front and every observe() simply draws into it. Views from
+    pygame.surfarray would lock the surface, and a locked surface cannot be
+    blitted to. Grayscale frames are one preallocated buffer that observe()
+    refills from the view. Frames are indexed [y, x] and change on every
+    observe(); copy one to keep it.
+    """
+
+    def __init__(self, stride: int = 1, grayscale: bool = False) -> None:
+        self.stride: int = stride
+        self.grayscale: bool = grayscale
+        self.pixels: np.ndarray = np.zeros((SCREEN_HEIGHT, SCREEN_WIDTH, 4), dtype=np.uint8)
+        self.surface: pygame.Surface = pygame.image.frombuffer(self.pixels.data, (SCREEN_WIDTH, SCREEN_HEIGHT), "RGBX")
+        self.rgb: np.ndarray = self.pixels[::stride, ::stride, :3]  # The colour frame
+        self.frame: np.ndarray = self.rgb
+        if grayscale:
+            self.frame = np.zeros(self.rgb.shape[:2], dtype=np.uint8)
+            self._weighted: np.ndarray = np.zeros(self.frame.shape, dtype=np.uint16)
+            self._channel: np.ndarray = np.zeros(self.frame.shape, dtype=np.uint16)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Shape of the frames returned by observe(), (height, width[, 3])"""
+        return self.frame.shape
+
+    def observe(self, sim: Simulation) -> np.ndarray:
+        """Render sim and return the (strided) view of its pixels, or their luminance"""
+        draw_world(self.surface, sim, sim.now)
+        if self.grayscale:
+            # Integer weights that sum to 256, so the weighted sum fits in 16 bits and a shift divides it
+            weighted, channel = self._weighted, self._channel
+            np.multiply(self.rgb[..., 0], LUMA[0], out=weighted, dtype=np.uint16)
+            for index in (1, 2):
+                np.multiply(self.rgb[..., index], LUMA[index], out=channel, dtype=np.uint16)
+                weighted += channel
+            weighted += 128  # Round to the nearest level
+            np.right_shift(weighted, 8, out=weighted)
+            np.copyto(self.frame, weighted, casting="unsafe")
+        return self.frame
+
+
+def _benchmark(observe: Callable[[List[Simulation]], np.ndarray], sims: List[Simulation], ticks: int) -> float:
+    """Observations per second while stepping sims with a simple flap rule"""
+    elapsed = 0.0
+    count = 0
+    for _ in range(ticks):
+        for sim in sims:
+            sim.step(sim.bird.y > SCREEN_HEIGHT // 2)
+        started = time.perf_counter()
+        observe(sims)
+        elapsed += time.perf_counter() - started
+        count += len(sims)
+    return count / elapsed
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure observation throughput on headless games")
+    parser.add_argument("--games", type=int, default=64, help="simulations observed per batch of features")
+    parser.add_argument("--ticks", type=int, default=10 * FPS, help="frames to observe")
+    parser.add_argument("--stride", type=int, default=4, help="pixel downsampling stride")
+    args = parser.parse_args(argv)
+
+    features = FeatureObserver(args.games)
+    rate = _benchmark(features.observe, [Simulation(seed) for seed in range(args.games)], args.ticks)
+    print(f"features: {rate:,.0f} observations/s ({N_FEATURES} floats each)")
+
+    for stride in sorted({1, args.stride}):
+        for grayscale in (False, True):
+            pixels = PixelObserver(stride=stride, grayscale=grayscale)
+            rate = _benchmark(lambda sims: pixels.observe(sims[0]), [Simulation(0)], args.ticks)
+            kind = "grayscale" if grayscale else "rgb"
+            print(f"pixels ({kind}, stride {stride}, {pixels.shape}): {rate:,.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
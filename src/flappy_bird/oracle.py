@@ -0,0 +1,370 @@
+"""Reachability oracle for Flappy Bird courses
+
+Answers whether a course can be flown without a single collision, and if not,
+which obstacle is the first one no flap sequence gets past.
+
+Positions are kept on the game's quarter-pixel lattice (GRAVITY is 0.25 and
+every flap leaves the bird at the same velocity), so velocity is discretized
+exactly by the number of ticks since the last flap. The reachable set is a
+ring of rows, one per flap tick, each holding the interval of bird heights
+still alive; a tick of dynamic programming is a handful of array operations
+over all rows and all courses of a batch at once. The set of heights a new
+flap starts from is taken as the hull of the reachable heights, which is a
+slight over-approximation when that set has holes.
+
+A solve can also start from the reachable set another solve carried to a
+later tick, so a course that grows is only checked over its new pipes.
+
+Run ``python -m flappy_bird.oracle --pipes 10000`` to check a course.
+"""
+
+import argparse
+import time
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from flappy_bird.constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, PIPE_GAP, GRAVITY, FLAP_STRENGTH, BASE_PIPE_SPEED,
+    DIFFICULTY_INCREMENT
+)
+from flappy_bird.course import Course, generate_course, HALF_PIPE_TOP, NO_HALF_PIPE
+
+SCALE: int = int(round(1 / GRAVITY))  # Lattice steps per pixel
+BIRD_X: int = 100
+BIRD_RADIUS: int = 15
+PIPE_WIDTH: int = 60
+MOVE_SPEED: float = 0.03  # Phase step of moving pipes (Pipe.move_speed)
+MOVE_AMPLITUDE: int = 40  # Pipe.move_amplitude
+LIFETIME: int = 96  # Ticks a row is kept; longer than any fall from ceiling to ground
+_DEAD: int = 1 << 28
+PROBE_TICKS: int = LIFETIME * 2  # Ticks a restarted chunk runs before it is compared with the first round
+
+
+class Timeline(NamedTuple):
+    """Per-tick allowed band for bird.y on the lattice, shared shape for a batch of courses"""
+    low: np.ndarray  # (ticks, courses) smallest allowed SCALE * bird.y
+    high: np.ndarray  # (ticks, courses) largest allowed SCALE * bird.y
+    obstacle: np.ndarray  # (ticks, courses) obstacle overlapping the bird: pipe i is i, half pipe i is ~i
+    pass_tick: np.ndarray  # Tick on which each pipe is scored
+    start: int = 0  # Tick of the first row
+
+
+class OracleResult(NamedTuple):
+    """Outcome of solving one course"""
+    feasible: bool
+    max_score: int  # Pipes that can be passed without a collision
+    death_tick: int  # First tick no trajectory survives (-1 if feasible)
+    obstacle: Optional[int]  # Pipe index of the first impossible obstacle
+    half_pipe: bool  # Whether that obstacle is the half pipe following the pipe
+    reachable: Optional["Reachable"] = None  # Set carried to the tick asked for
+
+
+class Reachable(NamedTuple):
+    """Reachable set of a batch of courses on a tick, to carry the DP on from there"""
+    tick: int  # A multiple of LIFETIME, so the ring rows line up
+    state: np.ndarray  # (2, LIFETIME, courses) as in _sweep
+    hull: np.ndarray  # (2, courses)
+
+
+def pipe_speeds(pass_tick: np.ndarray, ticks: int, start: int = 0) -> np.ndarray:
+    """Scroll speed on every tick from start, from the number of pipes already scored"""
+    score = np.searchsorted(pass_tick, np.arange(start, ticks), side="left")
+    return BASE_PIPE_SPEED + (score // 5) * DIFFICULTY_INCREMENT
+
+
+def _pass_ticks(spawn_tick: np.ndarray) -> np.ndarray:
+    # Each pipe is scored before the next one spawns, so pipe i flies at the speed of score i
+    speed = BASE_PIPE_SPEED + (np.arange(len(spawn_tick)) // 5) * DIFFICULTY_INCREMENT
+    flight = np.floor((SCREEN_WIDTH - BIRD_X) / speed).astype(np.int64) + 1
+    return spawn_tick + flight - 1
+
+
+def _scroll(start_tick: np.ndarray, speeds: np.ndarray, span: int,
+            origin: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """x positions of obstacles for their first span ticks, with the game's float rounding; speeds starts at origin"""
+    ticks = start_tick[:, None] + np.arange(span)[None, :]
+    steps = np.concatenate((np.full((len(start_tick), 1), float(SCREEN_WIDTH)),
+                            speeds[np.minimum(ticks - origin, len(speeds) - 1)]), axis=1)
+    return ticks, np.subtract.accumulate(steps, axis=1)[:, 1:]
+
+
+def _overlap(x: np.ndarray) -> np.ndarray:
+    left = np.trunc(x)
+    bird_left = BIRD_X - BIRD_RADIUS
+    return (left < bird_left + BIRD_RADIUS * 2) & (left + PIPE_WIDTH > bird_left)
+
+
+def build_timeline(courses: Sequence[Course], start: int = 0) -> Timeline:
+    """Turn courses of equal length into per-tick bands for the bird's centre, from tick start on"""
+    spawn_tick = courses[0].spawn_tick
+    for course in courses:
+        if not np.array_equal(course.spawn_tick, spawn_tick):
+            raise ValueError("courses in a batch must share their spawn ticks")
+    pass_tick = _pass_ticks(spawn_tick)
+    span = int(np.ceil((SCREEN_WIDTH + PIPE_WIDTH) / BASE_PIPE_SPEED)) + 2
+    last = int(max(spawn_tick[-1], max(int(c.half_pipe_tick.max()) for c in courses))) + span
+    # Pipes before first, and the half pipes after them, are off the screen by start
+    first = max(0, int(np.searchsorted(spawn_tick, start - span, side="right")) - 1)
+    origin = int(spawn_tick[first])
+    speeds = pipe_speeds(pass_tick, last, origin)
+    n_ticks = last + 1 - start
+
+    floor = SCREEN_HEIGHT - GROUND_HEIGHT - BIRD_RADIUS
+    low = np.full((n_ticks, len(courses)), SCALE * BIRD_RADIUS + 1, dtype=np.int64)
+    high = np.full((n_ticks, len(courses)), SCALE * floor - 1, dtype=np.int64)
+    obstacle = np.full((n_ticks, len(courses)), np.iinfo(np.int64).min, dtype=np.int64)
+
+    ticks, x = _scroll(spawn_tick[first:], speeds, span, origin)
+    inside = _overlap(x) & (ticks >= start)
+    pipe_index = np.broadcast_to(np.arange(first, len(spawn_tick))[:, None], ticks.shape)
+    for column, course in enumerate(courses):
+        # Moving pipes advance their phase by repeated addition, like Pipe.update
+        phase = np.add.accumulate(np.concatenate(
+            (course.phase[first:, None], np.full((len(spawn_tick) - first, span), MOVE_SPEED)), axis=1), axis=1)[:, 1:]
+        offset = np.where(course.moving[first:, None], np.sin(phase) * MOVE_AMPLITUDE, 0.0)
+        top = np.trunc(course.gap_top[first:, None] + offset)
+        bottom = np.trunc(course.gap_top[first:, None] + PIPE_GAP + offset)
+        _restrict(low[:, column], high[:, column], obstacle[:, column], ticks[inside] - start,
+                  SCALE * (top[inside] + BIRD_RADIUS), SCALE * (bottom[inside] - BIRD_RADIUS + 1) - 1,
+                  pipe_index[inside])
+
+        has_half = course.half_pipe[first:] != NO_HALF_PIPE
+        if has_half.any():
+            half_ticks, half_x = _scroll(course.half_pipe_tick[first:][has_half], speeds, span, origin)
+            half_inside = _overlap(half_x) & (half_ticks >= start)
+            height = np.broadcast_to(course.half_pipe_height[first:][has_half][:, None], half_ticks.shape)
+            is_top = np.broadcast_to((course.half_pipe[first:][has_half] == HALF_PIPE_TOP)[:, None], half_ticks.shape)
+            ground = SCREEN_HEIGHT - GROUND_HEIGHT
+            half_low = np.where(is_top, SCALE * (height + BIRD_RADIUS), 0)
+            half_high = np.where(is_top, SCALE * floor, SCALE * (ground - height - BIRD_RADIUS + 1) - 1)
+            half_index = np.broadcast_to(~(first + np.flatnonzero(has_half))[:, None], half_ticks.shape)
+            _restrict(low[:, column], high[:, column], obstacle[:, column], half_ticks[half_inside] - start,
+                      half_low[half_inside], half_high[half_inside], half_index[half_inside])
+    return Timeline(low=low, high=high, obstacle=obstacle, pass_tick=pass_tick, start=start)
+
+
+def _restrict(low: np.ndarray, high: np.ndarray, obstacle: np.ndarray, ticks: np.ndarray,
+              lows: np.ndarray, highs: np.ndarray, index: np.ndarray) -> None:
+    np.maximum.at(low, ticks, lows.astype(np.int64))
+    np.minimum.at(high, ticks, highs.astype(np.int64))
+    obstacle[ticks] = index
+
+
+def _sweep(state: np.ndarray, hull: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Run the DP over bounds in place and return the local tick each column dies on (-1 if never)
+
+    state is (2, LIFETIME, columns): row r holds trajectories whose last flap was
+    on a tick congruent to r, state[0] the lowest lattice y and state[1] minus the
+    highest. hull (2, columns) is the span of the reachable heights on the previous
+    tick, stored the same way.
+    """
+    n_ticks, _, _, columns = bounds.shape
+    flap_velocity = int(SCALE * (FLAP_STRENGTH + GRAVITY))  # Lattice steps per tick right after a flap
+    # Aging a row adds the velocity for its age; the tables are rotated so a tick is one add
+    ages = (np.arange(LIFETIME)[:, None] - np.arange(LIFETIME)[None, :]) % LIFETIME
+    velocity = (flap_velocity + ages).astype(state.dtype)
+    aging = np.stack((velocity, -velocity), axis=1)[:, :, :, None]  # (tick % L, lo/-hi, row, 1)
+
+    death = np.full(columns, -1, dtype=np.int64)
+    extent = hull
+    alive = extent[0] < _DEAD
+    width = np.empty((LIFETIME, columns), dtype=state.dtype)
+    live_rows = (state[0] + state[1] <= 0)[None]
+    for tick in range(n_ticks):
+        row = (tick + 1) % LIFETIME
+        # A flap this tick starts from anywhere in last tick's reachable hull
+        state[:, row, :] = extent
+        state += aging[row]
+        np.maximum(state, bounds[tick], out=state)
+        # Aging and clipping never revive an empty row, so empty rows are only masked out
+        np.add(state[0], state[1], out=width)
+        np.less_equal(width, 0, out=live_rows[0])
+        extent = state.min(axis=1, initial=_DEAD, where=live_rows)
+        if extent[0].max() >= _DEAD:
+            newly_dead = alive & (extent[0] >= _DEAD)
+            death[newly_dead] = tick
+            alive &= ~newly_dead
+            if not alive.any():
+                break
+    # Empty rows hold leftover bounds; make them all alike so equal sets compare equal
+    state[:, ~live_rows[0]] = _DEAD
+    hull[...] = state.min(axis=1)
+    return death
+
+
+def _propagate(timeline: Timeline, chunk_ticks: Optional[int] = None, entry: Optional[Reachable] = None,
+               carry: Optional[int] = None) -> Tuple[np.ndarray, Optional[Reachable]]:
+    """Run the reachability DP from entry (the bird at rest in mid air if None) on the timeline's first tick;
+    return the first tick each course becomes impossible, relative to that tick, and the reachable set on the
+    last multiple of LIFETIME up to tick carry if asked for
+
+    The course is cut into chunks that are swept side by side as extra columns.
+    The first round starts every chunk but the first from every height the
+    screen allows, a superset of where the bird can really be. Each further
+    round restarts the chunks whose entry changed from the exit of the chunk
+    before them. A pipe gap squeezes both starts into the same set within a few
+    ticks, so a restarted chunk only runs until its state matches the probe
+    taken at PROBE_TICKS in the first round; once no entry changes, every chunk
+    started from the exact set and the result is exact.
+    """
+    n_ticks, n_courses = timeline.low.shape
+    if chunk_ticks is None:
+        # Fewer, longer chunks pay less per-tick overhead but leave fewer columns to vectorize over
+        chunk_ticks = LIFETIME * min(64, max(4, int(np.sqrt(n_ticks)) // 40))
+    # Chunks start on the same ring row and run past their probe
+    chunk_ticks = max(PROBE_TICKS + LIFETIME, chunk_ticks - chunk_ticks % LIFETIME)
+    n_chunks = max(1, -(-(n_ticks - 1) // chunk_ticks))
+    columns = n_chunks * n_courses
+    floor = SCREEN_HEIGHT - GROUND_HEIGHT - BIRD_RADIUS
+    open_low = SCALE * BIRD_RADIUS + 1
+    open_high = SCALE * floor - 1
+
+    # Bounds of tick 1 onwards, column c = chunk * n_courses + course
+    low = np.full((n_chunks * chunk_ticks, n_courses), open_low, dtype=np.int32)
+    high = np.full((n_chunks * chunk_ticks, n_courses), open_high, dtype=np.int32)
+    low[:n_ticks - 1] = timeline.low[1:]
+    high[:n_ticks - 1] = timeline.high[1:]
+    bounds = np.stack((low, -high), axis=1).reshape(n_chunks, chunk_ticks, 2, n_courses)
+    bounds = np.ascontiguousarray(bounds.transpose(1, 2, 0, 3)).reshape(chunk_ticks, 2, 1, columns)
+
+    entry_state = np.empty((2, LIFETIME, columns), dtype=np.int32)
+    entry_state[0] = open_low
+    entry_state[1] = -open_high
+    entry_hull = entry_state[:, 0].copy()
+    # The bird starts at rest in mid air, as if it had flapped flap_velocity ticks before tick 0
+    flap_velocity = int(SCALE * (FLAP_STRENGTH + GRAVITY))
+    middle = SCALE * (SCREEN_HEIGHT // 2)
+    if entry is None:
+        entry_state[:, :, :n_courses] = _DEAD
+        entry_state[0, flap_velocity % LIFETIME, :n_courses] = middle
+        entry_state[1, flap_velocity % LIFETIME, :n_courses] = -middle
+        entry_hull[0, :n_courses] = middle
+        entry_hull[1, :n_courses] = -middle
+    elif entry.tick != timeline.start or entry.tick % LIFETIME:
+        raise ValueError(f"cannot resume on tick {entry.tick}")
+    else:
+        entry_state[:, :, :n_courses] = entry.state
+        entry_hull[:, :n_courses] = entry.hull
+
+    # First round: every chunk runs to the end, with a probe of its state kept along the way
+    state = entry_state.copy()
+    hull = entry_hull.copy()
+    death = _sweep(state, hull, bounds[:PROBE_TICKS])
+    probe_state = state.copy()
+    probe_hull = hull.copy()
+    rest = _sweep(state, hull, bounds[PROBE_TICKS:])
+    death = np.where(death >= 0, death, np.where(rest >= 0, rest + PROBE_TICKS, -1))
+    exit_state, exit_hull = state, hull
+
+    while True:
+        # Chunk j + 1 starts where chunk j ended
+        changed = np.zeros(columns, dtype=bool)
+        changed[n_courses:] = ((exit_state[:, :, :-n_courses] != entry_state[:, :, n_courses:]).any(axis=(0, 1))
+                               | (exit_hull[:, :-n_courses] != entry_hull[:, n_courses:]).any(axis=0))
+        todo = np.flatnonzero(changed)
+        if not len(todo):
+            break
+        entry_state[:, :, todo] = exit_state[:, :, todo - n_courses]
+        entry_hull[:, todo] = exit_hull[:, todo - n_courses]
+
+        state = entry_state[:, :, todo]
+        hull = entry_hull[:, todo]
+        early = _sweep(state, hull, bounds[:PROBE_TICKS, :, :, todo])
+        # A column that falls back onto its probe carries on exactly as before
+        diverged = (state != probe_state[:, :, todo]).any(axis=(0, 1)) | (hull != probe_hull[:, todo]).any(axis=0)
+        death[todo] = np.where(early >= 0, early, np.where(death[todo] >= PROBE_TICKS, death[todo], -1))
+        if diverged.any():
+            again = todo[diverged]
+            state = state[:, :, diverged]
+            hull = hull[:, diverged]
+            probe_state[:, :, again] = state
+            probe_hull[:, again] = hull
+            rest = _sweep(state, hull, bounds[PROBE_TICKS:, :, :, again])
+            death[again] = np.where(early[diverged] >= 0, early[diverged],
+                                    np.where(rest >= 0, rest + PROBE_TICKS, -1))
+            exit_state[:, :, again] = state
+            exit_hull[:, again] = hull
+
+    reachable = None
+    if carry is not None:
+        # Every chunk now starts from its exact set, so run the one holding the tick up to it
+        chunk, offset = divmod(carry // LIFETIME * LIFETIME - timeline.start, chunk_ticks)
+        if not 0 <= chunk < n_chunks:
+            raise ValueError(f"cannot carry the reachable set to tick {carry}")
+        todo = np.arange(chunk * n_courses, (chunk + 1) * n_courses)
+        state = entry_state[:, :, todo]
+        hull = entry_hull[:, todo]
+        _sweep(state, hull, bounds[:offset, :, :, todo])
+        reachable = Reachable(timeline.start + chunk * chunk_ticks + offset, state, hull)
+
+    death = death.reshape(n_chunks, n_courses)
+    first = np.full(n_courses, -1, dtype=np.int64)
+    for chunk in range(n_chunks - 1, -1, -1):
+        dead = death[chunk] >= 0
+        first[dead] = 1 + chunk * chunk_ticks + death[chunk][dead]
+    first[first >= n_ticks] = -1
+    first[entry_hull[0, :n_courses] >= _DEAD] = 0  # Nowhere left to start from
+    return first, reachable
+
+
+def solve_batch(courses: Sequence[Course], entry: Optional[Reachable] = None,
+                carry: Optional[int] = None) -> List[OracleResult]:
+    """Solve several courses that share a spawn schedule in one pass
+
+    With entry, the courses are only checked from its tick on, starting from its
+    reachable set. With carry, every result holds its course's reachable set on
+    the last multiple of LIFETIME up to that tick, to solve a longer course from.
+    """
+    timeline = build_timeline(courses, 0 if entry is None else entry.tick)
+    death, reachable = _propagate(timeline, entry=entry, carry=carry)
+    results = []
+    for column, local_tick in enumerate(death.tolist()):
+        carried = None
+        if reachable is not None:
+            carried = reachable._replace(state=reachable.state[:, :, column:column + 1],
+                                         hull=reachable.hull[:, column:column + 1])
+        if local_tick < 0:
+            results.append(OracleResult(True, len(timeline.pass_tick), -1, None, False, carried))
+            continue
+        death_tick = timeline.start + local_tick
+        # Blame the obstacle at the fatal tick, or the last one before it
+        blamed = timeline.obstacle[:local_tick + 1, column]
+        known = blamed[blamed != np.iinfo(np.int64).min]
+        index = int(known[-1]) if len(known) else None
+        half = index is not None and index < 0
+        if half and index is not None:
+            index = ~index
+        score = int(np.searchsorted(timeline.pass_tick, death_tick, side="left"))
+        results.append(OracleResult(False, score, int(death_tick), index, half, carried))
+    return results
+
+
+def solve(course: Course, entry: Optional[Reachable] = None, carry: Optional[int] = None) -> OracleResult:
+    """Check whether a course can be flown without a collision (from entry on, see solve_batch)"""
+    return solve_batch([course], entry, carry)[0]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Check whether Flappy Bird courses can be survived")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first course")
+    parser.add_argument("--courses", type=int, default=1, help="number of consecutive seeds to solve")
+    parser.add_argument("--pipes", type=int, default=10000, help="pipes per course")
+    args = parser.parse_args(argv)
+
+    courses = [generate_course(args.seed + i, args.pipes) for i in range(args.courses)]
+    started = time.perf_counter()
+    results = solve_batch(courses)
+    elapsed = time.perf_counter() - started
+    for i, result in enumerate(results):
+        if result.feasible:
+            print(f"seed {args.seed + i}: all {result.max_score} pipes can be passed")
+        else:
+            kind = "half pipe after pipe" if result.half_pipe else "pipe"
+            print(f"seed {args.seed + i}: {kind} {result.obstacle} is impossible "
+                  f"(tick {result.death_tick}, max score {result.max_score})")
+    print(f"solved {len(courses)} x {args.pipes} pipes in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
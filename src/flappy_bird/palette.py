@@ -0,0 +1,76 @@
+"""Compiled biome palettes for drawing
+
+BIOMES in constants.py describes each biome as a dict of Color tuples, which is
+handy to edit but slow to draw from: every fill looks a colour up by name and
+pygame converts the tuple to a pixel value again. A BiomeTable does that work
+once per pixel format. Biomes are plain integers, their sky, ground and grass
+colours are stored as mapped pixel values, and the cross-fade from one biome
+into the next is precomputed as FADE_TICKS palettes, so drawing a frame is an
+index into a list and a few Surface.fill calls.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import pygame
+
+from flappy_bird.constants import BIOMES, BIOME_INTERVAL, Color
+
+N_BIOMES: int = len(BIOMES)
+FADE_TICKS: int = 30  # Frames a biome change takes to fade in
+
+
+def biome_index(score: int) -> int:
+    """Index into BIOMES of the biome shown at a score"""
+    return (score // BIOME_INTERVAL) % N_BIOMES
+
+
+class BiomePalette(NamedTuple):
+    """Fill colours of one biome (or one step of a fade) as pixel values of a surface format"""
+    sky: int
+    ground: int
+    grass: int
+
+
+def _blend(start: Color, end: Color, weight: float) -> Tuple[int, int, int]:
+    return (round(start[0] + (end[0] - start[0]) * weight),
+            round(start[1] + (end[1] - start[1]) * weight),
+            round(start[2] + (end[2] - start[2]) * weight))
+
+
+class BiomeTable:
+    """Palettes of every biome and every fade step, mapped for one pixel format
+
+    fades[b][t] is the palette t ticks after the game entered biome b from the
+    biome before it; from FADE_TICKS - 1 on it equals palettes[b].
+    """
+
+    def __init__(self, surface: pygame.Surface) -> None:
+        def palette(weight: float, start: Dict[str, Color], end: Dict[str, Color]) -> BiomePalette:
+            return BiomePalette(*(surface.map_rgb(_blend(start[name], end[name], weight))
+                                  for name in ("sky_color", "ground_color", "grass_color")))
+
+        self.palettes: List[BiomePalette] = [palette(1.0, biome, biome) for biome in BIOMES]
+        self.fades: List[List[BiomePalette]] = [
+            [palette((tick + 1) / FADE_TICKS, BIOMES[biome - 1], BIOMES[biome]) for tick in range(FADE_TICKS)]
+            for biome in range(N_BIOMES)
+        ]
+
+    def palette(self, biome: int, ticks_in_biome: Optional[int] = None) -> BiomePalette:
+        """Palette of a biome, part way through its fade when it was entered under FADE_TICKS ago"""
+        if ticks_in_biome is not None and 0 <= ticks_in_biome < FADE_TICKS:
+            return self.fades[biome][ticks_in_biome]
+        return self.palettes[biome]
+
+
+_tables: Dict[Tuple[object, ...], BiomeTable] = {}
+
+
+def biome_table(surface: pygame.Surface) -> BiomeTable:
+    """The table for a surface's pixel format, compiled on first use"""
+    key: Tuple[object, ...] = (surface.get_bitsize(), surface.get_masks())
+    if surface.get_bitsize() == 8:
+        key += tuple(map(tuple, surface.get_palette()))  # Paletted surfaces map to their nearest entries
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = BiomeTable(surface)
+    return table
@@ -0,0 +1,212 @@
+"""Pooled particle effects: feathers on hits, sparkles on scores, heart dust on pickups
+
+Particles live in a fixed-capacity ParticleSystem whose attributes are NumPy
+columns, one entry per slot, like the EntityStore of the obstacles. A frame
+moves every particle with a handful of whole-column operations, however many
+are alive, and a slot is free again once its life runs out; the pool never
+grows. Particles are purely visual: they have their own random generator
+and never touch the Simulation, so games play the same with or without them.
+
+Each colour is a tiny sprite rendered once per fade level, and all live
+particles are drawn with one Surface.blits call. The budget caps the number
+of live particles: once half of it is in use, a burst is thinned in
+proportion to the headroom left, so under heavy load effects get sparser
+instead of stalling the frame, and at the budget new bursts are skipped until
+old particles fade.
+
+Run ``python -m flappy_bird.particles`` to measure the cost of a full budget
+per frame.
+"""
+
+import argparse
+import math
+import time
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+from flappy_bird.constants import Color
+
+CAPACITY: int = 512  # Slots in a pool
+BUDGET: int = 384  # Live particles at most, by default
+FADE_LEVELS: int = 4  # Sprites per colour, from faint to opaque
+FADE_TICKS: int = 5  # Ticks per fade level at the end of a particle's life
+
+# Colours and sprite sizes of the particles; the column colour holds an index into this
+PARTICLE_COLORS: Tuple[Tuple[Color, Tuple[int, int]], ...] = (
+    (Color(255, 255, 0), (4, 2)),  # Yellow feather
+    (Color(255, 255, 255), (3, 2)),  # White down
+    (Color(255, 165, 0), (3, 3)),  # Orange feather
+    (Color(255, 255, 160), (2, 2)),  # Pale sparkle
+    (Color(255, 215, 0), (3, 3)),  # Gold sparkle
+    (Color(255, 0, 0), (3, 3)),  # Red heart dust
+    (Color(255, 120, 150), (2, 2)),  # Pink heart dust
+)
+
+
+class Effect(NamedTuple):
+    """How a burst of particles looks and moves"""
+    burst: int  # Particles per burst with the whole budget free
+    colors: Tuple[int, ...]  # Indices into PARTICLE_COLORS, picked at random
+    speed: Tuple[float, float]  # Pixels per tick
+    angle: Tuple[float, float]  # Direction range in degrees, 0 to the right and 90 down
+    gravity: float  # Added to the vertical velocity every tick
+    drift: float  # Added to the horizontal velocity, e.g. to scroll with the pipes
+    life: Tuple[int, int]  # Ticks
+
+
+FEATHERS = Effect(24, (0, 0, 1, 2), (1.0, 4.0), (0.0, 360.0), 0.12, -1.5, (30, 60))
+SPARKLES = Effect(14, (3, 4), (1.5, 3.5), (180.0, 360.0), 0.05, -1.0, (15, 30))
+HEART_DUST = Effect(18, (5, 5, 6), (0.3, 1.5), (200.0, 340.0), -0.04, -0.5, (20, 40))
+
+# Column names and types; every column has one entry per slot
+COLUMNS: Tuple[Tuple[str, type], ...] = (
+    ("x", np.float32),
+    ("y", np.float32),
+    ("vx", np.float32),
+    ("vy", np.float32),
+    ("gravity", np.float32),
+    ("life", np.int16),  # Ticks left; the slot is free at 0 or below
+    ("color", np.int16),
+)
+
+_sprite_cache: List[pygame.Surface] = []
+
+
+def get_particle_sprites() -> List[pygame.Surface]:
+    """Sprites of every colour and fade level, at colour * FADE_LEVELS + level, rendered on first use"""
+    if not _sprite_cache:
+        display = pygame.display.get_surface() is not None
+        for color, size in PARTICLE_COLORS:
+            for level in range(FADE_LEVELS):
+                sprite = pygame.Surface(size)
+                sprite.fill(color)
+                if display:
+                    sprite = sprite.convert()  # Blits are fastest in the display's pixel format
+                sprite.set_alpha(255 * (level + 1) // FADE_LEVELS)
+                _sprite_cache.append(sprite)
+    return _sprite_cache
+
+
+def clear_particle_sprites() -> None:
+    """Forget the cached sprites, e.g. after the display mode (and so its pixel format) changed"""
+    _sprite_cache.clear()
+
+
+class ParticleFrame(NamedTuple):
+    """Sprite index and position of every live particle at one moment; arrays that are never changed"""
+    sprite: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+
+
+def draw_particles(surface: pygame.Surface, frame: ParticleFrame) -> None:
+    """Draw the particles of a frame with a single Surface.blits call"""
+    if len(frame.sprite):
+        sprites = get_particle_sprites()
+        surface.blits(list(zip(map(sprites.__getitem__, frame.sprite.tolist()),
+                               zip(frame.x.tolist(), frame.y.tolist()))), doreturn=False)
+
+
+class ParticleSystem:
+    """Fixed-capacity pool of particles, updated and drawn as whole columns"""
+
+    x: np.ndarray
+    y: np.ndarray
+    vx: np.ndarray
+    vy: np.ndarray
+    gravity: np.ndarray
+    life: np.ndarray
+    color: np.ndarray
+
+    def __init__(self, capacity: int = CAPACITY, budget: int = BUDGET, seed: Optional[int] = None) -> None:
+        for name, dtype in COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self.budget: int = min(budget, capacity)
+        self.skipped: int = 0  # Particles not emitted for lack of budget
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.x)
+
+    @property
+    def live(self) -> int:
+        return int(np.count_nonzero(self.life > 0))
+
+    def emit(self, effect: Effect, x: float, y: float) -> int:
+        """Start a burst at (x, y), thinned to the budget left; return how many particles it got"""
+        headroom = self.budget - self.live
+        # Full bursts while at most half the budget is used, then fewer and fewer particles per burst
+        scale = min(1.0, 2 * headroom / self.budget)
+        count = min(headroom, math.ceil(effect.burst * scale)) if headroom > 0 else 0
+        self.skipped += effect.burst - count
+        if count <= 0:
+            return 0
+        slots = np.flatnonzero(self.life <= 0)[:count]
+        rng = self.rng
+        angle = np.radians(rng.uniform(*effect.angle, count))
+        speed = rng.uniform(*effect.speed, count)
+        self.x[slots] = x
+        self.y[slots] = y
+        self.vx[slots] = np.cos(angle) * speed + effect.drift
+        self.vy[slots] = np.sin(angle) * speed
+        self.gravity[slots] = effect.gravity
+        self.life[slots] = rng.integers(effect.life[0], effect.life[1], count, endpoint=True)
+        self.color[slots] = rng.choice(np.array(effect.colors, dtype=np.int16), count)
+        return count
+
+    def update(self) -> None:
+        """Advance every particle by one tick; free slots move too, which is cheaper than masking them"""
+        self.vy += self.gravity
+        self.x += self.vx
+        self.y += self.vy
+        np.subtract(self.life, 1, out=self.life, where=self.life > 0)
+
+    def clear(self) -> None:
+        self.life[:] = 0
+
+    def frame(self) -> ParticleFrame:
+        """Copy of what the live particles look like now, to draw now or on another thread"""
+        live = np.flatnonzero(self.life > 0)
+        life = self.life[live]
+        level = np.minimum((life - 1) // FADE_TICKS, FADE_LEVELS - 1)
+        return ParticleFrame(self.color[live] * FADE_LEVELS + level,
+                             self.x[live].astype(np.int32), self.y[live].astype(np.int32))
+
+    def draw(self, surface: pygame.Surface) -> None:
+        draw_particles(surface, self.frame())
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure updating and drawing a full particle budget")
+    parser.add_argument("--budget", type=int, default=BUDGET, help="live particles")
+    parser.add_argument("--frames", type=int, default=600, help="frames to measure")
+    args = parser.parse_args(argv)
+
+    from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+    pygame.display.init()
+    surface = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    particles = ParticleSystem(max(CAPACITY, args.budget), args.budget, seed=0)
+    effects = (FEATHERS, SPARKLES, HEART_DUST)
+    updating = drawing = 0.0
+    for frame in range(args.frames):
+        # Keep the pool at its budget, bursting all over the screen
+        while particles.emit(effects[frame % 3], frame * 37 % SCREEN_WIDTH, frame * 53 % SCREEN_HEIGHT):
+            pass
+        surface.fill((0, 0, 0))
+        started = time.perf_counter()
+        particles.update()
+        updated = time.perf_counter()
+        particles.draw(surface)
+        drawing += time.perf_counter() - updated
+        updating += updated - started
+    print(f"{args.budget} particles: update {updating / args.frames * 1000:.3f} ms, "
+          f"draw {drawing / args.frames * 1000:.3f} ms per frame")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
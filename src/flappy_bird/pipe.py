@@ -3,172 +3,226 @@
 import pygame
 import random
 import math
-from typing import Dict, Optional, TYPE_CHECKING
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, TYPE_CHECKING
 from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT, PIPE_GAP, GROUND_HEIGHT, BIOMES, Color
+from flappy_bird.entities import EntityStore, EntityView, KIND_HALF_PIPE_TOP, MOVE_SPEED, column
 
 if TYPE_CHECKING:
     from flappy_bird.bird import Bird
 
+# A Surface.blits item: sprite, destination and the area of the sprite to copy
+BlitItem = Tuple[pygame.Surface, Tuple[int, int], pygame.Rect]
 
-class Pipe:
-    def __init__(self, biome_colors: Optional[Dict[str, Color]] = None, moving: bool = False) -> None:
-        self.x: float = float(SCREEN_WIDTH)
-        self.height: int = random.randint(150, SCREEN_HEIGHT - GROUND_HEIGHT - PIPE_GAP - 50)
-        self.base_height: int = self.height  # Store original height for moving pipes
-        self.top_pipe: pygame.Rect = pygame.Rect(int(self.x), 0, 60, self.height)
-        self.bottom_pipe: pygame.Rect = pygame.Rect(int(self.x), self.height + PIPE_GAP, 60, SCREEN_HEIGHT)
-        self.passed: bool = False
-        self.biome_colors: Dict[str, Color] = biome_colors or BIOMES[0]  # Default to day biome
-        self.moving: bool = moving  # Whether this pipe moves up and down
-        self.move_offset: float = 0  # Current vertical offset for moving pipes
-        self.move_speed: float = 0.03  # Speed of vertical movement
-        self.move_amplitude: int = 40  # How far the pipe moves up/down
+ARROW_COLOR: Color = Color(255, 255, 0)  # Yellow arrows on moving pipes
+
+
+class PipeSprites(NamedTuple):
+    """Pre-rendered pieces of the pipes of one biome"""
+    body: pygame.Surface  # Pipe column, 60 wide and as tall as the screen
+    cap: pygame.Surface  # 70 x 20 rim at the open end of a pipe
+    up_arrow: pygame.Surface  # 11 x 9 marker of a moving pipe
+    down_arrow: pygame.Surface
+
+
+_sprite_cache: Dict[int, PipeSprites] = {}
+
+
+def _display_format(sprite: pygame.Surface) -> pygame.Surface:
+    # Blits are fastest in the display's pixel format, which only exists once a window is open
+    return sprite.convert() if pygame.display.get_surface() is not None else sprite
+
+
+def _arrow(points: List[Tuple[int, int]]) -> pygame.Surface:
+    arrow = pygame.Surface((11, 9))
+    arrow.fill((0, 0, 0))
+    pygame.draw.polygon(arrow, ARROW_COLOR, points)
+    arrow = _display_format(arrow)
+    arrow.set_colorkey((0, 0, 0))  # Only the arrow itself is copied
+    return arrow
+
+
+def get_pipe_sprites(biome: int) -> PipeSprites:
+    """Sprites for a biome's pipe colours, rendered on first use"""
+    sprites = _sprite_cache.get(biome)
+    if sprites is None:
+        colors = BIOMES[biome]
+        body = pygame.Surface((60, SCREEN_HEIGHT))
+        body.fill(colors["pipe_color"])
+        cap = pygame.Surface((70, 20))
+        cap.fill(colors["pipe_cap_color"])
+        sprites = PipeSprites(body=_display_format(body), cap=_display_format(cap),
+                              up_arrow=_arrow([(0, 8), (5, 0), (10, 8)]),
+                              down_arrow=_arrow([(0, 0), (5, 8), (10, 0)]))
+        _sprite_cache[biome] = sprites
+    return sprites
+
+
+def clear_pipe_sprites() -> None:
+    """Forget every cached sprite, e.g. after the display mode (and so its pixel format) changed"""
+    _sprite_cache.clear()
+
+
+def draw_pipes(surface: pygame.Surface, pipes: Sequence["Pipe"], half_pipes: Sequence["HalfPipe"]) -> None:
+    """Draw pipes and then half pipes with a single Surface.blits call"""
+    items: List[BlitItem] = []
+    for pipe in pipes:
+        items.extend(pipe.blit_items())
+    for half_pipe in half_pipes:
+        items.extend(half_pipe.blit_items())
+    surface.blits(items, doreturn=False)
+
+
+class Pipe(EntityView):
+    """View of a pipe pair in an EntityStore (a store of its own when none is given)"""
+
+    x = column("x")
+    height = column("base", int)
+    base_height = column("base", int)  # Original height, which moving pipes oscillate around
+    biome = column("biome", int)  # Index into BIOMES
+    moving = column("moving", bool)  # Whether this pipe moves up and down
+    move_offset = column("offset")  # Current vertical offset for moving pipes
+    move_phase = column("phase")
+    move_amplitude = column("amplitude")  # How far the pipe moves up/down
+    move_speed: float = MOVE_SPEED  # Speed of vertical movement
+
+    def __init__(self, biome: int = 0, moving: bool = False,
+                 height: Optional[int] = None, move_phase: Optional[float] = None,
+                 store: Optional[EntityStore] = None) -> None:
+        if height is None:
+            height = random.randint(150, SCREEN_HEIGHT - GROUND_HEIGHT - PIPE_GAP - 50)
         # Random starting phase for varied movement patterns
-        self.move_phase: float = random.uniform(0, math.pi * 2)
+        if move_phase is None:
+            move_phase = random.uniform(0, math.pi * 2)
+        self.store = store if store is not None else EntityStore(1)
+        self.slot = self.store.add_pipe(float(SCREEN_WIDTH), height, moving, move_phase, biome)
 
-    def update(self, pipe_speed: float) -> None:
-        self.x -= pipe_speed
-        self.top_pipe.x = int(self.x)
-        self.bottom_pipe.x = int(self.x)
+    @property
+    def passed(self) -> bool:
+        return bool(self.store.claimed[self.slot])
 
-        # Update vertical position for moving pipes
-        if self.moving:
-            self.move_phase += self.move_speed
-            self.move_offset = math.sin(self.move_phase) * self.move_amplitude
+    @passed.setter
+    def passed(self, passed: bool) -> None:
+        self.store.claimed[self.slot] = passed
+        self.store.scoring[self.slot] = not passed
+
+    @property
+    def top_pipe(self) -> pygame.Rect:
+        return pygame.Rect(int(self.x), 0, 60, int(self.store.upper_h[self.slot]))
 
-            # Update pipe positions with offset
-            self.top_pipe.height = int(self.base_height + self.move_offset)
-            self.bottom_pipe.y = int(self.base_height + PIPE_GAP + self.move_offset)
+    @property
+    def bottom_pipe(self) -> pygame.Rect:
+        return pygame.Rect(int(self.x), int(self.store.lower_y[self.slot]), 60, int(self.store.lower_h[self.slot]))
+
+    @property
+    def biome_colors(self) -> Dict[str, Color]:
+        return BIOMES[self.biome]
+
+    def update(self, pipe_speed: float) -> None:
+        """Scroll (and move) this pipe alone; a Simulation advances its whole store at once"""
+        self.store.advance(pipe_speed, index=slice(self.slot, self.slot + 1))
 
     def draw(self, surface: pygame.Surface) -> None:
-        # Draw top pipe
-        pygame.draw.rect(surface, self.biome_colors["pipe_color"], self.top_pipe)
-        # Draw bottom pipe
-        pygame.draw.rect(surface, self.biome_colors["pipe_color"], self.bottom_pipe)
-        # Draw pipe caps (positioned at the end of top pipe and start of bottom pipe)
-        pygame.draw.rect(surface, self.biome_colors["pipe_cap_color"],
-                        (self.x - 5, self.top_pipe.height - 20, 70, 20))
-        pygame.draw.rect(surface, self.biome_colors["pipe_cap_color"],
-                        (self.x - 5, self.bottom_pipe.y, 70, 20))
-
-        # Visual indicator for moving pipes (small arrows)
+        surface.blits(self.blit_items(), doreturn=False)
+
+    def blit_items(self) -> List[BlitItem]:
+        """Sprites making up this pipe, in drawing order"""
+        sprites = get_pipe_sprites(self.biome)
+        x = int(self.x)
+        cap_x = int(self.x - 5)
+        top, bottom = self.top_pipe, self.bottom_pipe
+        items: List[BlitItem] = [
+            # Top and bottom pipe
+            (sprites.body, (x, 0), pygame.Rect(0, 0, 60, top.height)),
+            (sprites.body, (x, bottom.y), pygame.Rect(0, 0, 60, bottom.height)),
+            # Pipe caps (positioned at the end of top pipe and start of bottom pipe)
+            (sprites.cap, (cap_x, top.height - 20), pygame.Rect(0, 0, 70, 20)),
+            (sprites.cap, (cap_x, bottom.y), pygame.Rect(0, 0, 70, 20)),
+        ]
+
+        # Visual indicator for moving pipes (up arrow on top pipe, down arrow on bottom pipe)
         if self.moving:
-            arrow_color = (255, 255, 0)  # Yellow arrows
-            # Draw small arrows on the sides to indicate movement
-            arrow_x = int(self.x + 30)  # Center of pipe
-            # Up arrow on top pipe
-            up_arrow_y = int(self.top_pipe.height - 30)
-            pygame.draw.polygon(surface, arrow_color, [
-                (arrow_x - 5, up_arrow_y + 8),
-                (arrow_x, up_arrow_y),
-                (arrow_x + 5, up_arrow_y + 8)
-            ])
-            # Down arrow on bottom pipe
-            down_arrow_y = int(self.bottom_pipe.y + 20)
-            pygame.draw.polygon(surface, arrow_color, [
-                (arrow_x - 5, down_arrow_y),
-                (arrow_x, down_arrow_y + 8),
-                (arrow_x + 5, down_arrow_y)
-            ])
+            arrow_x = int(self.x + 30) - 5  # Centre of pipe
+            items.append((sprites.up_arrow, (arrow_x, int(top.height - 30)), pygame.Rect(0, 0, 11, 9)))
+            items.append((sprites.down_arrow, (arrow_x, int(bottom.y + 20)), pygame.Rect(0, 0, 11, 9)))
+        return items
 
     def collide(self, bird: 'Bird') -> bool:
         bird_mask = bird.get_mask()
         return bird_mask.colliderect(self.top_pipe) or bird_mask.colliderect(self.bottom_pipe)
 
 
-class HalfPipe:
+class HalfPipe(EntityView):
     """A single pipe obstacle (either top or bottom) that doesn't give score"""
 
     TOP = "top"
     BOTTOM = "bottom"
 
-    def __init__(self, biome_colors: Optional[Dict[str, Color]] = None,
+    x = column("x")
+    height = column("base", int)  # How far the pipe extends from the top or the ground
+    base_height = column("base", int)
+    biome = column("biome", int)
+    moving = column("moving", bool)
+    move_offset = column("offset")
+    move_phase = column("phase")
+    move_amplitude = column("amplitude")
+    move_speed: float = MOVE_SPEED
+
+    def __init__(self, biome: int = 0,
                  position: str = TOP, height: Optional[int] = None,
-                 x_position: Optional[float] = None) -> None:
-        self.x: float = float(SCREEN_WIDTH) if x_position is None else x_position
-        self.position: str = position  # TOP or BOTTOM
-        self.biome_colors: Dict[str, Color] = biome_colors or BIOMES[0]
-
-        # Height for the pipe (how far it extends from top/bottom)
+                 x_position: Optional[float] = None, move_phase: Optional[float] = None,
+                 store: Optional[EntityStore] = None) -> None:
         if height is None:
             # Random height between 200 and 400 pixels
-            self.height: int = random.randint(200, 400)
+            height = random.randint(200, 400)
         else:
             # Ensure height is within valid range
-            self.height: int = max(50, min(height, 450))
-
-        # Create the pipe rect based on position
-        if self.position == self.TOP:
-            # Top pipe extends from top of screen downward
-            self.pipe_rect: pygame.Rect = pygame.Rect(int(self.x), 0, 60, self.height)
-        else:
-            # Bottom pipe extends from ground upward
-            ground_y = SCREEN_HEIGHT - GROUND_HEIGHT
-            self.pipe_rect: pygame.Rect = pygame.Rect(
-                int(self.x), ground_y - self.height, 60, self.height
-            )
-
-        # Moving pipe properties
-        self.moving: bool = False
-        self.move_offset: float = 0
-        self.move_speed: float = 0.03
-        self.move_amplitude: int = 30
-        self.move_phase: float = random.uniform(0, math.pi * 2)
-        self.base_height: int = self.height
+            height = max(50, min(height, 450))
+        if move_phase is None:
+            move_phase = random.uniform(0, math.pi * 2)
+        self.store = store if store is not None else EntityStore(1)
+        self.slot = self.store.add_half_pipe(float(SCREEN_WIDTH) if x_position is None else x_position,
+                                             position == self.TOP, height, move_phase, biome)
+
+    @property
+    def position(self) -> str:
+        return self.TOP if self.store.kind[self.slot] == KIND_HALF_PIPE_TOP else self.BOTTOM
+
+    @property
+    def pipe_rect(self) -> pygame.Rect:
+        store, slot = self.store, self.slot
+        if store.kind[slot] == KIND_HALF_PIPE_TOP:
+            return pygame.Rect(int(self.x), 0, 60, int(store.upper_h[slot]))
+        return pygame.Rect(int(self.x), int(store.lower_y[slot]), 60, int(store.lower_h[slot]))
+
+    @property
+    def biome_colors(self) -> Dict[str, Color]:
+        return BIOMES[self.biome]
 
     def update(self, pipe_speed: float) -> None:
-        self.x -= pipe_speed
-        self.pipe_rect.x = int(self.x)
-
-        # Update vertical position for moving half pipes
-        if self.moving:
-            self.move_phase += self.move_speed
-            self.move_offset = math.sin(self.move_phase) * self.move_amplitude
-
-            if self.position == self.TOP:
-                new_height = int(self.base_height + self.move_offset)
-                self.pipe_rect.height = max(50, new_height)  # Ensure minimum height
-            else:
-                ground_y = SCREEN_HEIGHT - GROUND_HEIGHT
-                new_y = int(ground_y - self.base_height + self.move_offset)
-                # Ensure pipe stays within bounds
-                self.pipe_rect.y = max(0, min(new_y, ground_y - 50))
-                self.pipe_rect.height = max(50, ground_y - self.pipe_rect.y)
+        """Scroll (and move) this half pipe alone"""
+        self.store.advance(pipe_speed, index=slice(self.slot, self.slot + 1))
 
     def draw(self, surface: pygame.Surface) -> None:
-        # Draw the pipe
-        pygame.draw.rect(surface, self.biome_colors["pipe_color"], self.pipe_rect)
-        
-        # Draw pipe cap
-        if self.position == self.TOP:
-            cap_y = self.pipe_rect.height - 20
-        else:
-            cap_y = self.pipe_rect.y
-        
-        pygame.draw.rect(surface, self.biome_colors["pipe_cap_color"],
-                        (self.x - 5, cap_y, 70, 20))
-        
-        # Visual indicator for moving pipes
+        surface.blits(self.blit_items(), doreturn=False)
+
+    def blit_items(self) -> List[BlitItem]:
+        """Sprites making up this half pipe, in drawing order"""
+        sprites = get_pipe_sprites(self.biome)
+        rect = self.pipe_rect
+        cap_y = rect.height - 20 if self.position == self.TOP else rect.y
+        items: List[BlitItem] = [
+            (sprites.body, rect.topleft, pygame.Rect(0, 0, 60, rect.height)),
+            (sprites.cap, (int(self.x - 5), cap_y), pygame.Rect(0, 0, 70, 20)),
+        ]
+
+        # Visual indicator for moving pipes (down arrow for top pipe, up arrow for bottom pipe)
         if self.moving:
-            arrow_color = (255, 255, 0)
-            arrow_x = int(self.x + 30)
-            
+            arrow_x = int(self.x + 30) - 5
             if self.position == self.TOP:
-                # Down arrow for top pipe
-                arrow_y = int(self.pipe_rect.height - 30)
-                pygame.draw.polygon(surface, arrow_color, [
-                    (arrow_x - 5, arrow_y),
-                    (arrow_x, arrow_y + 8),
-                    (arrow_x + 5, arrow_y)
-                ])
+                items.append((sprites.down_arrow, (arrow_x, int(rect.height - 30)), pygame.Rect(0, 0, 11, 9)))
             else:
-                # Up arrow for bottom pipe
-                arrow_y = int(self.pipe_rect.y + 20)
-                pygame.draw.polygon(surface, arrow_color, [
-                    (arrow_x - 5, arrow_y + 8),
-                    (arrow_x, arrow_y),
-                    (arrow_x + 5, arrow_y + 8)
-                ])
+                items.append((sprites.up_arrow, (arrow_x, int(rect.y + 20)), pygame.Rect(0, 0, 11, 9)))
+        return items
 
     def collide(self, bird: 'Bird') -> bool:
         bird_mask = bird.get_mask()
@@ -0,0 +1,365 @@
+"""Population mode: many birds flying the same course at once
+
+A Population is a Simulation whose single bird is replaced by arrays of bird
+heights and velocities that are stepped together. Obstacles scroll once per
+tick for everyone and each obstacle is tested against all birds in one
+vectorized comparison, since every bird shares the same x position. By
+default birds have a single life. With single_life=False each bird plays by
+the game's rules instead: its own lives, fall damage, invincibility after a
+hit and heart pickups, so it dies on the tick its own Simulation would end.
+Dead birds are culled by compacting the arrays, so live birds always fill the
+first n_alive slots. With GameConfig.pixel_collision the birds near an edge of
+an obstacle are then tested one by one with collision.sprite_hits, like the
+single bird.
+
+Drawing uses one Surface.blits call with bird sprites pre-rotated at
+ROTATION_STEP degree steps.
+
+Run ``python -m flappy_bird.population`` for a neuro-evolution demo in which
+linear flap policies learn the course.
+"""
+
+import argparse
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from flappy_bird.bird import draw_bird_body
+from flappy_bird.collision import CAP_OVERHANG, SPRITE_REACH, sprite_hits
+from flappy_bird.config import DEFAULT_CONFIG, GameConfig
+from flappy_bird.constants import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, FPS, MAX_LIVES, INVINCIBILITY_DURATION, MAX_FALL_DAMAGE,
+    HEART_HEAL_AMOUNT
+)
+from flappy_bird.course import COURSE_BLOCK, Course, generate_course
+from flappy_bird.entities import HEART_RADIUS, KIND_HEART, KIND_PIPE, PIPE_WIDTH
+from flappy_bird.graphics import clear_background_sprites, draw_scene
+from flappy_bird.pipe import clear_pipe_sprites
+from flappy_bird.observation import N_FEATURES, VELOCITY_SCALE, write_features
+from flappy_bird.simulation import Simulation
+
+BIRD_X: int = 100
+BIRD_RADIUS: int = 15
+ROTATION_STEP: int = 3  # Degrees between cached bird sprites
+MIN_ROTATION: int = -30
+MAX_ROTATION: int = 90
+
+_sprites: List[pygame.Surface] = []
+_sprite_offsets: np.ndarray = np.zeros((0, 2), dtype=np.int64)
+
+
+def bird_sprites() -> Tuple[List[pygame.Surface], np.ndarray]:
+    """Bird sprites for every rotation step, and the offset from the bird centre to each top-left corner"""
+    global _sprite_offsets
+    if not _sprites:
+        body = pygame.Surface((BIRD_RADIUS * 2, BIRD_RADIUS * 2), pygame.SRCALPHA)
+        draw_bird_body(body, BIRD_RADIUS)
+        for rotation in range(MIN_ROTATION, MAX_ROTATION + 1, ROTATION_STEP):
+            _sprites.append(pygame.transform.rotate(body, -rotation))
+        _sprite_offsets = np.array([(-(sprite.get_width() // 2), -(sprite.get_height() // 2))
+                                    for sprite in _sprites], dtype=np.int64)
+    return _sprites, _sprite_offsets
+
+
+class Population(Simulation):
+    """Birds flying one course together; a bird dies at its first collision, or with single_life=False once
+    it runs out of lives"""
+
+    def __init__(self, size: int, seed: Optional[int] = None, course: Optional[Course] = None,
+                 config: GameConfig = DEFAULT_CONFIG, single_life: bool = True) -> None:
+        self.size: int = size
+        self.single_life: bool = single_life
+        super().__init__(seed, course, config)
+
+    def reset(self) -> None:
+        """Start a new flight with every bird alive at the starting height"""
+        super().reset()
+        if self.single_life:
+            self.lives = 1.0  # Every bird has a single life
+        self.y: np.ndarray = np.full(self.size, float(SCREEN_HEIGHT // 2))
+        self.velocity: np.ndarray = np.zeros(self.size)
+        self.ids: np.ndarray = np.arange(self.size)  # Bird id in each slot
+        self.n_alive: int = self.size
+        self.death_tick: np.ndarray = np.full(self.size, -1, dtype=np.int64)  # By bird id
+        self.death_score: np.ndarray = np.zeros(self.size, dtype=np.int64)  # By bird id
+        # Simulation's lives, max_height and invincibility for each slot, used with single_life=False
+        self.bird_lives: np.ndarray = np.full(self.size, self.lives)
+        self.bird_max_height: np.ndarray = np.full(self.size, float(SCREEN_HEIGHT // 2))
+        self.bird_invincible: np.ndarray = np.zeros(self.size, dtype=bool)
+        self.bird_invincible_timer: np.ndarray = np.zeros(self.size, dtype=np.int64)
+        self._hearts_taken: Dict[int, np.ndarray] = {}  # Store slot of each heart on screen: taken by bird id
+        self._hit: np.ndarray = np.zeros(self.size, dtype=bool)
+
+    @property
+    def alive_ids(self) -> np.ndarray:
+        return self.ids[:self.n_alive]
+
+    def observe(self, out: np.ndarray) -> np.ndarray:
+        """Write features of the live birds into the first n_alive rows of out and return them"""
+        rows = out[:self.n_alive]
+        if not len(rows):
+            return rows
+        # Obstacle features are shared, only the bird columns differ
+        write_features(self, rows[0])
+        rows[1:, 2:] = rows[0, 2:]
+        rows[:, 0] = self.y[:self.n_alive] / SCREEN_HEIGHT
+        rows[:, 1] = self.velocity[:self.n_alive] / VELOCITY_SCALE
+        rows[:, 9] = self.bird_lives[:self.n_alive] / MAX_LIVES
+        return rows
+
+    def step(self, flap: Optional[np.ndarray] = None) -> List[str]:  # type: ignore[override]
+        """Advance every live bird one frame; flap holds one flag per live slot"""
+        self.events = []
+        if self.game_over:
+            return self.events
+
+        live = self.n_alive
+        y = self.y[:live]
+        velocity = self.velocity[:live]
+        if flap is not None:
+            velocity[flap[:live]] = self.config.flap_strength
+        # Bird.update for every bird
+        velocity += self.config.gravity
+        y += velocity
+        if not self.single_life:
+            # Birds leaving the screen die below unless they are invincible, so only games with lives clamp
+            velocity[(y < 0) | (y > SCREEN_HEIGHT - GROUND_HEIGHT - BIRD_RADIUS)] = 0
+            np.clip(y, 0, SCREEN_HEIGHT - GROUND_HEIGHT - BIRD_RADIUS, out=y)
+            np.minimum(self.bird_max_height[:live], y, out=self.bird_max_height[:live])
+
+        self.tick += 1
+        time_now = self.now
+        current_pipe_speed = self.config.pipe_speed(self.score)
+        self._spawn_pipes(time_now)
+        if not self.single_life:
+            self._spawn_heart(time_now)
+        self._advance_obstacles(current_pipe_speed)
+
+        hit = self._hit[:live]
+        if self.single_life:
+            # Collision: ground and ceiling, then each obstacle against all birds (Bird.get_mask truncates)
+            np.greater_equal(y, SCREEN_HEIGHT - GROUND_HEIGHT - BIRD_RADIUS, out=hit)
+            hit |= y <= BIRD_RADIUS
+            self._obstacle_hits(y, velocity, hit)
+            self._count_score()
+            if hit.any():
+                self._cull(hit)
+            return self.events
+
+        # In the order of Simulation.step: half pipes, hearts, then the ground, the ceiling and pipes
+        invincible = self.bird_invincible[:live]
+        hit[:] = invincible  # Invincible birds count as hit already, so they are never tested
+        self._obstacle_hits(y, velocity, hit, pipes=False)
+        self._take_hits(hit & ~invincible)
+        self._collect_hearts(y)
+        hit[:] = invincible
+        hit |= (y >= SCREEN_HEIGHT - GROUND_HEIGHT - BIRD_RADIUS) | (y <= BIRD_RADIUS)
+        self._obstacle_hits(y, velocity, hit, pipes=True)
+        self._take_hits(hit & ~invincible)
+        invincible &= time_now - self.bird_invincible_timer[:live] <= INVINCIBILITY_DURATION
+
+        self._count_score()
+        dead = self.bird_lives[:live] <= 0
+        if dead.any():
+            self._cull(dead)
+        return self.events
+
+    def _take_hits(self, hit: np.ndarray) -> None:
+        """Simulation._take_hit for the birds in the hit slots: fall damage, then a respawn if any life is left"""
+        if not hit.any():
+            return
+        live = self.n_alive
+        y, lives = self.y[:live], self.bird_lives[:live]
+        fall_distance = y[hit] - self.bird_max_height[:live][hit]
+        damage = np.where(fall_distance > self.config.fall_damage_threshold,
+                          np.minimum(np.trunc(fall_distance / 100) * 0.5 + 0.5, MAX_FALL_DAMAGE), 0.5)
+        lives[hit] -= damage
+        respawn = hit & (lives > 0)
+        self.bird_invincible[:live][respawn] = True
+        self.bird_invincible_timer[:live][respawn] = self.now
+        y[respawn] = SCREEN_HEIGHT // 2
+        self.velocity[:live][respawn] = 0
+        self.bird_max_height[:live][respawn] = SCREEN_HEIGHT // 2
+
+    def _collect_hearts(self, y: np.ndarray) -> None:
+        """Heal the birds whose square touches a heart they have not taken yet (Heart.get_rect truncates)"""
+        entities = self.entities
+        if self._hearts_taken:
+            # Forget the hearts that left the screen before their slots are reused
+            self._hearts_taken = {slot: taken for slot, taken in self._hearts_taken.items() if entities.alive[slot]}
+        top = np.trunc(y - BIRD_RADIUS)
+        for heart in self.hearts:
+            slot = heart.slot
+            left = int(entities.x[slot] - HEART_RADIUS)
+            if slot not in entities.watched or not (left < BIRD_X + BIRD_RADIUS and BIRD_X - BIRD_RADIUS < left
+                                                    + HEART_RADIUS * 2):
+                continue
+            heart_top = int(entities.base[slot] + entities.heart_offset - HEART_RADIUS)
+            taken = self._hearts_taken.setdefault(slot, np.zeros(self.size, dtype=bool))
+            ids = self.ids[:self.n_alive]
+            touching = (top < heart_top + HEART_RADIUS * 2) & (top + BIRD_RADIUS * 2 > heart_top) & ~taken[ids]
+            if touching.any():
+                taken[ids[touching]] = True
+                lives = self.bird_lives[:self.n_alive]
+                lives[touching] = np.minimum(lives[touching] + HEART_HEAL_AMOUNT, MAX_LIVES)
+
+    def _obstacle_hits(self, y: np.ndarray, velocity: np.ndarray, hit: np.ndarray,
+                       pipes: Optional[bool] = None) -> None:
+        """Mark the birds that touch a pipe or half pipe (with pipes=True only pipes, with False only half pipes)"""
+        if self.config.pixel_collision:
+            self._pixel_hits(y, velocity, hit, pipes)
+        else:
+            self._box_hits(y, hit, pipes)
+
+    def _box_hits(self, y: np.ndarray, hit: np.ndarray, pipes: Optional[bool] = None) -> None:
+        """Mark the birds whose square overlaps an obstacle, each obstacle against all birds at once"""
+        top = np.trunc(y - BIRD_RADIUS)
+        bottom = top + BIRD_RADIUS * 2
+        bird_left = BIRD_X - BIRD_RADIUS
+        entities = self.entities
+        for slot in entities.near():
+            left = int(entities.x[slot])
+            kind = entities.kind[slot]
+            if (kind == KIND_HEART or (pipes is not None and (kind == KIND_PIPE) != pipes)
+                    or not (left < bird_left + BIRD_RADIUS * 2 and left + PIPE_WIDTH > bird_left)):
+                continue
+            upper_h, lower_y, lower_h = entities.upper_h[slot], entities.lower_y[slot], entities.lower_h[slot]
+            if upper_h:
+                hit |= top < upper_h
+            if lower_h:
+                hit |= bottom > lower_y
+
+    def _pixel_hits(self, y: np.ndarray, velocity: np.ndarray, hit: np.ndarray, pipes: Optional[bool] = None) -> None:
+        """Mark the birds whose sprite overlaps a pipe body or cap; only birds the sprite's reach brings near an
+        edge of the opening are tested pixel by pixel"""
+        rotation = np.clip(velocity * 2, MIN_ROTATION, MAX_ROTATION)  # As Bird.update turns the bird
+        entities = self.entities
+        for slot in entities.near():
+            left = int(entities.x[slot])
+            kind = entities.kind[slot]
+            if (kind == KIND_HEART or (pipes is not None and (kind == KIND_PIPE) != pipes)
+                    or not (left - CAP_OVERHANG < BIRD_X + SPRITE_REACH
+                            and left + PIPE_WIDTH + CAP_OVERHANG > BIRD_X - SPRITE_REACH)):
+                continue
+            near = np.zeros(len(y), dtype=bool)
+            if entities.upper_h[slot]:
+                near |= y - SPRITE_REACH < entities.upper_h[slot]
+            if entities.lower_h[slot]:
+                near |= y + SPRITE_REACH > entities.lower_y[slot]
+            for row in np.flatnonzero(near & ~hit).tolist():
+                hit[row] = sprite_hits(entities, slot, BIRD_X, y[row], BIRD_RADIUS, rotation[row])
+
+    def _cull(self, hit: np.ndarray) -> None:
+        """Record the birds that died this tick and compact the survivors to the front"""
+        live = self.n_alive
+        dead_ids = self.ids[:live][hit]
+        self.death_tick[dead_ids] = self.tick
+        self.death_score[dead_ids] = self.score
+        keep = ~hit
+        survivors = int(np.count_nonzero(keep))
+        self.y[:survivors] = self.y[:live][keep]
+        self.velocity[:survivors] = self.velocity[:live][keep]
+        self.ids[:survivors] = self.ids[:live][keep]
+        for column in (self.bird_lives, self.bird_max_height, self.bird_invincible, self.bird_invincible_timer):
+            column[:survivors] = column[:live][keep]
+        self.ids[survivors:live] = dead_ids
+        self.n_alive = survivors
+        if survivors == 0:
+            self.game_over = True
+
+    def draw(self, surface: pygame.Surface, elapsed_time: Optional[int] = None) -> None:
+        """Draw the course and every live bird, the birds with a single blits call"""
+        draw_scene(surface, self, self.now if elapsed_time is None else elapsed_time)
+        sprites, offsets = bird_sprites()
+        live = self.n_alive
+        rotation = np.clip(self.velocity[:live] * 2, MIN_ROTATION, MAX_ROTATION)
+        index = ((rotation - MIN_ROTATION) / ROTATION_STEP + 0.5).astype(np.int64)
+        x = BIRD_X + offsets[index, 0]
+        y = self.y[:live].astype(np.int64) + offsets[index, 1]
+        surface.blits([(sprites[i], (bx, by)) for i, bx, by in zip(index.tolist(), x.tolist(), y.tolist())],
+                      doreturn=False)
+
+
+class LinearPolicies:
+    """One linear flap rule per bird: flap when features . weights + bias > 0"""
+
+    def __init__(self, weights: np.ndarray) -> None:
+        self.weights: np.ndarray = weights  # (birds, N_FEATURES + 1), bias last
+
+    @classmethod
+    def random(cls, size: int, rng: np.random.Generator) -> "LinearPolicies":
+        return cls(rng.normal(size=(size, N_FEATURES + 1)))
+
+    def decide(self, features: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        weights = self.weights[ids]
+        return np.einsum("ij,ij->i", features, weights[:, :-1]) + weights[:, -1] > 0
+
+    def evolve(self, fitness: np.ndarray, rng: np.random.Generator, elite: float = 0.1,
+               noise: float = 0.2) -> "LinearPolicies":
+        """Next generation: the elite survive unchanged and the rest are mutated copies of them"""
+        size = len(self.weights)
+        n_elite = max(1, int(size * elite))
+        parents = self.weights[np.argsort(-fitness, kind="stable")[:n_elite]]
+        children = parents[rng.integers(0, n_elite, size=size - n_elite)]
+        children = children + rng.normal(scale=noise, size=children.shape)
+        return LinearPolicies(np.concatenate((parents, children)))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Evolve a population of birds on one course")
+    parser.add_argument("--birds", type=int, default=1000, help="population size")
+    parser.add_argument("--generations", type=int, default=10, help="generations to evolve")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the course and the first generation")
+    parser.add_argument("--max-ticks", type=int, default=60 * FPS, help="tick limit per generation")
+    parser.add_argument("--window", action="store_true", help="watch the birds fly at 60 FPS")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    if args.window:
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Flappy Bird population")
+        clear_pipe_sprites()  # Sprites are rendered again in the display's pixel format
+        clear_background_sprites()
+    else:
+        screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))  # Draw offscreen to time the renderer
+    clock = pygame.time.Clock()
+
+    rng = np.random.default_rng(args.seed)
+    population = Population(args.birds, seed=args.seed)
+    course = generate_course(population.course_seed, COURSE_BLOCK)  # Every generation flies the same pipes
+    policies = LinearPolicies.random(args.birds, rng)
+    features = np.empty((args.birds, N_FEATURES), dtype=np.float32)
+    for generation in range(args.generations):
+        population = Population(args.birds, seed=args.seed, course=course)
+        step_time = draw_time = 0.0
+        bird_ticks = 0
+        while not population.game_over and population.tick < args.max_ticks:
+            started = time.perf_counter()
+            flap = policies.decide(population.observe(features), population.alive_ids)
+            bird_ticks += population.n_alive
+            population.step(flap)
+            drawn = time.perf_counter()
+            population.draw(screen)
+            step_time += drawn - started
+            draw_time += time.perf_counter() - drawn
+            if args.window:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return
+                pygame.display.flip()
+                clock.tick(FPS)
+
+        ticks = max(1, population.tick)
+        fitness = np.where(population.death_tick < 0, population.tick, population.death_tick)
+        best = population.score if population.n_alive else int(population.death_score.max())
+        print(f"generation {generation}: best score {best}, {population.n_alive} birds reached tick {ticks}; "
+              f"step {step_time / ticks * 1000:.2f} ms/tick ({bird_ticks / step_time / 1e6:.1f}M bird-ticks/s), "
+              f"draw {draw_time / ticks * 1000:.2f} ms/frame")
+        policies = policies.evolve(fitness, rng)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Low-overhead sampling profiler for long sessions
+
+A SamplingProfiler wakes on a timer thread every INTERVAL seconds, reads the
+Python stack the main thread is in through sys._current_frames() and counts it
+in a dict, so profiling costs one stack walk per sample and nothing in the
+game loop itself. Each sample is tagged with the scene the game loop last
+reported through set_scene(): the game state and the biome. Stacks are counted
+per function (not per line), which keeps the number of distinct stacks small
+over hours of play.
+Time spent in C code, such as drawing or the frame clock's sleep, counts
+toward the Python function that called it.
+
+write() saves the counts as collapsed stacks, one ``frame;frame;... count``
+line per distinct stack with the scene as the two root frames, ready for
+flamegraph.pl or speedscope. A flame graph then splits first by state and
+biome, so a hot spot can be traced to the scene it happens in.
+
+The game profiles from launch when FLAPPY_BIRD_PROFILE names an output file
+(FLAPPY_BIRD_PROFILE_INTERVAL sets the interval in milliseconds), and P
+starts and stops profiling while it runs, writing the file when it stops and
+when the game exits.
+
+Run ``python -m flappy_bird.profiler FILE`` to summarize a collapsed-stack
+file.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType
+from typing import Dict, List, Optional, Sequence, Tuple
+
+INTERVAL: float = 0.005  # Seconds between samples
+PROFILE_ENV: str = "FLAPPY_BIRD_PROFILE"  # Output file; profiling starts with the game when set
+INTERVAL_ENV: str = "FLAPPY_BIRD_PROFILE_INTERVAL"  # Milliseconds between samples
+
+Stack = Tuple[str, ...]
+
+
+def _label(code: CodeType) -> str:
+    """Frame label of a code object: function (file:first line)"""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread (the one that created it by default) from a timer thread"""
+
+    def __init__(self, interval: float = INTERVAL, thread_id: Optional[int] = None) -> None:
+        self.interval: float = interval
+        self.thread_id: int = thread_id if thread_id is not None else threading.get_ident()
+        self.samples: Dict[Tuple[Stack, Stack], int] = {}  # (scene, stack) -> samples
+        self.scene: Stack = ("start", "biome 0")
+        self.overhead: float = 0.0  # Seconds the timer thread spent sampling
+        self._labels: Dict[CodeType, str] = {}  # Code object -> label
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def set_scene(self, state: str, biome: int) -> None:
+        """Tag the following samples with a game state and biome"""
+        if self.scene[0] != state or self.scene[1] != f"biome {biome}":
+            self.scene = (state, f"biome {biome}")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        current_frames = sys._current_frames
+        labels = self._labels
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            frame = current_frames().get(self.thread_id)
+            if frame is None:
+                break  # The thread is gone
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.reverse()
+            key = (self.scene, tuple(stack))
+            with self._lock:
+                self.samples[key] = self.samples.get(key, 0) + 1
+            self.overhead += time.perf_counter() - started
+
+    def collapsed(self) -> List[str]:
+        """Samples as collapsed-stack lines, the scene first"""
+        with self._lock:
+            samples = list(self.samples.items())
+        return [";".join(scene + stack) + f" {count}" for (scene, stack), count in sorted(samples)]
+
+    def write(self, path: str) -> None:
+        """Save the samples so far as a collapsed-stack file, replacing it only once complete"""
+        temporary = path + ".tmp"
+        with open(temporary, "w") as file:
+            file.writelines(line + "\n" for line in self.collapsed())
+        os.replace(temporary, path)
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+def from_environment(environ: Optional[Dict[str, str]] = None) -> Tuple[Optional[str], float]:
+    """Output file (None when profiling is off) and interval in seconds from the environment"""
+    environ = dict(os.environ) if environ is None else environ
+    interval = INTERVAL
+    if environ.get(INTERVAL_ENV):
+        interval = float(environ[INTERVAL_ENV]) / 1000
+    return environ.get(PROFILE_ENV) or None, interval
+
+
+def default_output() -> str:
+    """File written when profiling was started with the key instead of the environment"""
+    return f"flappy-bird-{os.getpid()}.folded"
+
+
+def read_collapsed(path: str) -> "Counter[Stack]":
+    """Samples per stack (frames as a tuple) of a collapsed-stack file"""
+    counts: "Counter[Stack]" = Counter()
+    with open(path) as file:
+        for line in file:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack:
+                counts[tuple(stack.split(";"))] += int(count)
+    return counts
+
+
+def summarize(counts: "Counter[Stack]", top: int = 15) -> List[str]:
+    """Report lines: samples per scene, then the functions with the most self and total samples"""
+    total = sum(counts.values()) or 1
+    scenes: "Counter[str]" = Counter()
+    own: "Counter[str]" = Counter()
+    inclusive: "Counter[str]" = Counter()
+    for stack, count in counts.items():
+        scenes[" ".join(stack[:2])] += count
+        frames = stack[2:]
+        if frames:
+            own[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+    lines = [f"{total:,} samples"]
+    lines += [f"  {count / total:6.1%}  {scene}" for scene, count in scenes.most_common()]
+    for title, counter in (("self", own), ("total", inclusive)):
+        lines.append(f"top functions by {title} samples:")
+        lines += [f"  {count / total:6.1%}  {frame}" for frame, count in counter.most_common(top)]
+    return lines
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Summarize a collapsed-stack profile of the game")
+    parser.add_argument("profile", help=f"file written by the game with {PROFILE_ENV} set or after pressing P")
+    parser.add_argument("--scene", default=None, help="only count samples of a state, e.g. playing")
+    parser.add_argument("--top", type=int, default=15, help="functions to list")
+    args = parser.parse_args(argv)
+
+    counts = read_collapsed(args.profile)
+    if args.scene:
+        counts = Counter({stack: count for stack, count in counts.items() if args.scene in stack[:2]})
+    print("\n".join(summarize(counts, args.top)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Pipelined rendering on a thread of its own
+
+In threaded mode the game loop no longer draws. After each step it captures a
+RenderSnapshot, everything the frame shows copied out of the Simulation (the
+bird, a copy of the entity columns with pipe, half pipe and heart views on
+it, score, lives, biome, the particles and the game over values), and submits it to a
+RenderThread. Snapshots are never changed after capture, so the two threads
+share nothing mutable.
+
+The render thread rasterizes the latest snapshot into the back one of two
+logical surfaces and swaps them; the game loop presents the front surface and
+flips the display, which stays on the main thread. pygame releases the GIL
+inside blits, fills and scaling, so rasterizing frame N overlaps with stepping
+frame N + 1 on another core. A snapshot that arrives before the previous one
+was drawn replaces it, so a slow renderer drops frames instead of falling
+behind. The price is one frame of latency: the display shows the frame
+rasterized while the loop stepped the next one.
+
+Run ``python -m flappy_bird.render`` to compare frame times of the sequential
+and threaded loops.
+"""
+
+import argparse
+import copy
+import threading
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional, Sequence, Tuple, Union
+
+import pygame
+
+from flappy_bird.bird import Bird
+from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from flappy_bird.entities import EntityStore
+from flappy_bird.graphics import draw_game_over_screen, draw_hud, draw_world
+from flappy_bird.heart import Heart
+from flappy_bird.particles import ParticleFrame, draw_particles
+from flappy_bird.pipe import HalfPipe, Pipe
+
+if TYPE_CHECKING:
+    from flappy_bird.display import Presenter
+    from flappy_bird.simulation import Simulation
+
+
+class RenderSnapshot(NamedTuple):
+    """What one frame shows, captured from a Simulation after a step"""
+    state: str  # "playing" or "game_over"
+    bird: Bird
+    entities: EntityStore  # Copy the views below read from
+    pipes: Tuple[Pipe, ...]
+    half_pipes: Tuple[HalfPipe, ...]
+    hearts: Tuple[Heart, ...]
+    score: int
+    lives: float
+    biome: int
+    biome_tick: Optional[int]
+    tick: int
+    invincible: bool
+    elapsed: int  # pygame.time.get_ticks() at capture, for background animation
+    rank: Optional[int]  # Game over screen values
+    games: int
+    status: Optional[str]  # Extra HUD line, e.g. the autopilot's speed
+    particles: Optional[ParticleFrame] = None
+
+    @classmethod
+    def capture(cls, sim: "Simulation", state: str, elapsed: int, rank: Optional[int] = None, games: int = 0,
+                status: Optional[str] = None, particles: Optional[ParticleFrame] = None) -> "RenderSnapshot":
+        entities = sim.entities.copy()
+        return cls(state, copy.copy(sim.bird), entities,
+                   tuple(Pipe.view(entities, pipe.slot) for pipe in sim.pipes),
+                   tuple(HalfPipe.view(entities, half_pipe.slot) for half_pipe in sim.half_pipes),
+                   tuple(Heart.view(entities, heart.slot) for heart in sim.hearts),
+                   sim.score, sim.lives, sim.biome, sim.biome_tick, sim.tick, sim.invincible, elapsed, rank, games,
+                   status, particles)
+
+
+def draw_frame(surface: pygame.Surface, scene: Union["Simulation", RenderSnapshot], font: pygame.font.Font,
+               state: str, elapsed: int, rank: Optional[int] = None, games: int = 0,
+               status: Optional[str] = None, particles: Optional[ParticleFrame] = None) -> None:
+    """Draw a whole frame of the playing or game over screen from a simulation or a snapshot"""
+    if state == "playing":
+        draw_world(surface, scene, elapsed)
+        if particles is not None:
+            draw_particles(surface, particles)
+        # Draw score and lives
+        draw_hud(surface, scene, font)
+        if status is not None:
+            surface.blit(font.render(status, True, (255, 255, 255)), (10, 40))
+    else:
+        # Draw the final scene (pipes, hearts and bird stay visible) under the game over screen
+        draw_world(surface, scene, elapsed, show_invincible=False)
+        if particles is not None:
+            draw_particles(surface, particles)
+        draw_game_over_screen(surface, scene.score, font, rank, games)
+
+
+def draw_snapshot(surface: pygame.Surface, snapshot: RenderSnapshot, font: pygame.font.Font) -> None:
+    draw_frame(surface, snapshot, font, snapshot.state, snapshot.elapsed, snapshot.rank, snapshot.games,
+               snapshot.status, snapshot.particles)
+
+
+class RenderThread:
+    """Rasterizes submitted snapshots into a pair of logical surfaces on a thread of its own"""
+
+    def __init__(self, font: pygame.font.Font) -> None:
+        self.font = font  # Only the render thread draws text with it
+        self.surfaces = [pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)) for _ in range(2)]
+        if pygame.display.get_surface() is not None:
+            self.surfaces = [surface.convert() for surface in self.surfaces]
+        self.frames: int = 0  # Snapshots drawn
+        self.dropped: int = 0  # Snapshots replaced before they were drawn
+        self.render_time: float = 0.0  # Seconds spent drawing
+        self._front: int = 0
+        self._submitted: int = 0
+        self._drawn: int = 0  # Snapshots swapped to the front so far
+        self._pending: Optional[RenderSnapshot] = None
+        self._condition = threading.Condition()
+        self._front_lock = threading.Lock()  # Held while the front surface is read or swapped
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="render", daemon=True)
+        self._thread.start()
+
+    def submit(self, snapshot: RenderSnapshot) -> None:
+        """Hand over the latest snapshot, replacing one still waiting"""
+        with self._condition:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = snapshot
+            self._submitted += 1
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopped:
+                    self._condition.wait()
+                snapshot = None if self._stopped else self._pending
+                self._pending = None
+            if snapshot is None:
+                return  # Stopped
+            started = time.perf_counter()
+            back = 1 - self._front  # The game loop only reads the front surface
+            draw_snapshot(self.surfaces[back], snapshot, self.font)
+            self.render_time += time.perf_counter() - started
+            self.frames += 1
+            with self._front_lock:
+                self._front = back
+            with self._condition:
+                self._drawn += 1
+                self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted snapshot is drawn (or replaced); return whether it happened in time"""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._drawn + self.dropped >= self._submitted or self._stopped, timeout)
+
+    def present(self, presenter: "Presenter") -> None:
+        """Show the latest rasterized frame; call from the thread that flips the display"""
+        with self._front_lock:
+            presenter.present(self.surfaces[self._front])
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+
+
+def _bench(frames: int, threaded: bool, presenter: "Presenter", font: pygame.font.Font) -> Tuple[float, Any]:
+    """Mean seconds per frame of an unthrottled autopilot game loop, and the renderer if threaded"""
+    from flappy_bird.autopilot import Autopilot
+    from flappy_bird.simulation import Simulation
+
+    sim = Simulation(0)
+    autopilot = Autopilot(nodes_per_tick=1024)
+    renderer = RenderThread(font) if threaded else None
+    started = time.perf_counter()
+    for _ in range(frames):
+        if sim.game_over:
+            sim.reset()
+        sim.step(autopilot.decide(sim))
+        now = pygame.time.get_ticks()
+        if renderer is not None:
+            renderer.submit(RenderSnapshot.capture(sim, "playing", now))
+            renderer.present(presenter)
+        else:
+            draw_frame(presenter.surface, sim, font, "playing", now)
+            presenter.present()
+        pygame.display.flip()
+    elapsed = time.perf_counter() - started
+    if renderer is not None:
+        renderer.stop()
+    return elapsed / frames, renderer
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare frame times of the sequential and threaded game loops")
+    parser.add_argument("--frames", type=int, default=600, help="frames per loop")
+    parser.add_argument("--window", default="1080x1920", help="window size as WIDTHxHEIGHT")
+    args = parser.parse_args(argv)
+
+    from flappy_bird.display import Presenter, parse_size
+
+    pygame.init()
+    presenter = Presenter(parse_size(args.window))
+    font = pygame.font.Font(None, 24)
+    sequential, _ = _bench(args.frames, False, presenter, font)
+    threaded, renderer = _bench(args.frames, True, presenter, font)
+    print(f"sequential: {sequential * 1000:.2f} ms per frame ({1 / sequential:.0f} FPS)")
+    print(f"threaded:   {threaded * 1000:.2f} ms per frame ({1 / threaded:.0f} FPS), "
+          f"{renderer.render_time / max(1, renderer.frames) * 1000:.2f} ms drawing each of {renderer.frames} frames, "
+          f"{renderer.dropped} dropped")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Recorded games and their offline rendering to video frames
+
+A Replay holds the seed and game config of a Simulation, the number of games
+played on it before the recorded one and the flap flag of every tick. Since simulations are
+deterministic, that is all it takes to play the game again exactly.
+``flappy-bird --record FILE`` saves the last game played.
+
+render() draws a replay headless with the normal drawing code and runs well
+faster than real time. The main process steps the simulation alone, which is
+cheap, and hands the frames out in chunks. Each chunk starts from a keyframe,
+a snapshot of the game at its first tick. A pool of worker processes restores
+the keyframe, steps through the chunk and draws every frame straight into its
+slot of a memory-mapped file shared by all processes, as 24-bit RGB surfaces
+built on the mapped memory. The main process streams finished chunks to the
+output in frame order and then reuses their slot, so only a ring of a few
+chunks per worker is ever mapped.
+
+Output is raw RGB24 frames, as read by ``ffmpeg -f rawvideo -pix_fmt rgb24
+-s 400x600 -r 60 -i FILE``, or a directory of numbered PNG files that the
+workers save with pygame.image.save.
+
+Run ``python -m flappy_bird.replay REPLAY OUTPUT`` to render a replay.
+"""
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from multiprocessing.pool import AsyncResult
+from typing import Any, BinaryIO, Deque, Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+from flappy_bird.config import DEFAULT_CONFIG, GameConfig
+from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
+from flappy_bird.graphics import draw_hud, draw_world
+from flappy_bird.simulation import Simulation, SimulationSnapshot
+
+CHUNK_FRAMES: int = 30  # Frames per chunk of work, each starting at a keyframe
+CHUNKS_PER_WORKER: int = 2  # Slots of the shared ring per worker, so workers never wait for the writer
+FORMATS: Tuple[str, ...] = ("raw", "png")
+PNG_NAME: str = "frame-{:06d}.png"
+SHARED_MEMORY_DIR: str = "/dev/shm"  # The ring is mapped from here when it exists, so it never hits the disk
+
+
+class Replay(NamedTuple):
+    """Everything needed to play a recorded game again"""
+    seed: int  # Seed of the Simulation
+    game: int  # Games played on the Simulation before the recorded one
+    flaps: np.ndarray  # Flap flag of every tick
+    config: GameConfig = DEFAULT_CONFIG
+
+    def simulation(self) -> Simulation:
+        """Simulation at the start of the recorded game"""
+        sim = Simulation(self.seed, config=self.config)
+        for _ in range(self.game):
+            sim.reset()
+        return sim
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as file:
+            np.savez(file, seed=self.seed, game=self.game, flaps=np.asarray(self.flaps, dtype=np.bool_),
+                     config=json.dumps(self.config.overrides()))
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with np.load(path) as data:
+            # Replays saved before configs existed were played with the defaults
+            config = DEFAULT_CONFIG._replace(**json.loads(str(data["config"]))) if "config" in data else DEFAULT_CONFIG
+            return cls(seed=int(data["seed"]), game=int(data["game"]), flaps=data["flaps"], config=config)
+
+
+class _Chunk(NamedTuple):
+    """Work for one worker: frames first_frame onwards, one per flap, drawn into a ring slot"""
+    keyframe: SimulationSnapshot
+    flaps: np.ndarray
+    slot: int
+    first_frame: int
+
+
+_worker: Dict[str, Any] = {}  # Per-process state of the workers, set up by _init_worker()
+
+
+def _init_worker(ring_path: str, ring_shape: Tuple[int, ...], png_dir: Optional[str]) -> None:
+    # Drawing needs no display; pygame.init() would also let SDL catch the SIGTERM that stops the pool
+    pygame.font.init()
+    _worker["ring"] = np.memmap(ring_path, dtype=np.uint8, mode="r+", shape=ring_shape)
+    _worker["sim"] = Simulation(0)  # Only ever restored from keyframes
+    _worker["png_dir"] = png_dir
+    # Font - with fallback for systems where font module is not available
+    try:
+        _worker["font"] = pygame.font.SysFont('arial', 24)
+    except (pygame.error, NotImplementedError):
+        _worker["font"] = pygame.font.Font(None, 24)
+
+
+def draw_frame(surface: pygame.Surface, sim: Simulation, font: pygame.font.Font) -> None:
+    """Draw a game in progress as the game window shows it"""
+    draw_world(surface, sim, sim.now)
+    draw_hud(surface, sim, font)
+
+
+def _render_chunk(chunk: _Chunk) -> Tuple[int, int]:
+    """Render a chunk into its ring slot; return the slot and the number of frames"""
+    sim: Simulation = _worker["sim"]
+    sim.restore(chunk.keyframe)
+    frames = _worker["ring"][chunk.slot]
+    png_dir = _worker["png_dir"]
+    for index, flap in enumerate(chunk.flaps.tolist()):
+        sim.step(flap)
+        # A surface built on the mapped frame, so drawing writes the shared buffer directly
+        surface = pygame.image.frombuffer(frames[index].data, (SCREEN_WIDTH, SCREEN_HEIGHT), "RGB")
+        draw_frame(surface, sim, _worker["font"])
+        if png_dir is not None:
+            pygame.image.save(surface, os.path.join(png_dir, PNG_NAME.format(chunk.first_frame + index)))
+    return chunk.slot, len(chunk.flaps)
+
+
+def render(replay: Replay, output: str, output_format: str = "raw", workers: Optional[int] = None,
+           start: int = 0, end: Optional[int] = None, chunk_frames: int = CHUNK_FRAMES) -> int:
+    """Render the ticks start to end of a replay to output and return the number of frames
+
+    With output_format "raw" output is a file of RGB24 frames; with "png" it is
+    a directory that receives one PNG per frame, numbered from start.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"unknown output format {output_format!r}, expected one of {FORMATS}")
+    workers = workers or os.cpu_count() or 1
+    flaps = np.asarray(replay.flaps, dtype=np.bool_)
+    end = len(flaps) if end is None else min(end, len(flaps))
+    sim = replay.simulation()
+    for flap in flaps[:start].tolist():  # Fast-forward to the first frame without drawing
+        sim.step(flap)
+
+    png_dir = output if output_format == "png" else None
+    if png_dir is not None:
+        os.makedirs(png_dir, exist_ok=True)
+    ring_shape = (workers * CHUNKS_PER_WORKER, chunk_frames, SCREEN_HEIGHT, SCREEN_WIDTH, 3)
+    handle, ring_path = tempfile.mkstemp(prefix="flappy-frames-", suffix=".rgb",
+                                         dir=SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else None)
+    os.close(handle)
+    out: Optional[BinaryIO] = None
+    ring: Optional[np.memmap] = None
+    try:
+        ring = np.memmap(ring_path, dtype=np.uint8, mode="w+", shape=ring_shape)
+        out = open(output, "wb") if png_dir is None else None
+        pending: Deque["AsyncResult[Tuple[int, int]]"] = collections.deque()
+
+        def write_oldest() -> None:
+            slot, count = pending.popleft().get()
+            if out is not None:
+                assert ring is not None
+                out.write(ring[slot, :count].data)
+
+        with multiprocessing.Pool(workers, _init_worker, (ring_path, ring_shape, png_dir)) as pool:
+            for number, first in enumerate(range(start, end, chunk_frames)):
+                if len(pending) == len(ring):
+                    write_oldest()  # Its slot is the one this chunk will use
+                chunk_flaps = flaps[first:min(first + chunk_frames, end)]
+                chunk = _Chunk(keyframe=sim.snapshot(), flaps=chunk_flaps, slot=number % len(ring),
+                               first_frame=first)
+                pending.append(pool.apply_async(_render_chunk, (chunk,)))
+                for flap in chunk_flaps.tolist():  # On to the next keyframe
+                    sim.step(flap)
+            while pending:
+                write_oldest()
+            pool.close()
+            pool.join()
+    finally:
+        if out is not None:
+            out.close()
+        # Unmap the ring first: Windows refuses to delete a file that is still mapped
+        ring = None
+        os.remove(ring_path)
+    return max(0, end - start)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Render a recorded game to video frames")
+    parser.add_argument("replay", help="replay file saved with flappy-bird --record")
+    parser.add_argument("output", help="raw RGB24 file, or directory for --format png")
+    parser.add_argument("--format", choices=FORMATS, default="raw", help="raw frames or a PNG sequence")
+    parser.add_argument("--workers", type=int, default=None, help="rendering processes (one per core by default)")
+    parser.add_argument("--start", type=int, default=0, help="first tick to render")
+    parser.add_argument("--end", type=int, default=None, help="tick to stop at (the end of the game by default)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_FRAMES, help="frames per keyframe chunk")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Headless, even where a display is available
+    replay = Replay.load(args.replay)
+    started = time.perf_counter()
+    frames = render(replay, args.output, args.format, args.workers, args.start, args.end, args.chunk)
+    elapsed = time.perf_counter() - started
+    print(f"rendered {frames} frames ({frames / FPS:.1f}s of game) in {elapsed:.2f}s: "
+          f"{frames / elapsed:,.0f} frames/s, {frames / FPS / elapsed:.1f}x real time")
+    if args.format == "raw":
+        print(f"play with: ffplay -f rawvideo -pixel_format rgb24 -video_size {SCREEN_WIDTH}x{SCREEN_HEIGHT} "
+              f"-framerate {FPS} {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Local high-score store with fast rank queries
+
+Every finished game is appended to a log of fixed-size records, each with a
+checksum, and the log is synced to disk before the game over screen shows the
+rank. A crash can only tear the last record, which the next open detects and
+cuts off, so a log never holds a record that was not fully written.
+
+In memory the scores are counted in a Fenwick tree indexed by score, so adding
+a score, the rank of a score and the k-th best score each take O(log m) steps
+for scores up to m, however many games are stored. The counts per score are
+also the compacted form of the log: a snapshot holds them with the number of
+log records they cover, so opening the store reads the snapshot and only the
+records appended after it. Snapshots are rewritten every SNAPSHOT_INTERVAL new
+records and replace the old one atomically.
+
+Layout::
+
+    scores/
+        scores.log      uint32 score, uint32 unix time, uint32 checksum per game
+        snapshot.npz    counts per score and the number of log records they cover
+
+Run ``python -m flappy_bird.scores`` to print the leaderboard.
+"""
+
+import argparse
+import os
+import struct
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+LOG_NAME: str = "scores.log"
+SNAPSHOT_NAME: str = "snapshot.npz"
+SNAPSHOT_INTERVAL: int = 10000  # Log records after which the snapshot is rewritten
+RECORD: np.dtype = np.dtype([("score", "<u4"), ("time", "<u4"), ("check", "<u4")])
+_RECORD_STRUCT = struct.Struct("<III")  # RECORD, for writing one at a time
+_CHECK_MULTIPLIERS = (0x9E3779B1, 0x85EBCA77)
+_CHECK_SEED = 0x27D4EB2F  # Also makes an all-zero record invalid
+
+
+def default_directory() -> str:
+    """Per-user data directory of the score store"""
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(data_home, "flappy-bird")
+
+
+def _checksum(score: int, unix_time: int) -> int:
+    return (score * _CHECK_MULTIPLIERS[0] + unix_time * _CHECK_MULTIPLIERS[1] + _CHECK_SEED) & 0xFFFFFFFF
+
+
+def _checksums(scores: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """_checksum() of whole columns (uint64 products wrap, which leaves the low 32 bits intact)"""
+    mixed = (scores.astype(np.uint64) * _CHECK_MULTIPLIERS[0] + times.astype(np.uint64) * _CHECK_MULTIPLIERS[1]
+             + _CHECK_SEED)
+    return (mixed & 0xFFFFFFFF).astype(np.uint32)
+
+
+class RankIndex:
+    """Counts of every score in a Fenwick tree"""
+
+    def __init__(self, counts: Optional[np.ndarray] = None) -> None:
+        counts = np.zeros(0, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.total: int = int(counts.sum())
+        self._build(counts, len(counts))
+
+    def _build(self, counts: np.ndarray, scores: int) -> None:
+        # Room for scores 0 to size - 1, size a power of two so k-th queries can halve their step
+        size = 64
+        while size < scores:
+            size *= 2
+        padded = np.zeros(size, dtype=np.int64)
+        padded[:len(counts)] = counts
+        # Node i (1-based) holds the counts of the lowbit(i) scores ending at score i - 1
+        prefix = np.concatenate(([0], np.cumsum(padded)))
+        nodes = np.arange(1, size + 1)
+        self.size: int = size
+        self._counts: List[int] = padded.tolist()
+        self._tree: List[int] = [0] + (prefix[nodes] - prefix[nodes - (nodes & -nodes)]).tolist()
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of games with each score"""
+        return np.array(self._counts, dtype=np.int64)
+
+    def add(self, score: int, count: int = 1) -> None:
+        if score >= self.size:
+            self._build(self.counts, score + 1)
+        self.total += count
+        self._counts[score] += count
+        tree = self._tree
+        node = score + 1
+        while node <= self.size:
+            tree[node] += count
+            node += node & -node
+
+    def count_below(self, score: int) -> int:
+        """Number of games that scored less than score"""
+        tree = self._tree
+        node = min(score, self.size)
+        total = 0
+        while node > 0:
+            total += tree[node]
+            node -= node & -node
+        return total
+
+    def rank(self, score: int) -> int:
+        """Position score would take on the leaderboard (1 is best; ties share a rank)"""
+        return 1 + self.total - self.count_below(score + 1)
+
+    def kth_lowest(self, k: int) -> int:
+        """Score at position k (from 0) of all games sorted by score"""
+        tree = self._tree
+        node = 0
+        step = self.size
+        while step:
+            if node + step <= self.size and tree[node + step] <= k:
+                node += step
+                k -= tree[node]
+            step //= 2
+        return node
+
+    def top(self, k: int) -> List[int]:
+        """The k best scores, best first"""
+        return [self.kth_lowest(self.total - 1 - i) for i in range(min(k, self.total))]
+
+
+class ScoreStore:
+    """Scores of every game played, on disk and in a RankIndex"""
+
+    def __init__(self, directory: str, snapshot_interval: int = SNAPSHOT_INTERVAL) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory: str = directory
+        self.snapshot_interval: int = snapshot_interval
+        self.log_path: str = os.path.join(directory, LOG_NAME)
+        self.snapshot_path: str = os.path.join(directory, SNAPSHOT_NAME)
+        self.index: RankIndex = RankIndex()
+        self.records: int = 0  # Valid records in the log
+        self.snapshot_records: int = 0  # Records covered by the snapshot on disk
+        self._load()
+        self._log = open(self.log_path, "ab")
+        if self.records - self.snapshot_records >= snapshot_interval:
+            self.snapshot()
+
+    def _load(self) -> None:
+        log_size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        if os.path.exists(self.snapshot_path):
+            with np.load(self.snapshot_path) as data:
+                records = int(data["records"])
+                if records * RECORD.itemsize <= log_size:
+                    self.index = RankIndex(data["counts"])
+                    self.snapshot_records = self.records = records
+        # Then every record appended since, up to the first torn one
+        tail = np.fromfile(self.log_path, dtype=RECORD, offset=self.records * RECORD.itemsize) \
+            if log_size else np.zeros(0, dtype=RECORD)
+        valid = tail["check"] == _checksums(tail["score"], tail["time"])
+        good = len(tail) if valid.all() else int(np.argmin(valid))
+        for score, count in enumerate(np.bincount(tail["score"][:good]).tolist()):
+            if count:
+                self.index.add(score, count)
+        self.records += good
+        if self.records * RECORD.itemsize < log_size:
+            os.truncate(self.log_path, self.records * RECORD.itemsize)
+
+    def __len__(self) -> int:
+        return self.records
+
+    def add(self, score: int, sync: bool = True) -> int:
+        """Record a finished game and return its rank"""
+        unix_time = int(time.time())
+        self._log.write(_RECORD_STRUCT.pack(score, unix_time, _checksum(score, unix_time)))
+        self._log.flush()
+        if sync:
+            os.fsync(self._log.fileno())
+        self.records += 1
+        self.index.add(score)
+        if self.records - self.snapshot_records >= self.snapshot_interval:
+            self.snapshot()
+        return self.index.rank(score)
+
+    def rank(self, score: int) -> int:
+        return self.index.rank(score)
+
+    def top(self, k: int) -> List[int]:
+        return self.index.top(k)
+
+    def snapshot(self) -> None:
+        """Write the counts per score, replacing the previous snapshot only once the new one is on disk"""
+        os.fsync(self._log.fileno())  # The snapshot must never cover records the log could still lose
+        temporary = self.snapshot_path + ".tmp"
+        with open(temporary, "wb") as file:
+            np.savez(file, counts=self.index.counts, records=self.records)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.snapshot_path)
+        self.snapshot_records = self.records
+
+    def close(self) -> None:
+        if self.records > self.snapshot_records:
+            self.snapshot()
+        self._log.close()
+
+    def __enter__(self) -> "ScoreStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Show the high-score leaderboard")
+    parser.add_argument("directory", nargs="?", default=None, help="score store (the per-user one by default)")
+    parser.add_argument("--top", type=int, default=10, help="scores to list")
+    parser.add_argument("--fill", type=int, default=0, help="first append this many random scores, to measure")
+    args = parser.parse_args(argv)
+
+    directory = args.directory or default_directory()
+    if args.fill:
+        with ScoreStore(directory) as store:
+            rng = np.random.default_rng()
+            started = time.perf_counter()
+            for score in rng.geometric(0.05, size=args.fill).tolist():
+                store.add(score, sync=False)
+            print(f"appended {args.fill:,} scores in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    store = ScoreStore(directory)
+    opened = time.perf_counter()
+    rank = store.rank(20)
+    ranked = time.perf_counter()
+    print(f"{len(store):,} games, opened in {(opened - started) * 1000:.1f} ms; "
+          f"a score of 20 ranks {rank:,} ({(ranked - opened) * 1e6:.0f} us)")
+    for position, score in enumerate(store.top(args.top), 1):
+        print(f"{position:4d}. {score}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Headless game simulation for Flappy Bird
+
+The Simulation class holds everything that used to live in the local variables
+of main() and advances it one frame per step() call. It never touches the
+display, uses its own seeded random generator and derives time from the frame
+counter, so the same seed and flap sequence always produce the same game.
+Obstacles are spawned from a pre-generated course (see course.py).
+"""
+
+import copy
+import random
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import pygame
+
+from flappy_bird.bird import Bird
+from flappy_bird.config import DEFAULT_CONFIG, GameConfig
+from flappy_bird.pipe import Pipe, HalfPipe
+from flappy_bird.heart import Heart
+from flappy_bird.collision import PIXEL_COLUMNS, hits as pixel_hits
+from flappy_bird.entities import BIRD_COLUMNS, EntityStore, KIND_HEART, KIND_PIPE
+from flappy_bird.palette import biome_index
+from flappy_bird.course import Course, CourseBuilder, HALF_PIPE_TOP, NO_HALF_PIPE, REPAIR_BLOCK
+from flappy_bird.telemetry import Telemetry
+from flappy_bird.constants import (
+    BIOMES, SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, FPS, MAX_LIVES, INVINCIBILITY_DURATION,
+    MAX_FALL_DAMAGE, HEART_HEAL_AMOUNT, Color
+)
+
+# Event names reported by Simulation.step()
+EVENT_FLAP: str = "flap"
+EVENT_HIT: str = "hit"
+EVENT_HEART: str = "heart"
+EVENT_SCORE: str = "score"
+
+
+def check_collision(bird: Bird, pipes: List[Pipe]) -> bool:
+    # Check collision with ground or ceiling
+    if bird.y >= SCREEN_HEIGHT - GROUND_HEIGHT - bird.radius or bird.y <= bird.radius:
+        return True
+
+    # Check collision with pipes
+    for pipe in pipes:
+        if pipe.collide(bird):
+            return True
+
+    return False
+
+
+def get_current_biome(score: int) -> Dict[str, Color]:
+    """Get the current biome based on the score"""
+    return BIOMES[biome_index(score)]
+
+
+def get_current_pipe_speed(score: int, config: GameConfig = DEFAULT_CONFIG) -> float:
+    """Calculate the current pipe speed based on the score"""
+    return config.pipe_speed(score)
+
+
+def _clone(entity: Any) -> Any:
+    """Shallow copy of a game object that does not share its Rects"""
+    clone = copy.copy(entity)
+    for name, value in vars(entity).items():
+        if isinstance(value, pygame.Rect):
+            setattr(clone, name, value.copy())
+    return clone
+
+
+class SimulationSnapshot(NamedTuple):
+    """Frozen copy of a Simulation, produced by snapshot() and consumed by restore()"""
+    attributes: Dict[str, Any]
+    bird: Bird
+    entities: EntityStore
+    pipes: Tuple[int, ...]  # Store slots of the pipes, half pipes and hearts, in order
+    half_pipes: Tuple[int, ...]
+    hearts: Tuple[int, ...]
+    rng_state: Any
+
+
+class Simulation:
+    """Display-free game state advanced one frame at a time"""
+
+    def __init__(self, seed: Optional[int] = None, course: Optional[Course] = None,
+                 config: GameConfig = DEFAULT_CONFIG) -> None:
+        self.seed: Optional[int] = seed
+        self.config: GameConfig = config  # Rules of every game played on this simulation
+        self.telemetry: Optional[Telemetry] = None  # Told about hits, hearts and points when set
+        self.rng: random.Random = random.Random(seed)
+        self.fixed_course: Optional[Course] = course  # Replayed by every game instead of drawing new ones
+        self.next_course_builder: Optional[CourseBuilder] = None  # Started by prepare_course() for the next game
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new game (the random generator carries on, so courses differ)"""
+        self.course_seed: int = self.rng.getrandbits(32)
+        # Grows the course as the game goes on (None when replaying a fixed course)
+        self.course_builder: Optional[CourseBuilder] = None
+        if self.fixed_course is not None:
+            self.course: Course = self.fixed_course
+        else:
+            builder = self.next_course_builder
+            if builder is None or builder.seed != self.course_seed or builder.config != self.config:
+                builder = CourseBuilder(self.course_seed, self.config)
+            self.course_builder = builder
+            self.course = builder.grow(REPAIR_BLOCK)  # Waits for prepare_course() if it is still building it
+        self.next_course_builder = None
+        self.bird: Bird = Bird(self.config.gravity, self.config.flap_strength)
+        # Columns behind the pipe, half pipe and heart views
+        # Pixel collision watches obstacles a little further out, where the rotated sprite and the caps reach
+        columns = PIXEL_COLUMNS if self.config.pixel_collision else BIRD_COLUMNS
+        self.entities: EntityStore = EntityStore(columns=columns, pipe_gap=self.config.pipe_gap)
+        self.pipes: List[Pipe] = []
+        self.half_pipes: List[HalfPipe] = []
+        self.hearts: List[Heart] = []
+        self.score: int = 0
+        self.biome: int = 0  # Index into BIOMES, follows the score
+        self.biome_tick: Optional[int] = None  # Tick the current biome was entered (None for the first one)
+        self.lives: float = MAX_LIVES
+        self.tick: int = 0
+        self.game_over: bool = False
+        self.invincible: bool = False  # Invincibility flag after getting hit
+        self.invincible_timer: int = 0  # Time the invincibility started (milliseconds)
+        self.max_height: float = SCREEN_HEIGHT // 2  # Highest point before falling
+        self.last_pipe: int = 0
+        self.last_heart: int = 0
+        self.next_pipe: int = 0  # Course index of the next pipe to spawn
+        self.next_half_pipe: int = 0  # Course index of the pipe the scheduled half pipe follows
+        self.next_half_pipe_time: int = 0  # Time when next half pipe should spawn
+        self.events: List[str] = []
+
+    def prepare_course(self) -> None:
+        """Grow the course a step past the pipes spawned so far, or once the game is over, start the next game's
+        course; for a thread of the game's, so that step() and reset() find the pipes ready"""
+        if self.course_builder is None:
+            return
+        if self.game_over:
+            # Nothing draws from the random generator until reset(), so the next game's course seed is known
+            peek = random.Random()
+            peek.setstate(self.rng.getstate())
+            builder = CourseBuilder(peek.getrandbits(32), self.config)
+            self.next_course_builder = builder
+            builder.grow(REPAIR_BLOCK)
+        else:
+            self.course_builder.grow(self.next_pipe + REPAIR_BLOCK)
+
+    @property
+    def now(self) -> int:
+        """Game time in milliseconds, derived from the frame counter"""
+        return self.tick * 1000 // FPS
+
+    def snapshot(self) -> SimulationSnapshot:
+        """Capture the full game state so it can be restored later"""
+        attributes = {name: value for name, value in vars(self).items()
+                      if name not in ("rng", "bird", "entities", "pipes", "half_pipes", "hearts", "events",
+                                      "telemetry", "next_course_builder")}
+        return SimulationSnapshot(
+            attributes=attributes,
+            bird=_clone(self.bird),
+            entities=self.entities.copy(),
+            pipes=tuple(pipe.slot for pipe in self.pipes),
+            half_pipes=tuple(half_pipe.slot for half_pipe in self.half_pipes),
+            hearts=tuple(heart.slot for heart in self.hearts),
+            rng_state=self.rng.getstate(),
+        )
+
+    def restore(self, snapshot: SimulationSnapshot) -> None:
+        """Return to a state captured by snapshot(); the snapshot stays reusable"""
+        for name, value in snapshot.attributes.items():
+            setattr(self, name, value)
+        self.bird = _clone(snapshot.bird)
+        self.entities = entities = snapshot.entities.copy()
+        self.pipes = [Pipe.view(entities, slot) for slot in snapshot.pipes]
+        self.half_pipes = [HalfPipe.view(entities, slot) for slot in snapshot.half_pipes]
+        self.hearts = [Heart.view(entities, slot) for slot in snapshot.hearts]
+        self.rng.setstate(snapshot.rng_state)
+        self.events = []
+
+    def step(self, flap: bool = False) -> List[str]:
+        """Advance the game by one frame and return the events that happened"""
+        self.events = []
+        if self.game_over:
+            return self.events
+
+        bird = self.bird
+        if flap:
+            bird.flap()
+            self.events.append(EVENT_FLAP)
+
+        self.tick += 1
+        time_now = self.now
+
+        # Update bird and track maximum height
+        bird.update()
+        if bird.y < self.max_height:
+            self.max_height = bird.y
+
+        # Calculate current pipe speed based on score
+        current_pipe_speed = self.config.pipe_speed(self.score)
+
+        self._spawn_pipes(time_now)
+        self._spawn_heart(time_now)
+
+        self._advance_obstacles(current_pipe_speed)
+
+        # Check collision with half pipes (only if not invincible)
+        if not self.invincible:
+            slot = self._hit_obstacle(pipes=False)
+            if slot is not None:
+                self._take_hit(slot)
+
+        # Collect hearts the bird touches
+        for heart in self.hearts[:]:
+            if (heart.slot in self.entities.watched and not heart.collected
+                    and bird.get_mask().colliderect(heart.get_rect())):
+                heart.collected = True
+                self.lives = min(self.lives + HEART_HEAL_AMOUNT, MAX_LIVES)  # Heal but don't exceed max
+                self.hearts.remove(heart)
+                self.entities.remove(heart.slot)
+                self.events.append(EVENT_HEART)
+                if self.telemetry is not None:
+                    self.telemetry.heart_collected(self.biome)
+
+        # Check for collisions with the ground, the ceiling and pipes (only if not invincible)
+        if not self.invincible:
+            if bird.y >= SCREEN_HEIGHT - GROUND_HEIGHT - bird.radius or bird.y <= bird.radius:
+                self._take_hit(None)
+            else:
+                slot = self._hit_obstacle(pipes=True)
+                if slot is not None:
+                    self._take_hit(slot)
+
+        # Update invincibility timer
+        if self.invincible and time_now - self.invincible_timer > INVINCIBILITY_DURATION:
+            self.invincible = False
+
+        self._count_score()
+        return self.events
+
+    def _advance_obstacles(self, current_pipe_speed: float) -> None:
+        """Scroll pipes, half pipes and hearts and drop the ones that left the screen"""
+        self.entities.advance(current_pipe_speed, self.now)
+        if self.entities.cull():
+            alive = self.entities.alive
+            self.pipes = [pipe for pipe in self.pipes if alive[pipe.slot]]
+            self.half_pipes = [half_pipe for half_pipe in self.half_pipes if alive[half_pipe.slot]]
+            self.hearts = [heart for heart in self.hearts if alive[heart.slot]]
+
+    def _hit_obstacle(self, pipes: bool) -> Optional[int]:
+        """Slot of a pipe (or with pipes=False a half pipe) the bird touches, if any"""
+        entities = self.entities
+        mask = None
+        for slot in entities.near():
+            kind = entities.kind[slot]
+            if kind != KIND_HEART and (kind == KIND_PIPE) == pipes:
+                if self.config.pixel_collision:
+                    hit = pixel_hits(entities, slot, self.bird)
+                else:
+                    if mask is None:
+                        mask = self.bird.get_mask()
+                    hit = entities.hits(slot, mask)
+                if hit:
+                    return slot
+        return None
+
+    def _count_score(self) -> None:
+        """Score the pipes that scrolled past the bird"""
+        for _ in range(self.entities.passed(self.bird.x)):
+            self.score += 1
+            self.events.append(EVENT_SCORE)
+            if self.telemetry is not None:
+                self.telemetry.scored(self.biome)
+            biome = biome_index(self.score)
+            if biome != self.biome:
+                self.biome = biome
+                self.biome_tick = self.tick
+
+    def _spawn_pipes(self, time_now: int) -> None:
+        """Spawn the next pipes and half pipes of the course in the current biome's colors"""
+        if time_now - self.last_pipe > self.config.pipe_frequency:
+            index = self._course_index(self.next_pipe)
+            course = self.course
+            # The course makes half of the pipes moving after score 40
+            self.pipes.append(Pipe(biome=self.biome, moving=bool(course.moving[index]),
+                                   height=int(course.gap_top[index]), move_phase=float(course.phase[index]),
+                                   store=self.entities))
+            self.last_pipe = time_now
+            self.next_pipe += 1
+
+            # After score 20, the course schedules half pipes to spawn exactly midway
+            if course.half_pipe[index] != NO_HALF_PIPE:
+                self.next_half_pipe = index
+                self.next_half_pipe_time = time_now + (self.config.pipe_frequency // 2)
+
+        # Spawn scheduled half pipe at the midway point
+        if time_now >= self.next_half_pipe_time and self.next_half_pipe_time > 0:
+            index = self.next_half_pipe
+            course = self.course
+            position = HalfPipe.TOP if course.half_pipe[index] == HALF_PIPE_TOP else HalfPipe.BOTTOM
+            self.half_pipes.append(HalfPipe(biome=self.biome, position=position,
+                                            height=int(course.half_pipe_height[index]),
+                                            move_phase=float(course.phase[index]), store=self.entities))
+            self.next_half_pipe_time = 0  # Reset scheduled spawn
+
+    def _course_index(self, pipe_number: int) -> int:
+        """Course index of a pipe, growing a generated course or looping a fixed one as needed"""
+        length = len(self.course.spawn_tick)
+        if pipe_number < length:
+            return pipe_number
+        if self.course_builder is None:
+            return pipe_number % length
+        # Only the new pipes are checked, so this costs a restart's worth of work, and the pipes on screen stay put
+        self.course = self.course_builder.grow(pipe_number + 1)
+        return pipe_number
+
+    def _spawn_heart(self, time_now: int) -> None:
+        """Spawn a heart at a safe height that avoids pipes"""
+        if time_now - self.last_heart <= self.config.heart_frequency:
+            return
+        min_y = 100
+        max_y = SCREEN_HEIGHT - GROUND_HEIGHT - 100
+        heart_y = self.rng.uniform(min_y, max_y)
+
+        # Only spawn if heart won't appear inside or too close to a pipe
+        heart_spawn_x = SCREEN_WIDTH + 50
+        for pipe in self.pipes:
+            # Check if pipe is within spawn area (next 200 pixels)
+            if pipe.x < heart_spawn_x + 200 and pipe.x + 60 > heart_spawn_x - 50:
+                # Heart needs to be in the gap with some margin
+                margin = 50  # Extra safety margin
+                if not (pipe.top_pipe.height + margin < heart_y < pipe.bottom_pipe.y - margin):
+                    return
+
+        self.hearts.append(Heart(heart_spawn_x, heart_y, store=self.entities))
+        if self.telemetry is not None:
+            self.telemetry.heart_spawned(self.biome)
+        self.last_heart = time_now
+
+    def _take_hit(self, slot: Optional[int]) -> None:
+        """Apply fall damage for a collision with the obstacle in slot (None for the ground or ceiling)
+
+        The bird respawns, or the game ends.
+        """
+        # Calculate damage based on fall distance (0.5 hearts per 100 pixels fallen, max 3)
+        fall_distance = self.bird.y - self.max_height
+        if fall_distance > self.config.fall_damage_threshold:
+            damage = min(int(fall_distance / 100) * 0.5 + 0.5, MAX_FALL_DAMAGE)
+        else:
+            damage = 0.5  # Minimum 0.5 damage for any collision
+
+        self.lives -= damage
+        self.events.append(EVENT_HIT)
+        if self.telemetry is not None:
+            self.telemetry.hit(self, slot, fall_distance, damage, fatal=self.lives <= 0)
+        if self.lives <= 0:
+            self.game_over = True  # Game over when no lives left
+        else:
+            # Become invincible for a short period and reset the bird
+            self.invincible = True
+            self.invincible_timer = self.now
+            self.bird.y = SCREEN_HEIGHT // 2
+            self.bird.velocity = 0
+            self.max_height = self.bird.y
@@ -0,0 +1,264 @@
+"""Soak test: hours of unattended play checked for memory growth and frame-time drift
+
+Kiosks run the game for days, so a leak of a few surfaces or rects per frame
+matters even though no single game shows it. run() plays the game loop as
+fast as it can, without sleeping between frames: a scripted bot flies game
+after game, each until it reaches a target score (by default past every
+biome and into the half pipe and moving pipe phases) and then lets the bird
+fall, the game over screen stays up for two seconds and the next game starts.
+Every frame is stepped, given its sounds and particle effects, drawn (or
+handed to the render thread with threaded=True), presented and flipped like
+in the game. run() only uses pygame, which the caller initializes and quits;
+main() does so with the SDL dummy drivers when no window size is given.
+
+At every sample it records the resident set size, the memory tracemalloc
+traces, the most pipes, half pipes and hearts alive at once and the entity
+store's capacity since the previous sample, and percentiles of the frame
+times since then. report() compares the second half of the samples with the
+first (the first sample is the warm-up and left out) and flags a series
+whose mean grew by more than its tolerance, or that grew at every sample by
+more than a fifth of it in all. Entity counts depend on how far the current
+game is, so samples should be far enough apart to span a few games each.
+It also lists the source lines whose traced allocations grew the most.
+Tracing slows every allocation, and with threaded=True the render thread's
+allocations contend with the loop's, so frame times of threaded runs are best
+checked without tracemalloc.
+
+Run ``python -m flappy_bird.soak --hours 4`` for four simulated hours; it
+exits with status 1 when anything is flagged.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pygame
+
+from flappy_bird.constants import FPS
+
+GAME_SCORE: int = 60  # Score each game is played to: every biome, half pipes from 20 and moving pipes from 40
+GAME_OVER_FRAMES: int = 2 * FPS  # Frames the game over screen stays up before the next game
+TOP_LINES: int = 10  # Source lines listed by allocation growth
+
+# Relative growth of the mean from the first to the second half of the samples that is flagged
+TOLERANCES: Dict[str, float] = {
+    "rss": 0.05, "traced": 0.05, "pipes": 0.25, "half_pipes": 0.25, "hearts": 0.25, "slots": 0.0,
+    "p50": 0.25, "p99": 0.5,
+}
+
+
+class Sample(NamedTuple):
+    """State of a soak run at one moment"""
+    hours: float  # Simulated hours played so far
+    games: int
+    rss: Optional[int]  # Bytes resident (None where it cannot be read)
+    traced: Optional[int]  # Bytes traced by tracemalloc (None when it is off)
+    pipes: int  # Most pipes alive at once since the previous sample
+    half_pipes: int
+    hearts: int
+    slots: int  # Capacity of the entity store
+    p50: float  # Frame time percentiles since the previous sample, in milliseconds
+    p99: float
+    worst: float
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process; the peak where only that is known, None where neither is"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Bytes on macOS, kilobytes elsewhere
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+
+
+def run(hours: float, samples: int = 12, threaded: bool = False, window: Optional[Tuple[int, int]] = None,
+        trace: bool = True, game_score: int = GAME_SCORE,
+        progress: bool = False) -> Tuple[List[Sample], List[tracemalloc.StatisticDiff]]:
+    """Play hours of simulated time with pygame initialized; return the samples and the lines whose
+    allocations grew the most"""
+    from flappy_bird.display import Presenter
+    from flappy_bird.golden import MARGINS, scripted_flap, state_values
+    from flappy_bird.particles import FEATHERS, HEART_DUST, SPARKLES, ParticleSystem
+    from flappy_bird.render import RenderSnapshot, RenderThread, draw_frame
+    from flappy_bird.simulation import EVENT_HEART, EVENT_HIT, EVENT_SCORE, Simulation
+    from flappy_bird.sounds import hit_sound, point_sound
+    from flappy_bird.startup import get_font
+
+    presenter = Presenter(window)
+    font = get_font(24)
+    renderer = RenderThread(font) if threaded else None
+    particles = ParticleSystem(seed=0)
+    sim = Simulation(0)
+    if trace:
+        tracemalloc.start()
+    first: Optional[tracemalloc.Snapshot] = None
+
+    total_frames = int(hours * 3600 * FPS)
+    every = max(1, total_frames // samples)
+    frame_times = np.zeros(every)
+    results: List[Sample] = []
+    games, game_over_frames = 0, 0
+    most = [0, 0, 0]  # Pipes, half pipes and hearts
+    for frame in range(total_frames):
+        started = time.perf_counter()
+        pygame.event.get()
+        state = "game_over" if sim.game_over else "playing"
+        if sim.game_over:
+            game_over_frames += 1
+            if game_over_frames == GAME_OVER_FRAMES:
+                sim.reset()
+                games, game_over_frames = games + 1, 0
+        else:
+            # Fly to the target score, then let the bird fall until the game is over
+            flap = sim.score < game_score and scripted_flap(state_values(sim), MARGINS[games % len(MARGINS)])
+            bird_x, bird_y = sim.bird.x, sim.bird.y
+            events = sim.step(flap)
+            if EVENT_HIT in events:
+                hit_sound.play()
+                particles.emit(FEATHERS, bird_x, bird_y)
+            if EVENT_SCORE in events:
+                point_sound.play()
+                particles.emit(SPARKLES, sim.bird.x, sim.bird.y)
+            if EVENT_HEART in events:
+                particles.emit(HEART_DUST, sim.bird.x, sim.bird.y)
+            most = [max(most[0], len(sim.pipes)), max(most[1], len(sim.half_pipes)), max(most[2], len(sim.hearts))]
+        particles.update()
+        elapsed = sim.now
+        if renderer is not None:
+            renderer.submit(RenderSnapshot.capture(sim, state, elapsed, particles=particles.frame()))
+            renderer.present(presenter)
+        else:
+            draw_frame(presenter.surface, sim, font, state, elapsed, particles=particles.frame())
+            presenter.present()
+        pygame.display.flip()
+        frame_times[frame % every] = time.perf_counter() - started
+
+        if (frame + 1) % every == 0:
+            p50, p99, worst = np.percentile(frame_times, (50, 99, 100)) * 1000
+            if renderer is not None:
+                renderer.wait()  # A frame being drawn is not growth
+            traced = None
+            if trace:
+                traced = tracemalloc.get_traced_memory()[0]
+                if first is None:
+                    first = _take_snapshot()  # After the first sample, so what it imports is not counted as growth
+            results.append(Sample((frame + 1) / (3600 * FPS), games, rss_bytes(), traced, most[0], most[1], most[2],
+                                  sim.entities.capacity, float(p50), float(p99), float(worst)))
+            most = [0, 0, 0]
+            if progress:
+                print(format_sample(results[-1]), file=sys.stderr)
+
+    growth: List[tracemalloc.StatisticDiff] = []
+    if trace:
+        if first is not None:
+            growth = [diff for diff in _take_snapshot().compare_to(first, "lineno") if diff.size_diff > 0]
+        if pygame.mixer.get_init():
+            # A sound that ends calls into Python from SDL's audio thread, which can crash a tracemalloc.stop()
+            # running at the same time (fixed in CPython 3.12.9 and 3.13.2)
+            pygame.mixer.stop()
+        tracemalloc.stop()
+    if renderer is not None:
+        renderer.stop()
+    return results, growth[:TOP_LINES]
+
+
+def format_sample(sample: Sample) -> str:
+    memory = "" if sample.rss is None else f"rss {sample.rss / 2 ** 20:.1f} MB, "
+    if sample.traced is not None:
+        memory += f"traced {sample.traced / 2 ** 20:.2f} MB, "
+    return (f"{sample.hours:6.2f} h, {sample.games:,} games: {memory}pipes {sample.pipes}, "
+            f"half pipes {sample.half_pipes}, hearts {sample.hearts}, slots {sample.slots}, "
+            f"frame p50 {sample.p50:.2f} ms, p99 {sample.p99:.2f} ms, worst {sample.worst:.1f} ms")
+
+
+def drift(values: Sequence[float], tolerance: float) -> Optional[str]:
+    """Why a series of samples grows or drifts (None if it does not), leaving out the first as the warm-up"""
+    values = list(values[1:])
+    if len(values) < 4:
+        return None
+    half = len(values) // 2
+    before, after = float(np.mean(values[:half])), float(np.mean(values[half:]))
+    if after > before * (1 + tolerance) and after > before:
+        change = f"{after / before - 1:+.1%}" if before else "from 0"
+        return f"mean {change} from the first to the second half"
+    if (all(later > earlier for earlier, later in zip(values, values[1:]))
+            and values[-1] > values[0] * (1 + tolerance / 5)):
+        return f"grew at every sample, {values[-1] / values[0] - 1:+.1%} in all"
+    return None
+
+
+def report(samples: List[Sample], growth: Sequence[tracemalloc.StatisticDiff] = ()) -> Tuple[List[str], List[str]]:
+    """Report lines and the names of the flagged series"""
+    lines = [format_sample(sample) for sample in samples]
+    flagged = []
+    for name, tolerance in TOLERANCES.items():
+        values = [getattr(sample, name) for sample in samples]
+        if None in values:
+            continue
+        reason = drift(values, tolerance)
+        if reason is not None:
+            flagged.append(name)
+            lines.append(f"DRIFT {name}: {reason}")
+    if growth:
+        lines.append("largest growth of traced allocations since the first sample:")
+        lines += [f"  {diff.size_diff / 1024:+9.1f} KiB {diff.count_diff:+7,} blocks  {diff.traceback}"
+                  for diff in growth]
+    lines.append(f"flagged: {', '.join(flagged)}" if flagged else "no growth or drift")
+    return lines, flagged
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Play hours of the game headless and flag memory growth and "
+                                                 "frame-time drift")
+    parser.add_argument("--hours", type=float, default=1.0, help="simulated hours to play")
+    parser.add_argument("--samples", type=int, default=12, help="samples over the run")
+    parser.add_argument("--game-score", type=int, default=GAME_SCORE, help="score each game is played to")
+    parser.add_argument("--threaded", action="store_true", help="draw on the render thread")
+    parser.add_argument("--window", default=None, help="open a window of WIDTHxHEIGHT instead of running headless")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="do not trace allocations (faster, but no traced memory or top allocators)")
+    args = parser.parse_args(argv)
+
+    from flappy_bird.display import parse_size
+
+    try:
+        window = parse_size(args.window) if args.window else None
+    except ValueError as error:
+        parser.error(str(error))
+    if window is None:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    started = time.perf_counter()
+    try:
+        samples, growth = run(args.hours, args.samples, args.threaded, window, not args.no_tracemalloc,
+                              args.game_score, progress=True)
+    finally:
+        pygame.quit()
+    lines, flagged = report(samples, growth)
+    print("\n".join(lines))
+    print(f"{args.hours:g} simulated hours in {time.perf_counter() - started:.0f} s")
+    if flagged:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,150 +1,160 @@
-"""Sound functions for Flappy Bird"""
+"""Sound functions for Flappy Bird
+
+Sounds are synthesized on first use rather than at import, since the mixer is
+only initialized by pygame.init() and synthesis costs startup time. The game
+calls warm_up() on its warm-up thread so the first flap does not pay for it.
+Without a mixer, or without numpy support in pygame.sndarray, every sound is
+silent. When pygame quits, playback is stopped before the sounds are dropped,
+so no Sound is freed while SDL's audio thread is still mixing it; they are
+synthesized again once the mixer is back.
+"""
+
+import threading
+from typing import Any, Callable
 
 import pygame
-from typing import Any
+
+SAMPLE_RATE: int = 22050
+
+_quit_hook_registered: bool = False  # pygame forgets its quit hooks when it quits
+
 
 # Define dummy sound objects if mixer is not available
 class DummySound:
     def play(self) -> None: pass
 
+
+class SynthesizedSound:
+    """A sound synthesized the first time it is played or loaded while the mixer is initialized"""
+
+    def __init__(self, create: Callable[[], Any]) -> None:
+        self._create = create
+        self._sound: Any = None
+        self._lock = threading.Lock()  # The warm-up thread and the game loop may both load it
+
+    def load(self) -> bool:
+        """Synthesize the sound now if the mixer is up; return whether it can play"""
+        if self._sound is None:
+            if not pygame.mixer.get_init():
+                return False
+            with self._lock:
+                if self._sound is None:
+                    try:
+                        if pygame.sndarray.get_arraytype() != 'numpy':
+                            raise ImportError("sndarray not available")
+                        self._sound = self._create()
+                        _register_quit_hook()
+                    except (ImportError, AttributeError, NotImplementedError, ValueError, pygame.error):
+                        # Fallback if numpy, sndarray, or a stereo mixer isn't available
+                        self._sound = DummySound()
+        return True
+
+    def unload(self) -> None:
+        self._sound = None
+
+    def play(self) -> None:
+        if self.load():
+            self._sound.play()
+
+
+def _register_quit_hook() -> None:
+    global _quit_hook_registered
+    if not _quit_hook_registered:
+        pygame.register_quit(unload)  # Sounds must not outlive the mixer
+        _quit_hook_registered = True
+
+
+def unload() -> None:
+    """Stop playback and drop every synthesized sound; runs when pygame quits"""
+    global _quit_hook_registered
+    _quit_hook_registered = False
+    if pygame.mixer.get_init():
+        pygame.mixer.stop()  # Waits for the audio thread to let go of the channels
+    for sound in (flap_sound, hit_sound, point_sound):
+        sound.unload()
+
+
+def _stereo(samples: Any) -> Any:
+    """Sound from mono float samples, one copy per channel"""
+    import numpy
+    arr = numpy.repeat(samples[:, None], 2, axis=1)
+    return pygame.sndarray.make_sound(arr.astype(numpy.int16))
+
+
+def _times(duration_ms: int) -> Any:
+    import numpy
+    n_samples: int = int(round(duration_ms * SAMPLE_RATE / 1000.0))
+    return numpy.arange(n_samples) / SAMPLE_RATE
+
+
+def create_flap_sound() -> pygame.mixer.Sound:
+    """Create a more complex flap sound effect"""
+    import numpy
+    duration: float = 120 / 1000
+    t = _times(120)
+
+    # Create a combination of frequencies that decrease over time
+    freq1 = 523.25 * (1 - t / duration)  # Decreasing C note
+    freq2 = 659.25 * (1 - t / duration)  # Decreasing E note
+
+    # Create a more complex waveform combining multiple harmonics
+    val = 0.3 * numpy.sin(2 * numpy.pi * freq1 * t)
+    val += 0.2 * numpy.sin(2 * numpy.pi * freq2 * t)
+    val += 0.1 * numpy.sin(2 * numpy.pi * freq1 * 2 * t)  # Harmonic
+    val += 0.1 * numpy.sin(2 * numpy.pi * freq2 * 1.5 * t)  # Harmonic
+
+    # Apply envelope to make it sound more natural
+    val *= 1.0 - (t / duration) ** 2  # Quadratic fade
+    return _stereo(val * 0.3 * 32767.0)  # Volume control
+
+
+def create_hit_sound() -> pygame.mixer.Sound:
+    """Create a more complex hit sound effect"""
+    import numpy
+    duration: float = 400 / 1000
+    t = _times(400)
+
+    # Create a noise-like sound with multiple decreasing frequencies
+    total_val = numpy.zeros_like(t)
+    for harmonic in range(1, 5):
+        freq = 220.00 / harmonic * (1 - t / duration)  # Decreasing frequency
+        total_val += numpy.sin(2 * numpy.pi * freq * t) / harmonic
+
+    # Add some white noise for impact
+    total_val += numpy.random.uniform(-0.1, 0.1, len(t)) * (1 - t / duration)
+
+    # Apply envelope for realistic decay
+    total_val *= numpy.exp(-t * 3)  # Exponential decay
+    return _stereo(total_val * 0.5 * 32767.0)  # Volume control
+
+
+def create_point_sound() -> pygame.mixer.Sound:
+    """Create a more complex point sound effect"""
+    import numpy
+    duration: float = 200 / 1000
+    t = _times(200)
+
+    # Play a pleasant arpeggio: C, E and G notes in sequence
+    note_duration: float = duration / 3
+    freq = numpy.select([t < note_duration, t < 2 * note_duration], [523.25, 659.25], 783.99)
+    val = numpy.sin(2 * numpy.pi * freq * t)
+
+    # Apply envelope for clean attack and decay
+    attack_time: float = 0.02  # 20ms attack
+    release_time: float = 0.1  # 100ms release
+    envelope = numpy.ones_like(t)  # Sustain
+    envelope = numpy.where(t > duration - release_time, (duration - t) / release_time, envelope)  # Linear release
+    envelope = numpy.where(t < attack_time, t / attack_time, envelope)  # Linear attack
+    return _stereo(val * envelope * 0.4 * 32767.0)  # Volume control
+
+
 # Global variables for sounds
-flap_sound: Any
-hit_sound: Any
-point_sound: Any
-
-# Since pygame.sndarray might not be available, create a fallback
-try:
-    # Check if pygame.mixer is available
-    if not hasattr(pygame, 'mixer') or not pygame.mixer.get_init():
-        # Define dummy sound objects if mixer is not available
-        flap_sound = DummySound()
-        hit_sound = DummySound()
-        point_sound = DummySound()
-    else:
-        import numpy
-        # Create more complex sound effects programmatically
-        def create_flap_sound() -> pygame.mixer.Sound:
-            """Create a more complex flap sound effect"""
-            sample_rate: int = 22050
-            duration_ms: int = 120
-            n_samples: int = int(round(duration_ms * sample_rate / 1000.0))
-
-            # Generate samples for stereo (2 channels)
-            arr = numpy.zeros((n_samples, 2))
-            for i in range(n_samples):
-                t: float = float(i) / sample_rate
-
-                # Create a combination of frequencies that decrease over time
-                freq1: float = 523.25 * (1 - t / (duration_ms/1000))  # Decreasing C note
-                freq2: float = 659.25 * (1 - t / (duration_ms/1000))  # Decreasing E note
-
-                # Create a more complex waveform combining multiple harmonics
-                val: float = 0.3 * numpy.sin(2 * numpy.pi * freq1 * t)
-                val += 0.2 * numpy.sin(2 * numpy.pi * freq2 * t)
-                val += 0.1 * numpy.sin(2 * numpy.pi * freq1 * 2 * t)  # Harmonic
-                val += 0.1 * numpy.sin(2 * numpy.pi * freq2 * 1.5 * t)  # Harmonic
-
-                # Apply envelope to make it sound more natural
-                envelope: float = 1.0 - (t / (duration_ms/1000)) ** 2  # Quadratic fade
-                val *= envelope
-
-                val *= 0.3 * 32767.0  # Volume control
-                arr[i][0] = val  # Left channel
-                arr[i][1] = val  # Right channel
-
-            # Convert to int16 and create sound
-            arr = arr.astype(numpy.int16)
-            sound = pygame.sndarray.make_sound(arr)
-            return sound
-
-        def create_hit_sound() -> pygame.mixer.Sound:
-            """Create a more complex hit sound effect"""
-            sample_rate: int = 22050
-            duration_ms: int = 400
-            n_samples: int = int(round(duration_ms * sample_rate / 1000.0))
-
-            # Generate samples for stereo (2 channels)
-            arr = numpy.zeros((n_samples, 2))
-            for i in range(n_samples):
-                t: float = float(i) / sample_rate
-
-                # Create a noise-like sound with multiple decreasing frequencies
-                total_val: float = 0
-                for harmonic in range(1, 5):
-                    freq: float = 220.00 / harmonic * (1 - t / (duration_ms/1000))  # Decreasing frequency
-                    total_val += numpy.sin(2 * numpy.pi * freq * t) / harmonic
-
-                # Add some white noise for impact
-                noise_factor: float = numpy.random.uniform(-0.1, 0.1) * (1 - t / (duration_ms/1000))
-                total_val += noise_factor
-
-                # Apply envelope for realistic decay
-                envelope: float = numpy.exp(-t * 3)  # Exponential decay
-                total_val *= envelope
-
-                total_val *= 0.5 * 32767.0  # Volume control
-                arr[i][0] = total_val  # Left channel
-                arr[i][1] = total_val  # Right channel
-
-            # Convert to int16 and create sound
-            arr = arr.astype(numpy.int16)
-            sound = pygame.sndarray.make_sound(arr)
-            return sound
-
-        def create_point_sound() -> pygame.mixer.Sound:
-            """Create a more complex point sound effect"""
-            sample_rate: int = 22050
-            duration_ms: int = 200
-            n_samples: int = int(round(duration_ms * sample_rate / 1000.0))
-
-            # Generate samples for stereo (2 channels)
-            arr = numpy.zeros((n_samples, 2))
-            for i in range(n_samples):
-                t: float = float(i) / sample_rate
-
-                # Create a pleasant arpeggiated sound
-                freq1: float = 523.25  # C note
-                freq2: float = 659.25  # E note
-                freq3: float = 783.99  # G note
-
-                # Play notes in sequence
-                note_duration: float = (duration_ms/1000) / 3
-                if t < note_duration:
-                    val: float = numpy.sin(2 * numpy.pi * freq1 * t)
-                elif t < 2 * note_duration:
-                    val = numpy.sin(2 * numpy.pi * freq2 * t)
-                else:
-                    val = numpy.sin(2 * numpy.pi * freq3 * t)
-
-                # Apply envelope for clean attack and decay
-                attack_time: float = 0.02  # 20ms attack
-                release_time: float = 0.1  # 100ms release
-                if t < attack_time:
-                    envelope: float = t / attack_time  # Linear attack
-                elif t > (duration_ms/1000 - release_time):
-                    envelope = (duration_ms/1000 - t) / release_time  # Linear release
-                else:
-                    envelope = 1.0  # Sustain
-
-                val *= envelope
-                val *= 0.4 * 32767.0  # Volume control
-                arr[i][0] = val  # Left channel
-                arr[i][1] = val  # Right channel
-
-            # Convert to int16 and create sound
-            arr = arr.astype(numpy.int16)
-            sound = pygame.sndarray.make_sound(arr)
-            return sound
-
-        # Initialize sounds
-        if pygame.sndarray.get_arraytype() != 'numpy':
-            raise ImportError("sndarray not available")
-        flap_sound = create_flap_sound()
-        hit_sound = create_hit_sound()
-        point_sound = create_point_sound()
-        
-except (ImportError, AttributeError, NotImplementedError):
-    # Fallback if numpy, sndarray, or mixer isn't available
-    flap_sound = DummySound()
-    hit_sound = DummySound()
-    point_sound = DummySound()
\ No newline at end of file
+flap_sound: Any = SynthesizedSound(create_flap_sound)
+hit_sound: Any = SynthesizedSound(create_hit_sound)
+point_sound: Any = SynthesizedSound(create_point_sound)
+
+
+def warm_up() -> None:
+    """Synthesize every sound now, if the mixer is initialized"""
+    for sound in (flap_sound, hit_sound, point_sound):
+        sound.load()
@@ -0,0 +1,130 @@
+"""Fast startup: cached font discovery and background warm-up
+
+Finding a system font by name scans every installed font (pygame asks
+fc-list on Linux), which can take longer than everything else before the
+first frame. font_path() does the scan once and remembers the resolved file
+in the user's cache directory, so later runs open the file directly; a cached
+path that no longer exists is looked up again. get_font() keeps one Font per
+size until pygame quits instead of opening the file every frame.
+
+The game shows its start screen before importing the simulation and the other
+modules a game needs. A WarmUp thread imports them, builds the first game and
+fills the sprite, sound and palette caches while the start screen is up, and
+the game only waits for it when the player starts before it is done.
+
+Layout::
+
+    ~/.cache/flappy-bird/
+        fonts.json      font name -> resolved font file (null when not installed)
+
+Run ``python -m flappy_bird.startup`` to measure the time from launching the
+game to its first presented frame.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import pygame
+
+FONT_NAME: str = "arial"
+FONT_CACHE_NAME: str = "fonts.json"
+
+_fonts: Dict[Tuple[str, int], Any] = {}
+
+
+def cache_directory() -> str:
+    """Per-user cache directory of the game"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "flappy-bird")
+
+
+def font_path(name: str = FONT_NAME, directory: Optional[str] = None) -> Optional[str]:
+    """File of the system font name (None if it is not installed), from the cache when it is there"""
+    path = os.path.join(directory or cache_directory(), FONT_CACHE_NAME)
+    cached: Dict[str, Optional[str]] = {}
+    try:
+        with open(path) as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        pass
+    if name in cached and (cached[name] is None or os.path.exists(str(cached[name]))):
+        return cached[name]
+    cached[name] = pygame.font.match_font(name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(cached, file)
+        os.replace(temporary, path)
+    except OSError:
+        pass  # A read-only cache only costs the scan next time
+    return cached[name]
+
+
+def get_font(size: int, name: str = FONT_NAME) -> Any:
+    """The font name at size, opened once until pygame quits; pygame's default font if it cannot be loaded"""
+    font = _fonts.get((name, size))
+    if font is None:
+        if not _fonts:
+            pygame.register_quit(_fonts.clear)  # Fonts must not outlive the font module
+        try:
+            font = pygame.font.Font(font_path(name), size)
+        except (pygame.error, OSError, NotImplementedError):
+            font = pygame.font.Font(None, size)
+        _fonts[name, size] = font
+    return font
+
+
+class WarmUp(threading.Thread):
+    """Runs a function on a daemon thread; result() waits for it and returns what it returned"""
+
+    def __init__(self, target: Callable[[], Any]) -> None:
+        super().__init__(name="warm-up", daemon=True)
+        self._target = target
+        self._result: Any = None
+        self._error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        try:
+            self._result = self._target()
+        except BaseException as error:  # Raised again in the thread that asks for the result
+            self._error = error
+
+    def result(self) -> Any:
+        self.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure the time from launching the game to its first frame")
+    parser.add_argument("--runs", type=int, default=5, help="launches to time")
+    parser.add_argument("--cold", action="store_true", help="clear the font cache before every launch")
+    args = parser.parse_args(argv)
+
+    samples = []
+    for _ in range(args.runs):
+        if args.cold:
+            try:
+                os.remove(os.path.join(cache_directory(), FONT_CACHE_NAME))
+            except OSError:
+                pass
+        launched = time.time()
+        output = subprocess.run([sys.executable, "-m", "flappy_bird.game", "--first-frame"],
+                                check=True, capture_output=True, text=True).stdout
+        # The game prints the wall clock time its first frame was presented
+        samples.append((float(output.split()[-1]) - launched) * 1000)
+    samples.sort()
+    print(f"time to first frame over {args.runs} launches: median {samples[len(samples) // 2]:.0f} ms, "
+          f"best {samples[0]:.0f} ms, worst {samples[-1]:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Difficulty sweeps over grids of game configs
+
+A sweep plays many episodes under every config of a grid and reports, per
+config, the survival curve (the fraction of episodes still going after each
+second) and the distribution of final scores. Episodes are played by the
+game's rules, with lives, fall damage and heart pickups, and end at game over
+or at a tick limit, so every config is measured the same way.
+
+Two bots play. The scripted bot flies a Population: a batch of birds stepped
+together as NumPy arrays on one course, each with its own lives and flapping
+whenever it sinks within its own margin of the bottom of the next opening.
+Margins are spread over a range, so a batch covers players from clumsy to
+careful, and a core plays thousands of episodes per second. The autopilot bot runs the beam search on
+one Simulation per episode; it is far slower and shows what a near-perfect
+player makes of a config.
+
+Work is split into tasks of one batch of episodes for one config, run by a
+process pool. Batch n of every config flies the course of seed + n, so configs
+are compared on the same random draws.
+
+Run ``python -m flappy_bird.sweep --set pipe_gap=150,175,200 --episodes 100000``
+to sweep a grid.
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from flappy_bird.autopilot import Autopilot
+from flappy_bird.config import DEFAULT_CONFIG, GameConfig, parse_config
+from flappy_bird.constants import SCREEN_HEIGHT, FPS
+from flappy_bird.observation import N_FEATURES
+from flappy_bird.population import Population
+from flappy_bird.simulation import Simulation
+
+BOTS: Tuple[str, ...] = ("scripted", "autopilot")
+BATCH: int = 1000  # Episodes per task of the scripted bot
+AUTOPILOT_BATCH: int = 4  # Episodes per task of the autopilot
+SCRIPTED_MARGINS: Tuple[float, float] = (5.0, 110.0)  # Range of flap margins above the bottom of the gap, in pixels
+MAX_TICKS: int = 120 * FPS
+PERCENTILES: Tuple[int, ...] = (10, 25, 50, 75, 90, 99)
+
+
+class _Task(NamedTuple):
+    """One batch of episodes of one config"""
+    config_index: int  # Position of the config in the grid
+    config: GameConfig
+    seed: int  # Course seed
+    episodes: int
+    bot: str
+    max_ticks: int
+    nodes: int  # Autopilot planning budget
+
+
+class SweepResult(NamedTuple):
+    """Every episode played under one config"""
+    config: GameConfig
+    ticks: np.ndarray  # Tick each episode ended on (max_ticks if the game was not over)
+    scores: np.ndarray  # Score of each episode
+
+    def survival(self, max_ticks: int) -> np.ndarray:
+        """Fraction of episodes still going after each whole second up to max_ticks"""
+        seconds = np.arange(max_ticks // FPS + 1) * FPS
+        crashes = np.sort(self.ticks[self.ticks < max_ticks])
+        return 1.0 - np.searchsorted(crashes, seconds, side="right") / max(1, len(self.ticks))
+
+    def percentiles(self) -> Dict[int, float]:
+        """Score at each of PERCENTILES"""
+        values = np.percentile(self.scores, PERCENTILES) if len(self.scores) else np.zeros(len(PERCENTILES))
+        return dict(zip(PERCENTILES, values.tolist()))
+
+    def summary(self, max_ticks: int) -> Dict[str, object]:
+        """Survival curve and score distribution as plain JSON values"""
+        return {
+            "config": self.config.overrides(),
+            "episodes": len(self.scores),
+            "survival": self.survival(max_ticks).round(6).tolist(),
+            "mean_score": float(self.scores.mean()) if len(self.scores) else 0.0,
+            "percentiles": {str(p): value for p, value in self.percentiles().items()},
+            "histogram": np.bincount(self.scores).tolist(),
+        }
+
+
+def config_grid(axes: Sequence[str], base: GameConfig = DEFAULT_CONFIG) -> List[GameConfig]:
+    """Every combination of axes such as "pipe_gap=150,175,200", on top of base"""
+    choices = []
+    for axis in axes:
+        name, _, values = axis.partition("=")
+        choices.append([f"{name}={value}" for value in values.split(",")])
+    return [parse_config(assignments, base) for assignments in itertools.product(*choices)]
+
+
+def _scripted_episodes(task: _Task) -> Tuple[np.ndarray, np.ndarray]:
+    population = Population(task.episodes, seed=task.seed, config=task.config, single_life=False)
+    margins = np.random.default_rng(task.seed).uniform(*SCRIPTED_MARGINS, size=task.episodes)
+    features = np.empty((task.episodes, N_FEATURES), dtype=np.float32)
+    while not population.game_over and population.tick < task.max_ticks:
+        rows = population.observe(features)
+        # Flap when the bird sinks within its margin of the bottom of the next opening
+        gap_bottom = rows[:, 3] * SCREEN_HEIGHT - margins[population.alive_ids]
+        population.step(rows[:, 0] * SCREEN_HEIGHT > gap_bottom)
+    survived = population.death_tick < 0
+    ticks = np.where(survived, task.max_ticks, population.death_tick)
+    scores = np.where(survived, population.score, population.death_score)
+    return ticks, scores
+
+
+def _autopilot_episodes(task: _Task) -> Tuple[np.ndarray, np.ndarray]:
+    ticks = np.full(task.episodes, task.max_ticks, dtype=np.int64)
+    scores = np.zeros(task.episodes, dtype=np.int64)
+    autopilot = Autopilot(nodes_per_tick=task.nodes)
+    sim = Simulation(task.seed, config=task.config)
+    for episode in range(task.episodes):
+        if episode:
+            sim.reset()
+        while not sim.game_over and sim.tick < task.max_ticks:
+            sim.step(autopilot.decide(sim))
+        if sim.game_over:
+            ticks[episode] = sim.tick
+        scores[episode] = sim.score
+    return ticks, scores
+
+
+def _run_task(task: _Task) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Play a task; return its config index, end ticks and scores"""
+    ticks, scores = _scripted_episodes(task) if task.bot == "scripted" else _autopilot_episodes(task)
+    return task.config_index, ticks, scores
+
+
+def _tasks(configs: Sequence[GameConfig], episodes: int, bot: str, seed: int, max_ticks: int,
+           nodes: int) -> Iterator[_Task]:
+    batch = BATCH if bot == "scripted" else AUTOPILOT_BATCH
+    for number, first in enumerate(range(0, episodes, batch)):
+        for index, config in enumerate(configs):
+            yield _Task(index, config, seed + number, min(batch, episodes - first), bot, max_ticks, nodes)
+
+
+def sweep(configs: Sequence[GameConfig], episodes: int, bot: str = "scripted", workers: Optional[int] = None,
+          seed: int = 0, max_ticks: int = MAX_TICKS, nodes: int = 1024) -> List[SweepResult]:
+    """Play episodes episodes under each config and return the results in grid order"""
+    if bot not in BOTS:
+        raise ValueError(f"unknown bot {bot!r}, expected one of {BOTS}")
+    ticks: List[List[np.ndarray]] = [[] for _ in configs]
+    scores: List[List[np.ndarray]] = [[] for _ in configs]
+    with multiprocessing.Pool(workers) as pool:
+        for index, task_ticks, task_scores in pool.imap_unordered(
+                _run_task, _tasks(configs, episodes, bot, seed, max_ticks, nodes)):
+            ticks[index].append(task_ticks)
+            scores[index].append(task_scores)
+        pool.close()
+        pool.join()
+    return [SweepResult(config, np.concatenate(ticks[index]).astype(np.int64),
+                        np.concatenate(scores[index]).astype(np.int64))
+            for index, config in enumerate(configs)]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure survival and scores over a grid of game configs")
+    parser.add_argument("--set", metavar="NAME=V1,V2", action="append", default=[],
+                        help=f"values of a game rule to sweep, one of {', '.join(GameConfig._fields)} (repeatable)")
+    parser.add_argument("--episodes", type=int, default=10000, help="episodes per config")
+    parser.add_argument("--bot", choices=BOTS, default="scripted", help="player of the episodes")
+    parser.add_argument("--nodes", type=int, default=1024, help="autopilot planning budget in nodes per tick")
+    parser.add_argument("--workers", type=int, default=None, help="processes (one per core by default)")
+    parser.add_argument("--seed", type=int, default=0, help="course seed of the first batch")
+    parser.add_argument("--max-seconds", type=int, default=MAX_TICKS // FPS, help="episode length limit")
+    parser.add_argument("--json", metavar="FILE", default=None, help="save survival curves and score histograms")
+    args = parser.parse_args(argv)
+    try:
+        configs = config_grid(args.set)
+    except ValueError as error:
+        parser.error(str(error))
+
+    max_ticks = args.max_seconds * FPS
+    started = time.perf_counter()
+    results = sweep(configs, args.episodes, args.bot, args.workers, args.seed, max_ticks, args.nodes)
+    elapsed = time.perf_counter() - started
+    total = sum(len(result.scores) for result in results)
+    print(f"{total:,} episodes in {elapsed:.1f}s ({total / elapsed:,.0f} episodes/s)")
+
+    marks = [seconds for seconds in (5, 10, 30, 60, 120) if seconds <= args.max_seconds]
+    names = [" ".join(f"{key}={value}" for key, value in result.config.overrides().items()) or "default"
+             for result in results]
+    width = max(len("config"), *map(len, names)) + 1
+    print("config".ljust(width) + "".join(f"alive@{s}s".rjust(11) for s in marks) + "mean".rjust(8)
+          + "".join(f"p{p}".rjust(6) for p in PERCENTILES))
+    for name, result in zip(names, results):
+        survival = result.survival(max_ticks)
+        print(name.ljust(width) + "".join(f"{survival[s]:11.3f}" for s in marks)
+              + f"{result.scores.mean():8.1f}" + "".join(f"{value:6.0f}" for value in result.percentiles().values()))
+    if args.json:
+        with open(args.json, "w") as file:
+            summaries = [result.summary(max_ticks) for result in results]
+            json.dump({"bot": args.bot, "max_ticks": max_ticks, "results": summaries}, file)
+
+
+if __name__ == "__main__":
+    main()
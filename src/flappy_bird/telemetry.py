@@ -0,0 +1,216 @@
+"""Gameplay telemetry aggregated into fixed-bin histograms
+
+A Telemetry object attached to a Simulation (``sim.telemetry``) is told about
+every hit, heart and point as it happens and counts them straight into NumPy
+histograms of fixed shape: hits by cause, biome and whether they ended the
+game, the bird's height at each hit, where in an obstacle the bird hit it, the
+pipe index of every hit, fall damage and fall distance, and hearts spawned
+and collected per biome. The hooks sit in the branches of Simulation.step that
+handle those events, so a tick without one costs nothing, and a hook is a few
+integer increments.
+
+Every session flushes its totals to a file of its own in the telemetry
+directory, atomically and at most every FLUSH_INTERVAL seconds (checked when
+a game ends) and again on close(), so several games can record at once
+without locking. load() sums every session file of a directory.
+
+Layout::
+
+    telemetry/
+        session-<pid>-<ms>.npz   every histogram of one session
+
+Run ``python -m flappy_bird.telemetry DIR`` to summarize a directory.
+"""
+
+import argparse
+import glob
+import os
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from flappy_bird.constants import BIOMES, MAX_FALL_DAMAGE, SCREEN_HEIGHT
+from flappy_bird.entities import KIND_HALF_PIPE_TOP, KIND_PIPE, PIPE_WIDTH
+
+if TYPE_CHECKING:
+    from flappy_bird.simulation import Simulation
+
+# Causes of a hit, the first axis of most histograms
+CAUSES: Tuple[str, ...] = ("ground", "ceiling", "pipe", "moving_pipe", "top_half_pipe", "bottom_half_pipe")
+CAUSE_GROUND, CAUSE_CEILING, CAUSE_PIPE, CAUSE_MOVING_PIPE, CAUSE_TOP_HALF_PIPE, CAUSE_BOTTOM_HALF_PIPE = range(6)
+Y_BIN: int = 20  # Pixels per bin of bird heights
+Y_BINS: int = SCREEN_HEIGHT // Y_BIN
+X_BIN: int = 5  # Pixels per bin of the bird's x relative to the obstacle it hit
+X_MIN: int = -30  # The bird's centre can be a radius left of the obstacle's left edge
+X_BINS: int = (PIPE_WIDTH + 30 - X_MIN) // X_BIN
+PIPE_BINS: int = 256  # Pipe indexes of hits; the last bin counts every later pipe
+DAMAGE_BINS: int = int(MAX_FALL_DAMAGE * 2) + 1  # Damage 0, 0.5, ..., MAX_FALL_DAMAGE
+FALL_BIN: int = 25  # Pixels per bin of fall distances
+FALL_BINS: int = SCREEN_HEIGHT // FALL_BIN
+FLUSH_INTERVAL: float = 30.0  # Seconds between flushes to disk
+
+# Name and shape of every histogram
+HISTOGRAMS: Tuple[Tuple[str, Tuple[int, ...]], ...] = (
+    ("hits", (2, len(CAUSES), len(BIOMES))),  # [fatal, cause, biome]
+    ("hit_y", (len(CAUSES), Y_BINS)),  # [cause, bird y]
+    ("hit_offset", (X_BINS, Y_BINS)),  # [bird x - obstacle x, bird y] of obstacle hits
+    ("hit_pipe", (2, PIPE_BINS)),  # [fatal, index of the pipe being flown at]
+    ("damage", (DAMAGE_BINS,)),  # Damage in half hearts
+    ("fall", (FALL_BINS,)),  # Fall distance since the highest point
+    ("hearts_spawned", (len(BIOMES),)),
+    ("hearts_collected", (len(BIOMES),)),
+    ("points", (len(BIOMES),)),  # Pipes passed
+    ("game_score", (PIPE_BINS,)),  # Final scores; the last bin counts every higher one
+)
+
+
+def _bin(value: float, size: int, bins: int, start: int = 0) -> int:
+    return min(max(int(value - start) // size, 0), bins - 1)
+
+
+class Telemetry:
+    """Histograms of one session, optionally flushed to a telemetry directory"""
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = FLUSH_INTERVAL) -> None:
+        self.hits: np.ndarray
+        self.hit_y: np.ndarray
+        self.hit_offset: np.ndarray
+        self.hit_pipe: np.ndarray
+        self.damage: np.ndarray
+        self.fall: np.ndarray
+        self.hearts_spawned: np.ndarray
+        self.hearts_collected: np.ndarray
+        self.points: np.ndarray
+        self.game_score: np.ndarray
+        for name, shape in HISTOGRAMS:
+            setattr(self, name, np.zeros(shape, dtype=np.int64))
+        self.path: Optional[str] = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.path = os.path.join(directory, f"session-{os.getpid()}-{int(time.time() * 1000)}.npz")
+        self.flush_interval: float = flush_interval
+        self._flushed: float = time.monotonic()
+
+    def hit(self, sim: "Simulation", slot: Optional[int], fall_distance: float, damage: float,
+            fatal: bool) -> None:
+        """The bird hit the obstacle in slot (None for the ground or the ceiling) and took damage"""
+        bird = sim.bird
+        entities = sim.entities
+        if slot is None:
+            cause = CAUSE_CEILING if bird.y <= bird.radius else CAUSE_GROUND
+        else:
+            kind = entities.kind[slot]
+            if kind == KIND_PIPE:
+                cause = CAUSE_MOVING_PIPE if entities.moving[slot] else CAUSE_PIPE
+            else:
+                cause = CAUSE_TOP_HALF_PIPE if kind == KIND_HALF_PIPE_TOP else CAUSE_BOTTOM_HALF_PIPE
+            self.hit_offset[_bin(bird.x - entities.x[slot], X_BIN, X_BINS, X_MIN), _bin(bird.y, Y_BIN, Y_BINS)] += 1
+        self.hits[int(fatal), cause, sim.biome] += 1
+        self.hit_y[cause, _bin(bird.y, Y_BIN, Y_BINS)] += 1
+        self.hit_pipe[int(fatal), min(sim.score, PIPE_BINS - 1)] += 1
+        self.damage[min(int(damage * 2), DAMAGE_BINS - 1)] += 1
+        self.fall[_bin(fall_distance, FALL_BIN, FALL_BINS)] += 1
+        if fatal:
+            self.game_score[min(sim.score, PIPE_BINS - 1)] += 1
+            if self.path is not None and time.monotonic() - self._flushed >= self.flush_interval:
+                self.flush()
+
+    def heart_spawned(self, biome: int) -> None:
+        self.hearts_spawned[biome] += 1
+
+    def heart_collected(self, biome: int) -> None:
+        self.hearts_collected[biome] += 1
+
+    def scored(self, biome: int) -> None:
+        self.points[biome] += 1
+
+    def histograms(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name, _ in HISTOGRAMS}
+
+    def add(self, other: "Telemetry") -> None:
+        """Add the counts of other to this one"""
+        for name, histogram in other.histograms().items():
+            getattr(self, name)[...] += histogram
+
+    def flush(self) -> None:
+        """Write the session's histograms, replacing its previous file only once the new one is complete"""
+        self._flushed = time.monotonic()
+        if self.path is None:
+            return
+        temporary = self.path + ".tmp"
+        histograms: Dict[str, Any] = self.histograms()
+        with open(temporary, "wb") as file:
+            np.savez_compressed(file, **histograms)
+        os.replace(temporary, self.path)
+
+    def close(self) -> None:
+        if self.path is not None and (self.hits.any() or self.hearts_spawned.any()):
+            self.flush()
+
+    @classmethod
+    def load(cls, directory: str) -> "Telemetry":
+        """Totals over every session file of a directory"""
+        total = cls()
+        for path in sorted(glob.glob(os.path.join(directory, "session-*.npz"))):
+            with np.load(path) as data:
+                for name, _ in HISTOGRAMS:
+                    if name in data:  # Files may predate a histogram
+                        getattr(total, name)[...] += data[name]
+        return total
+
+    def heart_pickup_rate(self) -> float:
+        spawned = int(self.hearts_spawned.sum())
+        return float(self.hearts_collected.sum()) / spawned if spawned else 0.0
+
+
+def _play(games: int, telemetry: Optional[Telemetry]) -> float:
+    """Play headless games with a scripted bot and return the seconds spent stepping"""
+    from flappy_bird.observation import N_FEATURES, write_features
+    from flappy_bird.simulation import Simulation
+
+    features = np.empty(N_FEATURES, dtype=np.float32)
+    elapsed = 0.0
+    for game in range(games):
+        sim = Simulation(game)
+        sim.telemetry = telemetry
+        while not sim.game_over and sim.tick < 60 * 60 * 5:
+            write_features(sim, features)
+            flap = bool(features[0] > features[3] - 0.07)  # Flap near the bottom of the next opening
+            started = time.perf_counter()
+            sim.step(flap)
+            elapsed += time.perf_counter() - started
+    return elapsed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Summarize gameplay telemetry")
+    parser.add_argument("directory", help="telemetry directory written by flappy-bird --telemetry")
+    parser.add_argument("--games", type=int, default=0,
+                        help="first play this many headless games into the directory and report the overhead")
+    args = parser.parse_args(argv)
+
+    if args.games:
+        without = _play(args.games, None)
+        recording = Telemetry(args.directory)
+        with_telemetry = _play(args.games, recording)
+        recording.close()
+        print(f"stepping {args.games} games took {without:.2f}s without telemetry and {with_telemetry:.2f}s with it")
+
+    telemetry = Telemetry.load(args.directory)
+    games = int(telemetry.game_score.sum())
+    mean_score = np.arange(PIPE_BINS) @ telemetry.game_score / max(1, games)
+    mean_damage = np.arange(DAMAGE_BINS) @ telemetry.damage / 2 / max(1, telemetry.damage.sum())
+    print(f"{games:,} games, {telemetry.hits.sum():,} hits, mean score {mean_score:.1f}, "
+          f"mean damage {mean_damage:.2f} hearts, heart pickup rate {telemetry.heart_pickup_rate():.1%}")
+    deaths = telemetry.hits[1]
+    print("deaths by cause: " + ", ".join(f"{cause} {count:,}" for cause, count in zip(CAUSES, deaths.sum(axis=1))))
+    print("deaths by biome: " + ", ".join(f"{count:,}" for count in deaths.sum(axis=0)))
+    pipe_deaths = telemetry.hit_pipe[1]
+    worst = np.argsort(-pipe_deaths, kind="stable")[:5]
+    print("deadliest pipes: " + ", ".join(f"#{index} ({pipe_deaths[index]:,})"
+                                          for index in worst if pipe_deaths[index]))
+
+
+if __name__ == "__main__":
+    main()
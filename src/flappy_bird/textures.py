@@ -0,0 +1,315 @@
+"""Texture-based rendering through SDL's 2D renderer
+
+The default backend draws every frame on the CPU, with Surface blits and
+fills into the logical surface, which the Presenter then scales to the
+window. A TextureRenderer draws the same frames with pygame._sdl2.video
+instead. Every sprite the game uses is uploaded once as a Texture: the pipe
+bodies, caps and arrows of each biome, the background scenery, the bird,
+the hearts, the particles and the glyphs of each font. A frame is then a
+clear, a few filled rects and a list of texture copies. The renderer's
+logical size is the game's, so SDL scales every copy to the window as it
+draws it and letterboxes the rest, without a separate scaling pass.
+
+The textures are made from the same cached surfaces that graphics.py, pipe.py
+and particles.py blit, and the positions come from the same code
+(background_items and blit_items), so both backends draw the same shapes.
+There are two differences. The bird is one texture that SDL turns as it
+copies it, where the surface path rotates a new surface every frame. Text is
+copied glyph by glyph from one atlas texture per font, so a score that
+changes every frame uploads nothing, but glyphs are spaced without kerning.
+
+An accelerated renderer is used where SDL has one. Otherwise, or with
+software=True, SDL's software renderer draws into the window's own surface,
+which also works with the dummy video driver of a headless machine.
+
+Run ``python -m flappy_bird.textures --window 1080x1920`` to compare frame
+times of both backends.
+"""
+
+import argparse
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import pygame
+from pygame._sdl2 import sdl2
+from pygame._sdl2.video import Renderer, Texture, Window
+
+from flappy_bird.bird import Bird, draw_bird_body
+from flappy_bird.constants import BIOMES, SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, Color
+from flappy_bird.graphics import (
+    GRASS_RECT, GROUND_RECT, background_items, draw_lives, get_background_sprites, scene_palette
+)
+from flappy_bird.palette import biome_table
+from flappy_bird.particles import ParticleFrame, get_particle_sprites
+from flappy_bird.pipe import get_pipe_sprites
+from flappy_bird.startup import get_font
+
+if TYPE_CHECKING:
+    from flappy_bird.render import RenderSnapshot
+    from flappy_bird.simulation import Simulation
+
+GLYPHS: str = "".join(chr(code) for code in range(32, 127))  # Printable ASCII, all the game's text uses
+HEART_ORIGIN: Tuple[int, int] = (10, 15)  # Where a heart's (x, y) lies in its 21 x 32 sprite
+HEART_SIZE: Tuple[int, int] = (21, 32)
+LIFE_SPACING: int = 28  # As draw_lives places the hearts of the lives left
+FIRST_LIFE_X: int = SCREEN_WIDTH - 30
+
+
+class GlyphAtlas:
+    """Every glyph of a font rendered once, side by side in one texture"""
+
+    def __init__(self, renderer: Renderer, font: pygame.font.Font, color: Color = WHITE) -> None:
+        glyphs = [font.render(glyph, True, color) for glyph in GLYPHS]
+        sheet = pygame.Surface((sum(glyph.get_width() for glyph in glyphs),
+                                max(glyph.get_height() for glyph in glyphs)), pygame.SRCALPHA)
+        self.rects: Dict[str, pygame.Rect] = {}  # Area of each glyph in the texture
+        x = 0
+        for glyph, rendered in zip(GLYPHS, glyphs):
+            self.rects[glyph] = pygame.Rect(x, 0, *rendered.get_size())
+            sheet.blit(rendered, (x, 0))
+            x += rendered.get_width()
+        self.texture = Texture.from_surface(renderer, sheet)
+
+    def width(self, text: str) -> int:
+        return sum(self.rects[glyph].width for glyph in text if glyph in self.rects)
+
+    def draw(self, text: str, position: Tuple[int, int]) -> None:
+        """Copy the glyphs of text to the renderer, left to right from position; others are left out"""
+        x, y = position
+        for glyph in text:
+            rect = self.rects.get(glyph)
+            if rect is not None:
+                self.texture.draw(rect, (x, y, rect.width, rect.height))
+                x += rect.width
+
+
+class TextureRenderer:
+    """The game's window, drawn with texture copies by an SDL renderer"""
+
+    def __init__(self, window: Optional[Tuple[int, int]] = None, fullscreen: bool = False,
+                 software: bool = False, hidden: bool = False) -> None:
+        self.window = Window("Flappy Bird", window or (SCREEN_WIDTH, SCREEN_HEIGHT), resizable=True,
+                             fullscreen_desktop=fullscreen, hidden=hidden)
+        self.software: bool = software  # Whether SDL's software renderer draws the frames
+        renderer: Optional[Renderer] = None
+        if not software:
+            try:
+                renderer = Renderer(self.window, accelerated=1)
+            except sdl2.error:
+                self.software = True  # No accelerated driver, e.g. on the dummy video driver
+        self.renderer: Renderer = renderer or Renderer(self.window, accelerated=0)
+        self.renderer.logical_size = (SCREEN_WIDTH, SCREEN_HEIGHT)
+        # Palettes are mapped to this format and read back as RGB for the renderer's draw colour
+        self.format: pygame.Surface = pygame.Surface((1, 1), 0, 32)
+        self.uploads: int = 0  # Textures created so far
+        self._textures: Dict[pygame.Surface, Texture] = {}
+        self._atlases: Dict[pygame.font.Font, GlyphAtlas] = {}
+        self._birds: Dict[Tuple[int, int], Texture] = {}  # (radius, alpha) -> bird
+        # A full and a half heart, cut from the lives draw_lives draws
+        lives = pygame.Surface((SCREEN_WIDTH, 40), pygame.SRCALPHA)
+        draw_lives(lives, 1.5)
+        self._hearts = [self._upload(lives.subsurface(((x - HEART_ORIGIN[0], 20 - HEART_ORIGIN[1]), HEART_SIZE)))
+                        for x in (FIRST_LIFE_X, FIRST_LIFE_X - LIFE_SPACING)]
+
+    def _upload(self, surface: pygame.Surface) -> Texture:
+        self.uploads += 1
+        return Texture.from_surface(self.renderer, surface)
+
+    def texture(self, sprite: pygame.Surface) -> Texture:
+        """Texture of a cached sprite, uploaded on first use"""
+        texture = self._textures.get(sprite)
+        if texture is None:
+            texture = self._textures[sprite] = self._upload(sprite)
+        return texture
+
+    def atlas(self, font: pygame.font.Font) -> GlyphAtlas:
+        """Glyph atlas of a font, made on first use"""
+        atlas = self._atlases.get(font)
+        if atlas is None:
+            atlas = self._atlases[font] = GlyphAtlas(self.renderer, font)
+            self.uploads += 1
+        return atlas
+
+    def bird_texture(self, radius: int, alpha: int = 255) -> Texture:
+        texture = self._birds.get((radius, alpha))
+        if texture is None:
+            sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            draw_bird_body(sprite, radius, alpha)
+            texture = self._birds[radius, alpha] = self._upload(sprite)
+        return texture
+
+    def load(self, fonts: Iterable[pygame.font.Font] = ()) -> None:
+        """Upload every sprite of every biome and the glyphs of fonts, so no frame uploads anything"""
+        for biome in range(len(BIOMES)):
+            for sprite in get_pipe_sprites(biome):
+                self.texture(sprite)
+            for scenery in get_background_sprites(biome):
+                for part in (scenery if isinstance(scenery, tuple) else (scenery,)):
+                    if part is not None:
+                        self.texture(part)
+        for sprite in get_particle_sprites():
+            self.texture(sprite)
+        for alpha in (255, 128):
+            self.bird_texture(Bird().radius, alpha)
+        for font in (get_font(36), *fonts):
+            self.atlas(font)
+
+    def text(self, font: pygame.font.Font, text: str, position: Tuple[int, int]) -> None:
+        self.atlas(font).draw(text, position)
+
+    def centred_text(self, font: pygame.font.Font, text: str, y: int) -> None:
+        atlas = self.atlas(font)
+        atlas.draw(text, (SCREEN_WIDTH // 2 - atlas.width(text) // 2, y))
+
+    def _fill(self, pixel: int, rect: Optional[pygame.Rect] = None) -> None:
+        """Fill rect (the whole frame when None) with a pixel value of self.format"""
+        self.renderer.draw_color = self.format.unmap_rgb(pixel)
+        if rect is None:
+            self.renderer.clear()
+        else:
+            self.renderer.fill_rect(rect)
+
+    def _background(self, score: int, elapsed: int) -> None:
+        for sprite, (x, y) in background_items(score, elapsed):
+            self.texture(sprite).draw(None, (int(x), int(y), *sprite.get_size()))
+
+    def draw_scene(self, scene: Union["Simulation", "RenderSnapshot"], elapsed: int) -> None:
+        """graphics.draw_scene: everything of a game except the bird"""
+        palette = scene_palette(self.format, scene)
+        self._fill(palette.sky)
+        self._background(scene.score, elapsed)
+        for obstacle in (*scene.pipes, *scene.half_pipes):
+            for sprite, (x, y), area in obstacle.blit_items():
+                self.texture(sprite).draw(area, (x, y, area.width, area.height))
+        heart = self._hearts[0]
+        for collectible in scene.hearts:
+            heart.draw(None, (int(collectible.x) - HEART_ORIGIN[0],
+                              int(collectible.y + collectible.float_offset) - HEART_ORIGIN[1], *HEART_SIZE))
+        self._fill(palette.ground, GROUND_RECT)
+        self._fill(palette.grass, GRASS_RECT)
+
+    def draw_bird(self, bird: Bird, invincible: bool = False) -> None:
+        """Bird.draw, turned by the renderer"""
+        flashing = invincible and int(pygame.time.get_ticks() / 200) % 2 == 0
+        size = bird.radius * 2
+        self.bird_texture(bird.radius, 128 if flashing else 255).draw(
+            None, (int(bird.x) - bird.radius, int(bird.y) - bird.radius, size, size), bird.rotation)
+
+    def draw_particles(self, frame: ParticleFrame) -> None:
+        sprites = get_particle_sprites()
+        for index, x, y in zip(frame.sprite.tolist(), frame.x.tolist(), frame.y.tolist()):
+            sprite = sprites[index]
+            self.texture(sprite).draw(None, (int(x), int(y), *sprite.get_size()))
+
+    def draw_lives(self, lives: float) -> None:
+        full_hearts = int(lives)
+        for i in range(full_hearts + (lives % 1 >= 0.5)):
+            self._hearts[i >= full_hearts].draw(None, (FIRST_LIFE_X - i * LIFE_SPACING - HEART_ORIGIN[0],
+                                                       20 - HEART_ORIGIN[1], *HEART_SIZE))
+
+    def draw_title(self, font: pygame.font.Font, elapsed: int) -> None:
+        """game.draw_title_screen: the first biome's sky and scenery under the title"""
+        self._fill(biome_table(self.format).palette(0).sky)
+        self._background(0, elapsed)
+        title = get_font(36)
+        self.centred_text(title, "FLAPPY BIRD", SCREEN_HEIGHT // 2 - 50)
+        self.centred_text(font, "Press SPACE to Start", SCREEN_HEIGHT // 2 + 20)
+        self.centred_text(font, "Press A to Watch the Autopilot", SCREEN_HEIGHT // 2 + 55)
+
+    def draw_frame(self, scene: Union["Simulation", "RenderSnapshot"], font: pygame.font.Font, state: str,
+                   elapsed: int, rank: Optional[int] = None, games: int = 0, status: Optional[str] = None,
+                   particles: Optional[ParticleFrame] = None) -> None:
+        """render.draw_frame: a whole frame of the playing or game over screen"""
+        self.draw_scene(scene, elapsed)
+        self.draw_bird(scene.bird, scene.invincible and state == "playing")
+        if particles is not None:
+            self.draw_particles(particles)
+        if state == "playing":
+            self.text(font, f"Score: {scene.score}", (10, 10))
+            self.draw_lives(scene.lives)
+            if status is not None:
+                self.text(font, status, (10, 40))
+        else:
+            self.centred_text(get_font(36), "GAME OVER", SCREEN_HEIGHT // 2 - 60)
+            self.centred_text(font, f"Score: {scene.score}", SCREEN_HEIGHT // 2)
+            restart_y = SCREEN_HEIGHT // 2 + 40
+            if rank is not None:
+                self.centred_text(font, f"Rank: #{rank:,} of {games:,}", SCREEN_HEIGHT // 2 + 32)
+                restart_y += 32
+            self.centred_text(font, "Press R to Restart", restart_y)
+
+    def present(self) -> None:
+        """Show the frame drawn since the last present (instead of pygame.display.flip())"""
+        self.renderer.present()
+
+    def to_surface(self) -> pygame.Surface:
+        """The frame drawn so far, read back at the window's size"""
+        return self.renderer.to_surface()
+
+    def close(self) -> None:
+        self._textures.clear()
+        self._atlases.clear()
+        self._birds.clear()
+        self._hearts = []
+        self.window.destroy()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare frame times of the surface and texture backends")
+    parser.add_argument("--window", default="1080x1920", help="window size as WIDTHxHEIGHT")
+    parser.add_argument("--frames", type=int, default=600, help="frames per backend")
+    parser.add_argument("--software", action="store_true", help="use SDL's software renderer even with a GPU")
+    args = parser.parse_args(argv)
+
+    from flappy_bird.display import Presenter, parse_size
+    from flappy_bird.golden import MARGINS, scripted_flap, state_values
+    from flappy_bird.particles import SPARKLES, ParticleSystem
+    from flappy_bird.render import draw_frame
+    from flappy_bird.simulation import EVENT_SCORE, Simulation
+
+    try:
+        window = parse_size(args.window)
+    except ValueError as error:
+        parser.error(str(error))
+    pygame.init()
+    presenter = Presenter(window)
+    textures = TextureRenderer(window, software=args.software)
+    font = get_font(24)
+    textures.load([font])
+    uploads = textures.uploads
+
+    for backend in ("surface", "texture"):
+        # The same scripted game for both, with particles on every score
+        sim = Simulation(0)
+        particles = ParticleSystem(seed=0)
+        drawing = presenting = 0.0
+        for _ in range(args.frames):
+            if sim.game_over:
+                sim.reset()
+            if EVENT_SCORE in sim.step(scripted_flap(state_values(sim), MARGINS[2])):
+                particles.emit(SPARKLES, sim.bird.x, sim.bird.y)
+            particles.update()
+            started = time.perf_counter()
+            if backend == "surface":
+                draw_frame(presenter.surface, sim, font, "playing", sim.now, particles=particles.frame())
+                drawn = time.perf_counter()
+                presenter.present()
+                pygame.display.flip()
+            else:
+                textures.draw_frame(sim, font, "playing", sim.now, particles=particles.frame())
+                drawn = time.perf_counter()
+                textures.present()
+            presenting += time.perf_counter() - drawn
+            drawing += drawn - started
+        total = (drawing + presenting) / args.frames
+        print(f"{backend}: draw {drawing / args.frames * 1000:.2f} ms, "
+              f"present {presenting / args.frames * 1000:.2f} ms, "
+              f"{total * 1000:.2f} ms per frame ({1 / total:.0f} FPS)")
+    print(f"{'software' if textures.software else 'accelerated'} renderer, window {window[0]}x{window[1]}, "
+          f"{uploads} textures uploaded before the first frame and {textures.uploads - uploads} after")
+    textures.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
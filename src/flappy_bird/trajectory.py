@@ -0,0 +1,264 @@
+"""Append-only trajectory store for headless games
+
+Rows of (observation, action, reward, done) go into fixed-size chunk files in
+.npy format, each preallocated and written through numpy.memmap, so appending
+is a slice copy into the page cache and a full chunk never has to be grown.
+Every writer owns one shard directory, so several processes can record at once
+without locking. Each shard keeps a small index file of episode end rows;
+readers only see complete episodes and map chunks lazily, so sampling a
+minibatch reads the pages it touches rather than whole files.
+
+Layout::
+
+    store/
+        shard-<pid>-<n>/
+            chunk-00000.npy   structured rows, the writer's chunk_rows each (CHUNK_ROWS by default)
+            episodes.idx      int64 end row (exclusive) of each finished episode
+
+Run ``python -m flappy_bird.trajectory`` to measure write and sampling speed.
+"""
+
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from flappy_bird.constants import FPS
+from flappy_bird.observation import N_FEATURES, write_features
+from flappy_bird.simulation import Simulation, EVENT_HIT, EVENT_SCORE
+
+CHUNK_ROWS: int = 1 << 18  # Rows per chunk file (about 12 MB with the default features)
+INDEX_NAME: str = "episodes.idx"
+SCORE_REWARD: float = 1.0  # Reward for passing a pipe
+HIT_REWARD: float = -1.0  # Reward for losing a life
+
+
+def row_dtype(obs_dim: int = N_FEATURES) -> np.dtype:
+    """Record layout of one stored step"""
+    return np.dtype([("obs", np.float32, (obs_dim,)), ("action", np.uint8),
+                     ("reward", np.float32), ("done", np.bool_)])
+
+
+class Batch(NamedTuple):
+    """Columns of sampled rows"""
+    obs: np.ndarray
+    action: np.ndarray
+    reward: np.ndarray
+    done: np.ndarray
+
+
+def _chunk_path(shard: str, chunk: int) -> str:
+    return os.path.join(shard, f"chunk-{chunk:05d}.npy")
+
+
+class TrajectoryWriter:
+    """Appends rows to a new shard of a store; one writer per process"""
+
+    _shards = itertools.count()
+
+    def __init__(self, directory: str, obs_dim: int = N_FEATURES, chunk_rows: int = CHUNK_ROWS) -> None:
+        self.dtype: np.dtype = row_dtype(obs_dim)
+        self.chunk_rows: int = chunk_rows
+        os.makedirs(directory, exist_ok=True)
+        # Shard names are unique per process and per writer; makedirs refuses to reuse one
+        while True:
+            self.shard: str = os.path.join(directory, f"shard-{os.getpid()}-{next(self._shards)}")
+            try:
+                os.makedirs(self.shard)
+                break
+            except FileExistsError:
+                continue
+        self.rows: int = 0  # Rows appended so far
+        self._chunk: Optional[np.memmap] = None
+        self._index = open(os.path.join(self.shard, INDEX_NAME), "ab")
+
+    def _open_chunk(self, chunk: int) -> np.memmap:
+        if self._chunk is not None:
+            self._chunk.flush()
+        self._chunk = np.lib.format.open_memmap(_chunk_path(self.shard, chunk), mode="w+",
+                                                dtype=self.dtype, shape=(self.chunk_rows,))
+        return self._chunk
+
+    def append(self, obs: np.ndarray, action: np.ndarray, reward: np.ndarray, done: np.ndarray) -> None:
+        """Append a block of rows (obs is (n, obs_dim); the rest have length n)"""
+        n = len(action)
+        written = 0
+        while written < n:
+            chunk, offset = divmod(self.rows, self.chunk_rows)
+            rows = self._chunk if offset else self._open_chunk(chunk)
+            assert rows is not None
+            count = min(n - written, self.chunk_rows - offset)
+            block = rows[offset:offset + count]
+            block["obs"] = obs[written:written + count]
+            block["action"] = action[written:written + count]
+            block["reward"] = reward[written:written + count]
+            block["done"] = done[written:written + count]
+            written += count
+            self.rows += count
+        # Episode boundaries are published only after their rows are in place
+        ends = np.flatnonzero(done) + (self.rows - n + 1)
+        if len(ends):
+            self._index.write(ends.astype(np.int64).tobytes())
+            self._index.flush()
+
+    def close(self) -> None:
+        """Flush the current chunk and the index"""
+        if self._chunk is not None:
+            self._chunk.flush()
+            self._chunk = None
+        self._index.close()
+
+    def __enter__(self) -> "TrajectoryWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class TrajectoryReader:
+    """Random access to the complete episodes of every shard in a store"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory: str = directory
+        self.shards: List[str] = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                                        if os.path.isfile(os.path.join(directory, name, INDEX_NAME)))
+        self.episode_ends: List[np.ndarray] = []
+        rows = []
+        for shard_path in self.shards:
+            ends = np.fromfile(os.path.join(shard_path, INDEX_NAME), dtype=np.int64)
+            self.episode_ends.append(ends)
+            rows.append(int(ends[-1]) if len(ends) else 0)
+        # Global row r lives in shard i when offsets[i] <= r < offsets[i + 1]
+        self.offsets: np.ndarray = np.concatenate(([0], np.cumsum(rows))).astype(np.int64)
+        self._chunks: Dict[Tuple[int, int], np.ndarray] = {}
+        # Writers choose their chunk size, so each shard's is read from the header of its first chunk
+        self.chunk_rows: np.ndarray = np.full(len(self.shards), CHUNK_ROWS, dtype=np.int64)
+        dtypes = set()
+        for shard, shard_path in enumerate(self.shards):
+            if os.path.exists(_chunk_path(shard_path, 0)):
+                first = self._chunk(shard, 0)
+                self.chunk_rows[shard] = len(first)
+                dtypes.add(first.dtype)
+        if len(dtypes) > 1:
+            raise ValueError(f"shards of {directory} store rows of different layouts: {sorted(map(str, dtypes))}")
+        self.dtype: np.dtype = dtypes.pop() if dtypes else row_dtype()
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def n_episodes(self) -> int:
+        return sum(len(ends) for ends in self.episode_ends)
+
+    def _chunk(self, shard: int, chunk: int) -> np.ndarray:
+        key = (shard, chunk)
+        if key not in self._chunks:
+            self._chunks[key] = np.load(_chunk_path(self.shards[shard], chunk), mmap_mode="r")
+        return self._chunks[key]
+
+    def rows(self, index: np.ndarray) -> np.ndarray:
+        """Gather rows by global index, touching only the chunks they live in"""
+        shard = np.searchsorted(self.offsets, index, side="right") - 1
+        local = index - self.offsets[shard]
+        chunk, offset = np.divmod(local, self.chunk_rows[shard])
+        out = np.empty(len(index), dtype=self.dtype)
+        keys = shard * (1 << 32) + chunk
+        for key in np.unique(keys):
+            where = np.flatnonzero(keys == key)
+            out[where] = self._chunk(int(key >> 32), int(key & 0xFFFFFFFF))[offset[where]]
+        return out
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None) -> Batch:
+        """Uniformly sample rows from complete episodes"""
+        rng = rng if rng is not None else np.random.default_rng()
+        rows = self.rows(np.sort(rng.integers(0, len(self), size=batch_size)))
+        return Batch(obs=rows["obs"], action=rows["action"], reward=rows["reward"], done=rows["done"])
+
+
+def record_games(writer: TrajectoryWriter, sims: List[Simulation], policy: Callable[[Simulation], bool],
+                 max_ticks: int) -> int:
+    """Play sims side by side with policy, logging every step; return the rows written
+
+    The reward is SCORE_REWARD per pipe passed plus HIT_REWARD per life lost, and
+    an episode is done when the game ends or reaches max_ticks. Each game's rows
+    are buffered and appended in one block once it is done, so every episode is
+    contiguous in the shard, as the episode index needs.
+    """
+    n = len(sims)
+    obs = np.empty((n, max_ticks, writer.dtype["obs"].shape[0]), dtype=np.float32)
+    action = np.empty((n, max_ticks), dtype=np.uint8)
+    reward = np.empty((n, max_ticks), dtype=np.float32)
+    done = np.zeros((n, max_ticks), dtype=np.bool_)
+    steps = [0] * n  # Rows buffered per game
+    active = list(range(n))
+    written = 0
+    while active:
+        for game in active:
+            sim, step = sims[game], steps[game]
+            write_features(sim, obs[game, step])
+            flap = policy(sim)
+            events = sim.step(flap)
+            action[game, step] = flap
+            reward[game, step] = SCORE_REWARD * events.count(EVENT_SCORE) + HIT_REWARD * events.count(EVENT_HIT)
+            done[game, step] = sim.game_over or sim.tick >= max_ticks or step + 1 == max_ticks
+            steps[game] = step + 1
+            if done[game, step]:
+                writer.append(obs[game, :step + 1], action[game, :step + 1], reward[game, :step + 1],
+                              done[game, :step + 1])
+                written += step + 1
+        active = [game for game in active if not done[game, steps[game] - 1]]
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure trajectory store write and sampling throughput")
+    parser.add_argument("--dir", default=None, help="store directory (a temporary one by default)")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="rows for the raw write benchmark")
+    parser.add_argument("--block", type=int, default=8192, help="rows per append call")
+    parser.add_argument("--games", type=int, default=64, help="games recorded side by side")
+    parser.add_argument("--batch", type=int, default=256, help="sampled minibatch size")
+    args = parser.parse_args(argv)
+
+    directory = args.dir or tempfile.mkdtemp(prefix="flappy-trajectories-")
+    try:
+        rng = np.random.default_rng(0)
+        obs = rng.random((args.block, N_FEATURES), dtype=np.float32)
+        action = rng.integers(0, 2, size=args.block).astype(np.uint8)
+        reward = np.zeros(args.block, dtype=np.float32)
+        done = np.zeros(args.block, dtype=np.bool_)
+        done[-1] = True
+        with TrajectoryWriter(directory) as writer:
+            started = time.perf_counter()
+            for _ in range(args.rows // args.block):
+                writer.append(obs, action, reward, done)
+            elapsed = time.perf_counter() - started
+        megabytes = writer.rows * writer.dtype.itemsize / 1e6
+        print(f"raw writes: {writer.rows / elapsed * 60 / 1e6:,.0f}M rows/min ({megabytes / elapsed:,.0f} MB/s)")
+
+        with TrajectoryWriter(directory) as writer:
+            sims = [Simulation(seed) for seed in range(args.games)]
+            started = time.perf_counter()
+            rows = record_games(writer, sims, lambda sim: sim.bird.y > 300, max_ticks=60 * FPS)
+            elapsed = time.perf_counter() - started
+        print(f"recorded games: {rows / elapsed * 60 / 1e6:,.1f}M rows/min")
+
+        reader = TrajectoryReader(directory)
+        started = time.perf_counter()
+        batches = 200
+        for _ in range(batches):
+            reader.sample(args.batch, rng)
+        elapsed = time.perf_counter() - started
+        print(f"sampling: {batches * args.batch / elapsed:,.0f} rows/s from {len(reader):,} rows "
+              f"in {reader.n_episodes:,} episodes")
+    finally:
+        if args.dir is None:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
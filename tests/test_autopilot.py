@@ -0,0 +1,14 @@
+"""
+Tests for the search-based autopilot.
+"""
+from flappy_bird.autopilot import Autopilot, run_episode
+
+
+def test_autopilot_survives_opening_pipes():
+    """The bot clears the first pipes of a headless game without dying."""
+    autopilot = Autopilot(nodes_per_tick=1024, horizon=40)
+    result = run_episode(seed=0, autopilot=autopilot, max_ticks=900)
+    assert result.ticks == 900
+    assert result.score >= 5
+    assert autopilot.nodes_expanded > 0
+    assert result.nodes_per_second > 0
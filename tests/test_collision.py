@@ -0,0 +1,48 @@
+"""
+Tests for pixel-accurate collision.
+"""
+import pygame
+
+from flappy_bird.bird import Bird
+from flappy_bird.collision import bird_mask, hits
+from flappy_bird.config import GameConfig, parse_config
+from flappy_bird.entities import EntityStore
+from flappy_bird.pipe import Pipe
+from flappy_bird.simulation import Simulation, check_collision
+
+
+def test_bird_mask_matches_the_drawn_bird():
+    """The cached mask covers exactly the pixels Bird.draw paints, where it paints them."""
+    bird = Bird()
+    bird.rotation = 35
+    surface = pygame.Surface((400, 600), pygame.SRCALPHA)
+    bird.draw(surface)
+    drawn = pygame.mask.from_surface(surface)
+
+    shape = bird_mask(bird.radius, bird.rotation)
+    expected = pygame.mask.Mask((400, 600))
+    expected.draw(shape.mask, (int(bird.x) + shape.offset[0], int(bird.y) + shape.offset[1]))
+    assert drawn.count() == expected.count() == drawn.overlap_area(expected, (0, 0))
+
+
+def test_corners_miss_and_caps_hit():
+    """A pipe in the corner of the bird's square misses its sprite, and a cap the box ignores hits it."""
+    store = EntityStore(1)
+    pipe = Pipe(height=200, move_phase=0.0, store=store)  # Opening from 200 to 350
+    bird = Bird()
+    pipe.x, bird.y = 26, 338  # Lower pipe in the bottom left corner of the square
+    assert check_collision(bird, [pipe]) and not hits(store, pipe.slot, bird)
+    pipe.x, bird.y = 25, 363  # Beside the lower pipe's body, under its cap
+    assert not check_collision(bird, [pipe]) and hits(store, pipe.slot, bird)
+
+
+def test_simulation_plays_with_pixel_collision():
+    """The option parses from --set and a game with it ends by hitting something."""
+    assert parse_config(["pixel_collision=1"]).pixel_collision
+    assert not parse_config(["pixel_collision=false"]).pixel_collision
+    sim = Simulation(0, config=GameConfig(pixel_collision=True))
+    for _ in range(2000):
+        if sim.game_over:
+            break
+        sim.step(False)
+    assert sim.game_over
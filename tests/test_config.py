@@ -0,0 +1,42 @@
+"""
+Tests for per-session game configs.
+"""
+import numpy as np
+import pytest
+
+from flappy_bird.config import DEFAULT_CONFIG, GameConfig, parse_config
+from flappy_bird.course import spawn_ticks
+from flappy_bird.replay import Replay
+from flappy_bird.simulation import Simulation
+
+
+def test_parse_config():
+    """NAME=VALUE strings override fields with their own types; bad ones are rejected."""
+    config = parse_config(["gravity=0.3", "pipe-gap=180"])
+    assert config == DEFAULT_CONFIG._replace(gravity=0.3, pipe_gap=180)
+    assert isinstance(config.pipe_gap, int) and config.overrides() == {"gravity": 0.3, "pipe_gap": 180}
+    assert parse_config([]) == DEFAULT_CONFIG
+    for bad in (["gravity"], ["speed=3"], ["pipe_gap="]):
+        with pytest.raises(ValueError):
+            parse_config(bad)
+
+
+def test_simulations_follow_their_config(tmp_path):
+    """Games with different rules run side by side, and replays keep their rules."""
+    flaps = np.arange(400) % 17 == 0
+    config = GameConfig(gravity=0.3, pipe_gap=200, pipe_frequency=1200, base_pipe_speed=4)
+    default, custom = Simulation(3), Simulation(3, config=config)
+    for flap in flaps.tolist():
+        default.step(flap)
+        custom.step(flap)
+    assert default.config is DEFAULT_CONFIG
+    assert default.bird.y != custom.bird.y
+    assert all(pipe.bottom_pipe.y - pipe.top_pipe.height == 200 for pipe in custom.pipes if not pipe.moving)
+    assert np.array_equal(custom.course.spawn_tick, spawn_ticks(len(custom.course.spawn_tick), 1200))
+
+    path = str(tmp_path / "run.npz")
+    Replay(seed=3, game=0, flaps=flaps, config=config).save(path)
+    replayed = Replay.load(path).simulation()
+    for flap in flaps.tolist():
+        replayed.step(flap)
+    assert replayed.config == config and replayed.bird.y == custom.bird.y
@@ -0,0 +1,42 @@
+"""
+Tests for resolution-independent presentation.
+"""
+import pygame
+import pytest
+
+from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from flappy_bird.display import Presenter, fit, parse_size
+
+
+def test_fit_keeps_aspect_and_centres():
+    """Smooth scaling fills one axis; integer scaling uses whole factors unless the window is too small."""
+    assert fit((1080, 1920)) == pygame.Rect(0, 150, 1080, 1620)
+    assert fit((1920, 1080)) == pygame.Rect(600, 0, 720, 1080)
+    assert fit((1000, 1300), "integer") == pygame.Rect(100, 50, 800, 1200)
+    assert fit((200, 300), "integer") == pygame.Rect(0, 0, 200, 300)
+    assert parse_size("1080x1920") == (1080, 1920)
+    with pytest.raises(ValueError):
+        parse_size("1080")
+
+
+def test_presenter_scales_into_letterboxed_window():
+    """The logical surface lands scaled in the centre of the window, and resizes are followed."""
+    pygame.display.init()
+    try:
+        presenter = Presenter((1000, 1300), scaling="integer")
+        assert presenter.surface.get_size() == (SCREEN_WIDTH, SCREEN_HEIGHT)
+        presenter.surface.fill((0, 200, 0))
+        presenter.surface.fill((255, 0, 0), pygame.Rect(0, 0, 1, 1))
+        presenter.window.fill((255, 255, 255))
+        presenter.present()
+        window = presenter.window
+        assert window.get_at((100, 50))[:3] == window.get_at((101, 51))[:3] == (255, 0, 0)
+        assert window.get_at((102, 52))[:3] == (0, 200, 0)
+        assert window.get_at((99, 50))[:3] == window.get_at((500, 1299))[:3] == (0, 0, 0)
+
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+        assert presenter.handle(pygame.event.Event(pygame.VIDEORESIZE, size=(SCREEN_WIDTH, SCREEN_HEIGHT)))
+        assert presenter.surface is presenter.window is pygame.display.get_surface()
+        assert not presenter.handle(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+    finally:
+        pygame.display.quit()
@@ -0,0 +1,54 @@
+"""
+Tests for the structure-of-arrays entity store.
+"""
+import pygame
+
+from flappy_bird.entities import EntityStore
+from flappy_bird.pipe import Pipe, HalfPipe
+
+
+def make_obstacle(i, **kwargs):
+    if i % 3:
+        return Pipe(i % 4, moving=i % 2 == 0, height=150 + i * 10, move_phase=i * 0.7, **kwargs)
+    half_pipe = HalfPipe(0, position=HalfPipe.TOP if i % 2 else HalfPipe.BOTTOM, height=120, move_phase=i * 0.7,
+                         **kwargs)
+    half_pipe.moving = i % 2 == 0
+    return half_pipe
+
+
+def test_shared_store_matches_single_objects():
+    """Stepping many obstacles together gives the rects of stepping each one alone."""
+    store = EntityStore(capacity=2)  # Grows while the obstacles are added
+    shared = [make_obstacle(i, store=store) for i in range(12)]
+    alone = [make_obstacle(i) for i in range(12)]
+    for _ in range(300):
+        store.advance(2.5)
+        for obstacle in alone:
+            obstacle.update(2.5)
+    for a, b in zip(shared, alone):
+        if isinstance(a, Pipe):
+            rects = [a.top_pipe, a.bottom_pipe]
+            assert (a.x, rects) == (b.x, [b.top_pipe, b.bottom_pipe])
+        else:
+            rects = [a.pipe_rect]
+            assert (a.x, rects) == (b.x, [b.pipe_rect])
+        for y in range(0, 600, 20):
+            rect = pygame.Rect(int(a.x) + 10, y, 30, 30)
+            assert store.hits(a.slot, rect) == (rect.collidelist(rects) >= 0)
+
+
+def test_watch_window_scoring_and_culling():
+    """A pipe is watched while it crosses the bird, scores once and is freed off screen."""
+    store = EntityStore()
+    pipe = Pipe(store=store)
+    assert store.near() == []
+    passed = []
+    for _ in range(200):
+        store.advance(3)
+        store.cull()
+        passed.append(store.passed(100))
+        if 24 < pipe.x < 115:
+            assert store.near() == [pipe.slot]
+    assert sum(passed) == 1 and pipe.passed
+    assert not pipe.alive and store.near() == []
+    assert Pipe(store=store).slot == pipe.slot  # The slot is reused
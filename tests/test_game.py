@@ -0,0 +1,60 @@
+"""
+Tests for the game loop helpers.
+"""
+import time
+
+import pygame
+import pytest
+
+from flappy_bird.game import wait_for_input
+
+
+def test_idle_wait_wakes_on_input_and_times_out():
+    """An idle screen returns the event that woke it, or nothing once its frame is due."""
+    pygame.display.init()
+    try:
+        pygame.event.clear()
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+        waited = wait_for_input(10)
+        assert [event.type for event in waited] == [pygame.KEYDOWN]
+
+        pygame.event.clear()
+        started = time.perf_counter()
+        assert wait_for_input(20) == []
+        assert time.perf_counter() - started >= 0.04
+    finally:
+        pygame.display.quit()
+
+
+@pytest.mark.parametrize("threaded", [False, True])
+def test_game_over_screen_is_shown_before_idling(monkeypatch, threaded):
+    """With --idle-fps 0 the game over screen is drawn and presented before the game sleeps for input."""
+    import flappy_bird.game as game
+    import flappy_bird.render as render
+
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    log = []
+    draw_frame = render.draw_frame
+
+    def logged_draw_frame(surface, scene, font, state, *args, **kwargs):
+        log.append(state)
+        draw_frame(surface, scene, font, state, *args, **kwargs)
+
+    def wait_for_input(idle_fps):
+        log.append("wait")
+        if log.count("wait") == 1:
+            return [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE)]  # Start the game
+        return [pygame.event.Event(pygame.QUIT)]  # Quit on the game over screen
+
+    class Clock:  # Play as fast as possible
+        def tick(self, fps=0):
+            return 0
+
+    monkeypatch.setattr(render, "draw_frame", logged_draw_frame)
+    monkeypatch.setattr(game, "wait_for_input", wait_for_input)
+    monkeypatch.setattr(pygame.time, "Clock", Clock)
+    with pytest.raises(SystemExit):
+        game.main(["--idle-fps", "0", "--no-scores", "--seed", "1"] + (["--threaded"] if threaded else []))
+    first_idle = log.index("wait", 1)
+    assert log[first_idle - 1] == "game_over" and "game_over" not in log[:first_idle - 1]
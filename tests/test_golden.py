@@ -0,0 +1,30 @@
+"""
+Tests for golden traces.
+"""
+import functools
+
+from flappy_bird.config import GameConfig
+from flappy_bird.course import COURSE_BLOCK
+from flappy_bird.golden import GoldenTraces, check, episode_course, record
+from flappy_bird.graphics import draw_world
+from flappy_bird.simulation import Simulation
+
+
+def test_record_and_check(tmp_path):
+    """The reference engine matches its own trace; a changed rule diverges on the first tick."""
+    golden = record(20, max_ticks=300, renderer=draw_world, frame_every=50, workers=2)
+    assert sum(len(states) for states in golden.states) > 20 * 100
+    assert any(episode.hard for episode in golden.episodes)
+    grown = Simulation(4).course_builder.grow(COURSE_BLOCK)
+    assert all((a == b).all() for a, b in zip(episode_course(4, False), grown))
+    path = str(tmp_path / "golden.npz")
+    golden.save(path)
+    loaded = GoldenTraces.load(path)
+    assert loaded.episodes == golden.episodes and loaded.frame_every == 50
+    assert all((a == b).all() for a, b in zip(loaded.states, golden.states))
+
+    assert check(loaded, renderer=draw_world, workers=2) == []
+    heavier = functools.partial(Simulation, config=GameConfig(gravity=0.3))
+    divergences = check(loaded, heavier, workers=2)
+    assert len(divergences) == 20
+    assert {(divergence.tick, divergence.what) for divergence in divergences} == {(1, "state")}
@@ -0,0 +1,41 @@
+"""
+Tests for the input latency monitor and the low-latency frame pacer.
+"""
+import time
+
+import pygame
+
+from flappy_bird.latency import FramePacer, LatencyMonitor
+
+
+def test_monitor_measures_from_event_timestamp_to_flip():
+    """A press is dated by its timestamp and counted once, at the flip after its step."""
+    monitor = LatencyMonitor()
+    monitor.pressed(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE, timestamp=pygame.time.get_ticks() - 20))
+    monitor.presented()  # Not stepped yet
+    assert monitor.samples == []
+    monitor.applied()
+    monitor.presented()
+    monitor.presented()
+    assert len(monitor.samples) == 1 and monitor.samples[0] >= 19
+    assert monitor.summary()["count"] == 1 and "p99" in monitor.summary()
+
+
+def test_pacer_starts_early_for_flaps_but_keeps_the_rate():
+    """A flap pulls a frame forward by up to half a period; the schedule itself does not move."""
+    pygame.display.init()
+    try:
+        pygame.event.clear()
+        pacer = FramePacer(50)  # 20 ms frames
+        pacer.wait()
+        started = time.perf_counter()
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+        events = pacer.wait()
+        early = time.perf_counter() - started
+        assert [event.type for event in events] == [pygame.KEYDOWN]
+        assert early >= 0.005  # Half a frame early at most; how late a busy machine wakes up is not checked
+        for _ in range(9):
+            assert pacer.wait() == []
+        assert time.perf_counter() - started >= 0.18  # The early frame did not shift the ones after it
+    finally:
+        pygame.display.quit()
@@ -0,0 +1,60 @@
+"""
+Tests for feature and pixel observations.
+"""
+import numpy as np
+
+from flappy_bird.constants import BIOMES
+from flappy_bird.heart import Heart
+from flappy_bird.observation import FeatureObserver, PixelObserver, N_FEATURES
+from flappy_bird.simulation import Simulation
+
+
+def test_features_fill_preallocated_buffer():
+    """Feature rows are written in place for every simulation of a batch."""
+    sims = [Simulation(seed) for seed in range(3)]
+    for sim in sims:
+        for _ in range(200):
+            sim.step(sim.bird.y > 300)
+    observer = FeatureObserver(len(sims))
+    buffer = observer.buffer
+    features = observer.observe(sims)
+    assert features is buffer
+    assert features.shape == (3, N_FEATURES) and features.dtype == np.float32
+    assert np.isclose(features[0, 0], sims[0].bird.y / 600)
+    # The nearest gap is open and lies ahead of the second one
+    assert (features[:, 2] < features[:, 3]).all()
+    assert (features[:, 4] <= features[:, 7]).all()
+
+
+def test_pixel_frames_are_strided_views():
+    """Pixel frames are views of the render surface, downsampled by the stride."""
+    sim = Simulation(0)
+    rgb = PixelObserver(stride=4)
+    gray = PixelObserver(stride=2, grayscale=True)
+    first = rgb.observe(sim)
+    assert first.shape == rgb.shape == (150, 100, 3)
+    assert np.shares_memory(first, rgb.pixels)
+    before = first.copy()
+    for _ in range(60):
+        sim.step(sim.bird.y > 300)
+    assert rgb.observe(sim) is first
+    assert not np.array_equal(first, before)
+    frame = gray.observe(sim)
+    assert frame.shape == gray.shape == (300, 200)
+    assert len(np.unique(frame)) > 1
+
+
+def test_grayscale_frames_are_luminance():
+    """Gray levels are the luminance of the colour frame, so the sky, pipes and a heart stay apart."""
+    sim = Simulation(0)
+    for _ in range(200):
+        sim.step(sim.bird.y > 300)
+    heart = Heart(250, 150, store=sim.entities)
+    sim.hearts.append(heart)
+    rgb, gray = PixelObserver().observe(sim), PixelObserver(grayscale=True).observe(sim)
+    assert np.abs(gray - rgb @ np.array([0.299, 0.587, 0.114])).max() <= 1
+    biome = BIOMES[sim.biome]
+    sky = gray[(rgb == biome["sky_color"]).all(axis=-1)]
+    pipe = gray[(rgb == biome["pipe_color"]).all(axis=-1)]
+    assert len(sky) and len(pipe) and sky[0] != pipe[0]
+    assert gray[int(heart.y), int(heart.x)] not in (sky[0], pipe[0])
@@ -0,0 +1,72 @@
+"""
+Tests for pre-generated courses and the reachability oracle.
+"""
+import numpy as np
+
+from flappy_bird.course import (
+    REPAIR_BLOCK, CourseBuilder, generate_course, repair_course, HALF_PIPE_TOP, NO_HALF_PIPE
+)
+from flappy_bird.oracle import solve, solve_batch
+
+
+def test_generated_course_is_feasible():
+    """A course drawn with the game's own distributions can be flown end to end."""
+    result = solve(generate_course(seed=0, n_pipes=300))
+    assert result.feasible
+    assert result.max_score == 300
+    assert result.obstacle is None
+
+
+def test_oracle_reports_first_impossible_obstacle():
+    """A half pipe that closes the whole screen is blamed, along with the score reachable before it."""
+    course = generate_course(seed=1, n_pipes=120)
+    index = int(np.flatnonzero(course.half_pipe == HALF_PIPE_TOP)[0])
+    height = course.half_pipe_height.copy()
+    height[index] = 450
+    blocked = course._replace(half_pipe_height=height)
+
+    result, untouched = solve_batch([blocked, course])
+    assert not result.feasible
+    assert result.obstacle == index
+    assert result.half_pipe
+    assert result.max_score == index + 1
+    assert untouched.feasible
+
+
+def test_longer_course_extends_shorter_one():
+    """Courses for a seed grow block by block without changing the pipes already drawn."""
+    short, long = generate_course(seed=4, n_pipes=100), generate_course(seed=4, n_pipes=300)
+    for field, extended in zip(short, long):
+        assert np.array_equal(field, extended[:100])
+
+
+def test_repair_removes_impossible_obstacles():
+    """Repair drops half pipes that cannot be passed and leaves the rest of the course alone."""
+    course = generate_course(seed=1, n_pipes=120, repair=False)
+    blocked = np.flatnonzero(course.half_pipe == HALF_PIPE_TOP)[:3]
+    height = course.half_pipe_height.copy()
+    height[blocked] = 450
+
+    repaired = repair_course(course._replace(half_pipe_height=height))
+    assert solve(repaired).feasible
+    assert (repaired.half_pipe[blocked] == NO_HALF_PIPE).all()
+    assert (repaired.half_pipe != course.half_pipe).sum() == len(blocked)
+    assert np.array_equal(repaired.gap_top, course.gap_top)
+
+
+def test_solve_resumes_from_a_carried_reachable_set():
+    """Solving the new pipes of a grown course from where the earlier ones leave the bird matches solving it all."""
+    builder = CourseBuilder(seed=3)
+    first = builder.grow(REPAIR_BLOCK)
+    grown = builder.grow(REPAIR_BLOCK * 3)
+    for field, extended in zip(first, grown):
+        assert np.array_equal(field, extended[:REPAIR_BLOCK])
+    carried = solve(first, carry=int(grown.spawn_tick[REPAIR_BLOCK])).reachable
+    assert solve(grown).feasible and solve(grown, entry=carried).feasible
+
+    index = REPAIR_BLOCK + np.flatnonzero(grown.half_pipe[REPAIR_BLOCK:] == HALF_PIPE_TOP)[0]
+    height = grown.half_pipe_height.copy()
+    height[index] = 450
+    blocked = grown._replace(half_pipe_height=height)
+    assert solve(blocked, entry=carried) == solve(blocked)
+    assert solve(blocked).obstacle == index and solve(blocked).half_pipe
@@ -0,0 +1,39 @@
+"""
+Tests for the compiled biome palettes.
+"""
+import pygame
+
+from flappy_bird.constants import BIOMES, BIOME_INTERVAL
+from flappy_bird.graphics import draw_scene, scene_palette
+from flappy_bird.palette import FADE_TICKS, biome_index, biome_table
+from flappy_bird.simulation import Simulation
+
+
+def test_table_maps_biome_colours_and_fades():
+    """Palettes hold mapped biome colours; fades run from the previous biome into the next."""
+    surface = pygame.Surface((400, 600))
+    table = biome_table(surface)
+    assert biome_table(surface) is table
+    for biome, colors in enumerate(BIOMES):
+        assert table.palette(biome).sky == surface.map_rgb(colors["sky_color"])
+        assert table.palette(biome, FADE_TICKS - 1) == table.palette(biome)
+    first = surface.unmap_rgb(table.palette(1, 0).sky)
+    assert abs(first.r - BIOMES[0]["sky_color"].red) < abs(first.r - BIOMES[1]["sky_color"].red)
+    assert biome_index(len(BIOMES) * BIOME_INTERVAL + BIOME_INTERVAL) == 1
+
+
+def test_scene_fades_after_biome_change():
+    """The simulation notes the tick its biome changed and the sky cross-fades from there."""
+    sim = Simulation(0)
+    while sim.score < BIOME_INTERVAL:
+        sim.step(sim.bird.y > 350)  # Score through invincibility; the course is what matters here
+        sim.lives = 3.0
+    assert sim.biome == 1 and sim.biome_tick == sim.tick
+    surface = pygame.Surface((400, 600))
+    sky = surface.unmap_rgb(scene_palette(surface, sim).sky)
+    assert sky != BIOMES[1]["sky_color"] and sky != BIOMES[0]["sky_color"]
+    for _ in range(FADE_TICKS):
+        sim.step(sim.bird.y > 350)
+    draw_scene(surface, sim, sim.now)
+    assert surface.get_at((0, 600 - 50)) == BIOMES[1]["ground_color"]
+    assert surface.unmap_rgb(scene_palette(surface, sim).sky) == BIOMES[1]["sky_color"]
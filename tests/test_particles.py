@@ -0,0 +1,31 @@
+"""
+Tests for pooled particle effects.
+"""
+import pygame
+
+from flappy_bird.particles import FEATHERS, SPARKLES, ParticleSystem, draw_particles
+
+
+def test_particles_move_fade_and_free_their_slots():
+    """A burst flies apart under gravity and frees its slots once its life runs out."""
+    particles = ParticleSystem(capacity=64, budget=64, seed=1)
+    assert particles.emit(FEATHERS, 200, 300) == FEATHERS.burst
+    y = particles.y[:FEATHERS.burst].copy()
+    for _ in range(FEATHERS.life[1]):
+        particles.update()
+    assert (particles.y[:FEATHERS.burst] != y).any()
+    assert particles.live == 0 and len(particles.frame().sprite) == 0
+    assert particles.emit(SPARKLES, 0, 0) == SPARKLES.burst  # Slots are reused
+
+
+def test_budget_thins_bursts_and_drawing_batches_them():
+    """Bursts get sparser as the budget fills and stop at it; live particles are drawn where they are."""
+    particles = ParticleSystem(capacity=64, budget=40, seed=2)
+    counts = [particles.emit(FEATHERS, 100, 100) for _ in range(5)]
+    assert counts[0] == FEATHERS.burst and counts[1] < FEATHERS.burst and counts[-1] == 0
+    assert particles.live == 40 and particles.skipped == 5 * FEATHERS.burst - 40
+
+    surface = pygame.Surface((400, 600))
+    draw_particles(surface, particles.frame())
+    assert surface.get_at((100, 100))[:3] != (0, 0, 0)
+    assert surface.get_at((300, 500))[:3] == (0, 0, 0)
@@ -0,0 +1,36 @@
+"""
+Tests for the pre-rendered pipe sprites.
+"""
+import pygame
+
+from flappy_bird.constants import BIOMES
+from flappy_bird.pipe import Pipe, HalfPipe, draw_pipes, get_pipe_sprites, clear_pipe_sprites
+
+
+def test_sprites_are_cached_per_biome():
+    """Each biome's colours get one set of sprites until the cache is cleared."""
+    day, evening = get_pipe_sprites(0), get_pipe_sprites(1)
+    assert get_pipe_sprites(0) is day
+    assert day.body.get_at((0, 0)) == BIOMES[0]["pipe_color"]
+    assert evening.cap.get_at((0, 0)) == BIOMES[1]["pipe_cap_color"]
+    clear_pipe_sprites()
+    assert get_pipe_sprites(0) is not day
+
+
+def test_batched_draw_matches_pipe_shapes():
+    """Pipes drawn from sprites cover their rects and caps, with arrows on moving pipes."""
+    pipe = Pipe(0, moving=True, height=200, move_phase=0.0)
+    pipe.x = 100.0
+    pipe.update(0)
+    half_pipe = HalfPipe(3, position=HalfPipe.BOTTOM, height=200, x_position=250.0)
+    surface = pygame.Surface((400, 600))
+    surface.fill((0, 0, 0))
+    draw_pipes(surface, [pipe], [half_pipe])
+
+    x = int(pipe.x) + 10
+    assert surface.get_at((x, 10)) == BIOMES[0]["pipe_color"]
+    assert surface.get_at((x, pipe.top_pipe.height - 5)) == BIOMES[0]["pipe_cap_color"]
+    assert surface.get_at((x, pipe.top_pipe.height + 5)) == (0, 0, 0)
+    assert surface.get_at((int(pipe.x) + 30, pipe.top_pipe.height - 25)) == (255, 255, 0)  # Arrow
+    assert surface.get_at((260, half_pipe.pipe_rect.bottom - 5)) == BIOMES[3]["pipe_color"]
+    assert surface.get_at((260, half_pipe.pipe_rect.y - 5)) == (0, 0, 0)
@@ -0,0 +1,54 @@
+"""
+Tests for population mode.
+"""
+import numpy as np
+import pygame
+import pytest
+
+from flappy_bird.config import GameConfig
+from flappy_bird.population import Population
+from flappy_bird.simulation import Simulation, EVENT_HEART, EVENT_HIT
+
+
+@pytest.mark.parametrize("pixel_collision", [False, True])
+def test_population_matches_single_bird_games(pixel_collision):
+    """Each bird of a population dies on the tick its own single-bird game takes its first hit."""
+    thresholds = np.linspace(180, 420, 12)
+    config = GameConfig(pixel_collision=pixel_collision)
+    population = Population(len(thresholds), seed=4, config=config)
+    sims = [Simulation(4, course=population.course, config=config) for _ in thresholds]
+    first_hit = [-1] * len(sims)
+    while not population.game_over and population.tick < 3000:
+        population.step(population.y[:population.n_alive] > thresholds[population.alive_ids])
+        for bird, sim in enumerate(sims):
+            if first_hit[bird] < 0 and EVENT_HIT in sim.step(sim.bird.y > thresholds[bird]):
+                first_hit[bird] = sim.tick
+    assert population.game_over
+    assert list(population.death_tick) == first_hit
+    assert sorted(population.ids) == list(range(len(thresholds)))
+
+
+def test_population_draws_live_birds():
+    """Drawing blits one sprite per live bird on top of the course."""
+    population = Population(200, seed=0)
+    population.step(np.arange(200) % 2 == 0)
+    surface = pygame.Surface((400, 600))
+    population.draw(surface)
+    assert surface.get_at((100, int(population.y[0]))) != surface.get_at((5, int(population.y[0])))
+
+
+@pytest.mark.parametrize("pixel_collision", [False, True])
+def test_population_with_lives_matches_single_bird_games(pixel_collision):
+    """With lives, each bird's game ends on the tick and score of its own game, hearts and fall damage included."""
+    thresholds = np.linspace(150, 450, 16)
+    config = GameConfig(heart_frequency=2000, pixel_collision=pixel_collision)
+    population = Population(len(thresholds), seed=4, config=config, single_life=False)
+    sims = [Simulation(4, course=population.course, config=config) for _ in thresholds]
+    hearts = 0
+    while not population.game_over and population.tick < 5000:
+        population.step(population.y[:population.n_alive] > thresholds[population.alive_ids])
+        for bird, sim in enumerate(sims):
+            hearts += EVENT_HEART in sim.step(sim.bird.y > thresholds[bird])
+    assert population.game_over and all(sim.game_over for sim in sims) and hearts > 0
+    assert list(population.death_tick) == [sim.tick for sim in sims]
+    assert list(population.death_score) == [sim.score for sim in sims]
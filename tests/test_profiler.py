@@ -0,0 +1,33 @@
+"""
+Tests for the sampling profiler.
+"""
+import time
+
+from flappy_bird.profiler import SamplingProfiler, from_environment, read_collapsed, summarize
+
+
+def _spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_samples_are_tagged_with_the_scene(tmp_path):
+    """Stacks of the main thread are counted per scene and round-trip through a collapsed-stack file."""
+    with SamplingProfiler(interval=0.001) as profiler:
+        profiler.set_scene("playing", 2)
+        _spin(0.2)
+        profiler.set_scene("game_over", 2)
+        _spin(0.1)
+    assert not profiler.running
+    path = str(tmp_path / "profile.folded")
+    profiler.write(path)
+    counts = read_collapsed(path)
+    assert sum(counts.values()) == sum(profiler.samples.values()) > 20
+    spinning = {stack[:2] for stack in counts if stack[-1].startswith("_spin (test_profiler.py:")}
+    assert spinning == {("playing", "biome 2"), ("game_over", "biome 2")}
+    assert summarize(counts)[1].endswith("playing biome 2")
+
+    assert from_environment({}) == (None, 0.005)
+    assert from_environment({"FLAPPY_BIRD_PROFILE": "out.folded", "FLAPPY_BIRD_PROFILE_INTERVAL": "20"}) == \
+        ("out.folded", 0.02)
@@ -0,0 +1,60 @@
+"""
+Tests for the snapshot render pipeline.
+"""
+import pygame
+
+from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from flappy_bird.display import Presenter
+from flappy_bird.render import RenderSnapshot, RenderThread, draw_frame, draw_snapshot
+from flappy_bird.simulation import Simulation
+
+
+def _played_in(ticks: int = 400) -> Simulation:
+    sim = Simulation(7)
+    while (sim.tick < ticks or sim.invincible) and not sim.game_over:  # Invincible birds flash by the clock
+        sim.step(sim.tick % 24 == 0)
+    return sim
+
+
+def test_snapshot_draws_the_frame_it_captured():
+    """A snapshot draws exactly what the simulation showed at capture, however far the game moves on."""
+    pygame.font.init()
+    font = pygame.font.Font(None, 24)
+    sim = _played_in()
+    assert sim.pipes and not sim.invincible and not sim.game_over
+    expected = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    draw_frame(expected, sim, font, "playing", 1000, status="Autopilot 1.0M nodes/s")
+    snapshot = RenderSnapshot.capture(sim, "playing", 1000, status="Autopilot 1.0M nodes/s")
+    x, bird_y = snapshot.pipes[0].x, snapshot.bird.y
+
+    for _ in range(30):
+        sim.step(sim.tick % 24 == 0)
+    assert snapshot.pipes[0].x == x and snapshot.bird.y == bird_y and sim.pipes[0].x != x
+    drawn = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    draw_snapshot(drawn, snapshot, font)
+    assert pygame.image.tobytes(drawn, "RGB") == pygame.image.tobytes(expected, "RGB")
+
+
+def test_render_thread_swaps_drawn_frames_to_the_front():
+    """Submitted snapshots are drawn on the render thread and presented from the front surface."""
+    pygame.display.init()
+    pygame.font.init()
+    try:
+        presenter = Presenter()
+        font = pygame.font.Font(None, 24)
+        renderer = RenderThread(font)
+        try:
+            sim = _played_in(100)
+            for state in ("playing", "game_over"):
+                renderer.submit(RenderSnapshot.capture(sim, state, 0, rank=1, games=3))
+                assert renderer.wait(timeout=10)
+            assert renderer.frames == 2 and renderer.dropped == 0
+            expected = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+            draw_frame(expected, sim, font, "game_over", 0, rank=1, games=3)
+            presenter.window.fill((0, 0, 0))
+            renderer.present(presenter)
+            assert pygame.image.tobytes(presenter.window, "RGB") == pygame.image.tobytes(expected, "RGB")
+        finally:
+            renderer.stop()
+    finally:
+        pygame.display.quit()
@@ -0,0 +1,41 @@
+"""
+Tests for replays and the parallel replay renderer.
+"""
+import os
+
+import numpy as np
+import pygame
+
+from flappy_bird.constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from flappy_bird.replay import Replay, draw_frame, render
+
+
+def test_parallel_render_matches_serial_drawing(tmp_path):
+    """Frames rendered by the pool from keyframes equal drawing the replayed game in order."""
+    flaps = np.arange(70) % 9 == 0
+    path = str(tmp_path / "run.npz")
+    Replay(seed=4, game=1, flaps=flaps).save(path)
+    replay = Replay.load(path)
+    assert (replay.seed, replay.game) == (4, 1) and np.array_equal(replay.flaps, flaps)
+
+    output = str(tmp_path / "frames.rgb")
+    assert render(replay, output, workers=2, start=10, chunk_frames=16) == 60
+    frames = np.fromfile(output, dtype=np.uint8).reshape(60, SCREEN_HEIGHT, SCREEN_WIDTH, 3)
+
+    pygame.init()
+    font = pygame.font.Font(None, 24)
+    sim = replay.simulation()
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    for tick, flap in enumerate(flaps.tolist()):
+        sim.step(flap)
+        if tick in (10, 31, 69):
+            draw_frame(surface, sim, font)
+            expected = np.frombuffer(pygame.image.tobytes(surface, "RGB"), dtype=np.uint8)
+            # The HUD font may differ from the workers' system font, so compare the world below it
+            rows = slice(60, SCREEN_HEIGHT)
+            assert np.array_equal(frames[tick - 10][rows], expected.reshape(frames.shape[1:])[rows])
+
+    png_dir = str(tmp_path / "png")
+    assert render(replay, png_dir, "png", workers=2, start=65) == 5
+    assert sorted(os.listdir(png_dir)) == [f"frame-{frame:06d}.png" for frame in range(65, 70)]
+    assert pygame.image.load(os.path.join(png_dir, "frame-000069.png")).get_size() == (SCREEN_WIDTH, SCREEN_HEIGHT)
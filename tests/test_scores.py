@@ -0,0 +1,42 @@
+"""
+Tests for the high-score store.
+"""
+import os
+
+import numpy as np
+
+from flappy_bird.scores import LOG_NAME, RankIndex, ScoreStore
+
+
+def test_rank_index_matches_sorted_scores():
+    """Ranks and top scores agree with sorting every score, also after the index grows."""
+    rng = np.random.default_rng(0)
+    scores = rng.geometric(0.1, size=500).tolist() + [300]
+    index = RankIndex()
+    for score in scores:
+        index.add(score)
+    ordered = sorted(scores, reverse=True)
+    assert index.top(10) == ordered[:10] and index.top(1000) == ordered
+    for score in (0, 1, 5, 17, 299, 300, 301):
+        assert index.rank(score) == 1 + sum(s > score for s in scores)
+    assert RankIndex(index.counts).top(20) == ordered[:20]
+
+
+def test_store_survives_torn_appends_and_snapshots(tmp_path):
+    """Reopening restores every complete record, from a snapshot and the log after it."""
+    directory = str(tmp_path)
+    store = ScoreStore(directory, snapshot_interval=4)
+    ranks = [store.add(score) for score in (5, 9, 2, 9, 7, 1)]
+    assert ranks == [1, 1, 3, 1, 3, 6]
+    assert store.snapshot_records == 4
+    store._log.close()  # A crash: no final snapshot, and half a record at the end of the log
+    with open(os.path.join(directory, LOG_NAME), "ab") as log:
+        log.write(b"\x07\x00\x00\x00\x00\x00")
+
+    with ScoreStore(directory, snapshot_interval=4) as reopened:
+        assert len(reopened) == 6 and reopened.top(3) == [9, 9, 7]
+        assert reopened.add(8) == 3
+    assert os.path.getsize(os.path.join(directory, LOG_NAME)) == 7 * 12
+    os.remove(os.path.join(directory, "snapshot.npz"))
+    with ScoreStore(directory) as rebuilt:
+        assert rebuilt.top(10) == [9, 9, 8, 7, 5, 2, 1] and rebuilt.rank(6) == 5
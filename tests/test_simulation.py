@@ -0,0 +1,74 @@
+"""
+Tests for the headless game simulation.
+"""
+from flappy_bird.course import REPAIR_BLOCK
+from flappy_bird.simulation import Simulation, EVENT_SCORE
+
+
+def play(sim, ticks):
+    """Flap whenever the bird sinks below the middle of the screen."""
+    events = []
+    for _ in range(ticks):
+        events.extend(sim.step(sim.bird.y > 280))
+    return events
+
+
+def test_same_seed_same_game():
+    """Two simulations with the same seed and inputs stay identical."""
+    first, second = Simulation(seed=7), Simulation(seed=7)
+    assert play(first, 400) == play(second, 400)
+    assert [pipe.height for pipe in first.pipes] == [pipe.height for pipe in second.pipes]
+    assert (first.bird.y, first.score, first.lives) == (second.bird.y, second.score, second.lives)
+
+
+def test_snapshot_restore_replays_exactly():
+    """Restoring a snapshot rewinds the game, including its random generator."""
+    sim = Simulation(seed=3)
+    play(sim, 150)
+    snapshot = sim.snapshot()
+    events = play(sim, 300)
+    state = (sim.tick, sim.bird.y, sim.score, [pipe.x for pipe in sim.pipes])
+
+    sim.restore(snapshot)
+    assert play(sim, 300) == events
+    assert (sim.tick, sim.bird.y, sim.score, [pipe.x for pipe in sim.pipes]) == state
+
+
+def test_scoring_events():
+    """Passing a pipe raises the score and reports a score event."""
+    sim = Simulation(seed=1)
+    events = play(sim, 400)
+    assert sim.score == events.count(EVENT_SCORE) > 0
+
+
+def test_pipes_follow_the_course():
+    """Pipes are spawned from the pre-generated course, and a fixed course is replayed by every game."""
+    sim = Simulation(seed=2)
+    play(sim, 400)
+    heights = [pipe.height for pipe in sim.pipes]
+    assert heights == list(sim.course.gap_top[sim.next_pipe - len(heights):sim.next_pipe])
+
+    replay = Simulation(seed=9, course=sim.course)
+    replay.reset()
+    play(replay, 400)
+    assert [pipe.height for pipe in replay.pipes] == heights
+
+
+def test_prepare_course_builds_ahead():
+    """prepare_course() grows the course past the next pipes and, once the game is over, builds the next game's."""
+    sim, plain = Simulation(seed=6), Simulation(seed=6)
+    while sim.next_pipe == 0:
+        sim.step(False)
+        plain.step(False)
+    sim.prepare_course()
+    assert len(sim.course.gap_top) == REPAIR_BLOCK and len(sim.course_builder.course.gap_top) == 2 * REPAIR_BLOCK
+
+    for game in (sim, plain):
+        while not game.game_over:
+            game.step(game.bird.y > 280)
+    sim.prepare_course()
+    prepared = sim.next_course_builder
+    sim.reset()
+    plain.reset()
+    assert sim.course_builder is prepared
+    assert all((a == b).all() for a, b in zip(sim.course, plain.course))
@@ -0,0 +1,39 @@
+"""
+Tests for the soak test's sampling and drift report.
+"""
+import pygame
+import pytest
+
+from flappy_bird.soak import Sample, drift, report, run
+
+
+@pytest.fixture
+def headless_pygame(monkeypatch):
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    yield
+    pygame.quit()
+
+
+def _sample(hour: int, rss: int, p50: float = 1.0) -> Sample:
+    return Sample(hours=hour, games=hour, rss=rss, traced=None, pipes=2, half_pipes=2, hearts=1, slots=16,
+                  p50=p50, p99=p50 * 2, worst=p50 * 3)
+
+
+def test_drift_flags_growth_but_not_noise():
+    """Steady growth and a shift between halves are flagged; a flat, noisy series is not."""
+    assert drift([50, 100, 101, 102, 103, 104], 0.05) is not None  # Grows at every sample
+    assert drift([50, 1.0, 1.1, 1.0, 1.6, 1.5, 1.7], 0.25) is not None  # Slower in the second half
+    assert drift([50, 100, 98, 101, 99, 100, 100], 0.05) is None
+    lines, flagged = report([_sample(hour, 100 << 20) for hour in range(6)]
+                            + [_sample(hour, 150 << 20, p50=3.0) for hour in range(6, 12)])
+    assert flagged == ["rss", "p50", "p99"]
+    assert lines[-1] == "flagged: rss, p50, p99"
+
+
+def test_run_samples_the_game_loop(headless_pygame):
+    """A short headless run plays, draws and samples the game at even intervals."""
+    samples, _ = run(hours=0.01, samples=3, trace=True)
+    assert [round(sample.hours, 4) for sample in samples] == [0.0033, 0.0067, 0.01]
+    assert all(sample.traced is not None and sample.pipes >= 1 and sample.p50 > 0 for sample in samples)
@@ -0,0 +1,47 @@
+"""
+Tests for fast startup.
+"""
+import os
+import subprocess
+import sys
+
+import pygame
+import pytest
+
+from flappy_bird import startup
+from flappy_bird.game import DEFERRED_MODULES
+
+# Seconds the game module may add to importing pygame; generous, since cold caches on CI runners are slow
+IMPORT_BUDGET = float(os.environ.get("FLAPPY_BIRD_IMPORT_BUDGET", "2.0"))
+
+
+def test_game_import_stays_within_budget():
+    """Importing the game module leaves the game modules to the warm-up thread and does not take long."""
+    code = ("import sys, time, pygame\n"
+            "started = time.perf_counter()\n"
+            "import flappy_bird.game\n"
+            "print(time.perf_counter() - started)\n"
+            f"print(','.join(name for name in {DEFERRED_MODULES!r} if name in sys.modules))\n")
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    elapsed, loaded = output.splitlines()[-2:]
+    assert loaded == ""  # What keeps the import fast; the time below only catches gross regressions
+    assert float(elapsed) < IMPORT_BUDGET
+
+
+def test_font_path_is_cached_between_runs(tmp_path, monkeypatch):
+    """The system font scan runs once; later lookups read the cache unless the cached file is gone."""
+    font_file = tmp_path / "arial.ttf"
+    font_file.write_bytes(b"")
+    scans = []
+    monkeypatch.setattr(pygame.font, "match_font", lambda name: scans.append(name) or str(font_file))
+    assert startup.font_path("arial", str(tmp_path)) == str(font_file)
+    assert startup.font_path("arial", str(tmp_path)) == str(font_file)
+    assert scans == ["arial"]
+    font_file.unlink()
+    startup.font_path("arial", str(tmp_path))
+    assert scans == ["arial", "arial"]
+
+    warm_up = startup.WarmUp(lambda: 1 / 0)
+    warm_up.start()
+    with pytest.raises(ZeroDivisionError):
+        warm_up.result()
@@ -0,0 +1,34 @@
+"""
+Tests for difficulty sweeps.
+"""
+import numpy as np
+
+from flappy_bird.config import DEFAULT_CONFIG
+from flappy_bird.sweep import config_grid, sweep
+
+
+def test_sweep_over_grid():
+    """Every config of the grid gets all its episodes, and a wider gap is easier."""
+    configs = config_grid(["pipe_gap=120,220", "heart_frequency=5000"])
+    assert [config.pipe_gap for config in configs] == [120, 220]
+    assert configs[0] == DEFAULT_CONFIG._replace(pipe_gap=120, heart_frequency=5000)
+
+    narrow, wide = sweep(configs, episodes=1500, workers=2, max_ticks=1800)
+    assert len(narrow.scores) == len(wide.scores) == 1500
+    assert np.all(narrow.ticks <= 1800)
+    assert wide.scores.mean() > narrow.scores.mean()
+    curve = wide.survival(1800)
+    assert len(curve) == 31 and curve[0] == 1.0 and np.all(np.diff(curve) <= 0)
+
+
+def test_sweep_honours_pixel_collision():
+    """Swept with pixel collision, some birds die earlier on the pipe caps the box ignores."""
+    boxes, pixels = sweep(config_grid(["pixel_collision=0,1", "pipe_gap=120"]), episodes=300, workers=1,
+                          max_ticks=1800)
+    assert np.any(pixels.ticks < boxes.ticks)
+
+
+def test_sweep_plays_with_lives():
+    """Episodes go on after a hit, so the heart and fall damage rules change the results."""
+    rare, frequent = sweep(config_grid(["heart_frequency=30000,1000"]), episodes=300, workers=1, max_ticks=1800)
+    assert frequent.scores.mean() > rare.scores.mean()
@@ -0,0 +1,40 @@
+"""
+Tests for gameplay telemetry.
+"""
+import numpy as np
+
+from flappy_bird.observation import N_FEATURES, write_features
+from flappy_bird.simulation import Simulation, EVENT_HEART, EVENT_HIT, EVENT_SCORE
+from flappy_bird.telemetry import CAUSES, Telemetry
+
+
+def test_hooks_count_game_events_and_sessions_add_up(tmp_path):
+    """Hits, points and hearts land in the histograms without changing the game, and load() sums sessions."""
+    plain, recorded = Simulation(1), Simulation(1)
+    recorded.telemetry = telemetry = Telemetry(str(tmp_path))
+    counts = {EVENT_HIT: 0, EVENT_SCORE: 0, EVENT_HEART: 0}
+    features = np.empty(N_FEATURES, dtype=np.float32)
+    while not recorded.game_over:
+        # Flap near the bottom of the next opening
+        flap = bool(write_features(recorded, features)[0] > features[3] - 0.03)
+        plain.step(flap)
+        for event in recorded.step(flap):
+            if event in counts:
+                counts[event] += 1
+    assert (plain.score, plain.lives, plain.tick) == (recorded.score, recorded.lives, recorded.tick)
+    assert counts[EVENT_HIT] > 1 and counts[EVENT_HEART] > 0
+    assert telemetry.hits.sum() == telemetry.damage.sum() == telemetry.fall.sum() == counts[EVENT_HIT]
+    assert telemetry.hits[1].sum() == telemetry.game_score[recorded.score] == 1
+    assert telemetry.points.sum() == counts[EVENT_SCORE] == recorded.score
+    assert telemetry.hearts_collected.sum() == counts[EVENT_HEART] <= telemetry.hearts_spawned.sum()
+    obstacle_hits = telemetry.hits[:, CAUSES.index("pipe"):].sum()
+    assert telemetry.hit_offset.sum() == obstacle_hits
+
+    telemetry.close()
+    second = Telemetry(str(tmp_path))
+    second.path = str(tmp_path / "session-other.npz")
+    second.add(telemetry)
+    second.flush()
+    total = Telemetry.load(str(tmp_path))
+    assert np.array_equal(total.hits, telemetry.hits * 2)
+    assert total.heart_pickup_rate() == telemetry.heart_pickup_rate()
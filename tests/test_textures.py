@@ -0,0 +1,35 @@
+"""
+Tests for the texture-based render backend.
+"""
+import pygame
+
+from flappy_bird.golden import MARGINS, scripted_flap, state_values
+from flappy_bird.render import draw_frame
+from flappy_bird.simulation import Simulation
+from flappy_bird.startup import get_font
+from flappy_bird.textures import TextureRenderer
+
+
+def test_textures_draw_the_surface_backends_frames():
+    """On SDL's software renderer, headless, both backends draw (nearly) the same pixels and frames upload nothing."""
+    pygame.init()
+    textures = TextureRenderer(software=True, hidden=True)
+    font = get_font(24)
+    textures.load([font])
+    uploads = textures.uploads
+    sim = Simulation(0)
+    for _ in range(700):
+        sim.step(scripted_flap(state_values(sim), MARGINS[2]))
+    try:
+        for state in ("playing", "game_over"):
+            surface = pygame.Surface(textures.window.size)
+            draw_frame(surface, sim, font, state, 5000, rank=3, games=10)
+            textures.draw_frame(sim, font, state, 5000, rank=3, games=10)
+            same = (pygame.surfarray.array3d(surface) == pygame.surfarray.array3d(textures.to_surface())).all(axis=2)
+            assert same.mean() > 0.98  # Text spacing and the turned bird differ by a few pixels
+            assert same[:, 400:].all()  # Below the text and the bird: pipes, scenery and ground
+        assert textures.uploads == uploads
+        textures.present()
+    finally:
+        textures.close()
+        pygame.quit()
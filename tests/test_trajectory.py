@@ -0,0 +1,68 @@
+"""
+Tests for the memory-mapped trajectory store.
+"""
+import numpy as np
+import pytest
+
+from flappy_bird.simulation import Simulation
+from flappy_bird.trajectory import TrajectoryReader, TrajectoryWriter, record_games
+
+
+def test_rows_span_chunks_and_shards(tmp_path):
+    """Rows written by two writers across chunk boundaries read back intact; unfinished episodes stay hidden."""
+    obs = np.arange(50 * 10, dtype=np.float32).reshape(50, 10)
+    action = np.arange(50, dtype=np.uint8) % 2
+    reward = np.arange(50, dtype=np.float32)
+    done = np.zeros(50, dtype=bool)
+    done[[19, 44]] = True
+    first, second = TrajectoryWriter(str(tmp_path), chunk_rows=16), TrajectoryWriter(str(tmp_path), chunk_rows=16)
+    with first, second:
+        assert first.shard != second.shard
+        first.append(obs, action, reward, done)
+        second.append(obs[:20], action[:20], reward[:20], done[:20])
+
+    reader = TrajectoryReader(str(tmp_path))
+    assert reader.n_episodes == 3
+    assert len(reader) == 45 + 20
+    rows = reader.rows(np.arange(len(reader)))
+    expected = np.concatenate((reward[:45], reward[:20]) if reader.shards[0] == first.shard
+                              else (reward[:20], reward[:45]))
+    assert np.array_equal(rows["reward"], expected)
+    assert np.array_equal(rows["obs"][:, 0], expected * 10)
+
+    batch = reader.sample(32, np.random.default_rng(0))
+    assert batch.obs.shape == (32, 10)
+    assert set(batch.reward) <= set(reward[:45])
+
+
+def test_shards_keep_their_own_chunk_size_and_layout(tmp_path):
+    """Shards written with different chunk sizes read back intact; shards of different row layouts are refused."""
+    reward = np.arange(40, dtype=np.float32)
+    done = np.zeros(40, dtype=bool)
+    done[-1] = True
+    for chunk_rows in (7, 16):
+        with TrajectoryWriter(str(tmp_path / "store"), chunk_rows=chunk_rows) as writer:
+            writer.append(np.zeros((40, 10), dtype=np.float32), np.zeros(40, dtype=np.uint8), reward, done)
+    reader = TrajectoryReader(str(tmp_path / "store"))
+    assert sorted(reader.chunk_rows) == [7, 16]
+    assert np.array_equal(reader.rows(np.arange(len(reader)))["reward"], np.concatenate((reward, reward)))
+
+    with TrajectoryWriter(str(tmp_path / "store"), obs_dim=4) as writer:
+        writer.append(np.zeros((40, 4), dtype=np.float32), np.zeros(40, dtype=np.uint8), reward, done)
+    with pytest.raises(ValueError):
+        TrajectoryReader(str(tmp_path / "store"))
+
+
+def test_record_games_logs_rewards_and_episode_ends(tmp_path):
+    """Each recorded game is one contiguous episode ending with a done row, and passing pipes is rewarded."""
+    sims = [Simulation(seed) for seed in range(2)]
+    with TrajectoryWriter(str(tmp_path)) as writer:
+        rows = record_games(writer, sims, lambda sim: sim.bird.y > 300, max_ticks=600)
+    reader = TrajectoryReader(str(tmp_path))
+    assert len(reader) == rows == sum(sim.tick for sim in sims)
+    data = reader.rows(np.arange(rows))
+    assert data["done"].sum() == 2
+    assert sorted(np.diff(reader.episode_ends[0], prepend=0)) == sorted(sim.tick for sim in sims)
+    assert np.array_equal(np.flatnonzero(data["done"]) + 1, reader.episode_ends[0])
+    assert np.isin(data["reward"], (-1, 0, 1)).all()
+    assert 0 < (data["reward"] > 0).sum() <= sum(sim.score for sim in sims)